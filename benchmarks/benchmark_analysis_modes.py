@@ -0,0 +1,170 @@
+"""
+Benchmark harness comparing orchestrator analysis modes.
+
+Runs each mode over the same processed inputs and records latency, LLM call
+count and how closely each mode's output agrees with the parallel pipeline
+(skill level, weak topics, task coverage of weak topics). Each mode gets one
+untimed warm-up run first, so one-time client imports and model setup are
+not charged to whichever mode happens to run first.
+
+Usage:
+    python benchmarks/benchmark_analysis_modes.py [--input samples.json] [--runs 3] [--mock]
+
+--input takes a JSON list of processed_data dicts (normalize_activities output).
+Without it a small synthetic sample is used. --mock replaces Gemini with a
+canned client so the harness can be smoke-tested without an API key.
+Results are written to benchmarks/results/analysis_modes_<timestamp>.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.agents.orchestrator_agent import ANALYSIS_MODES, OrchestratorAgent
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SAMPLE_INPUT = [{
+    "activities": [
+        {"platform": "codeforces", "id": "1850A", "tags": ["math", "greedy"], "verdict": "OK"},
+        {"platform": "codeforces", "id": "1850D", "tags": ["dp", "graphs"], "verdict": "WRONG_ANSWER"},
+        {"platform": "leetcode", "id": "two-sum", "tags": ["hash-table"], "verdict": "ACCEPTED"},
+    ],
+    "growth_metrics": {
+        "platform_stats": {
+            "codeforces": {"solved": 140, "total": 310, "rating": 1420},
+            "leetcode": {"solved": 85, "total": 120},
+        },
+        "total_platforms": 2,
+        "days_active": 64,
+        "streak": {"current": 3, "longest": 12},
+    },
+}]
+
+
+class CountingClient:
+    """Wraps an LLM client and counts calls."""
+
+    def __init__(self, llm_client):
+        self.llm_client = llm_client
+        self.calls = 0
+
+    async def __call__(self, prompt, model_name="gemini-2.0-flash", **kwargs):
+        self.calls += 1
+        return await self.llm_client(prompt, model_name, **kwargs)
+
+
+async def mock_llm_client(prompt, model_name="gemini-2.0-flash", **kwargs):
+    """Canned responses shaped like each agent's expected output."""
+    await asyncio.sleep(0.05)
+    analysis = {"skill_level": "Intermediate", "languages": ["C++"], "patterns": ["Regular practice"],
+                "platform_preference": "codeforces"}
+    weaknesses = {"weak_topics": ["dp", "graphs"], "missing_fundamentals": ["trees"],
+                  "improvement_priority": ["dp"]}
+    tasks = [{"title": f"Practice {t}", "difficulty": "Medium", "topic": t, "due_days": 3, "reason": "weak"}
+             for t in ("dp", "graphs", "trees")]
+    if kwargs.get("response_schema"):
+        return json.dumps({"analysis": analysis, "weaknesses": weaknesses, "tasks": tasks})
+    if prompt.startswith("Analyze this coding activity"):
+        return json.dumps(analysis)
+    if prompt.startswith("Based on this coding activity"):
+        return json.dumps(weaknesses)
+    return json.dumps(tasks)
+
+
+def _weak_topics(result: Dict) -> List[str]:
+    return [str(t).lower() for t in result.get("weaknesses", {}).get("weaknesses", {}).get("weak_topics", [])]
+
+
+def _skill_level(result: Dict) -> str:
+    return str(result.get("analysis", {}).get("analysis", {}).get("skill_level", "")).lower()
+
+
+def compare_quality(result: Dict, reference: Dict) -> Dict:
+    """Agreement of one mode's output with the reference (parallel) output."""
+    weak, ref_weak = set(_weak_topics(result)), set(_weak_topics(reference))
+    union = weak | ref_weak
+    tasks = result.get("tasks", [])
+    covered = [t for t in tasks if str(t.get("topic", "")).lower() in weak]
+    return {
+        "skill_level_agrees": _skill_level(result) == _skill_level(reference),
+        "weak_topic_jaccard": round(len(weak & ref_weak) / len(union), 3) if union else 1.0,
+        "task_count": len(tasks),
+        "tasks_on_weak_topics": round(len(covered) / len(tasks), 3) if tasks else 0.0,
+        "execution_mode": result.get("agent_execution", {}).get("execution_mode"),
+    }
+
+
+async def benchmark(samples: List[Dict], runs: int, llm_client) -> Dict:
+    report = {mode: {"latencies": [], "llm_calls": [], "quality": []} for mode in ANALYSIS_MODES}
+
+    for mode in ANALYSIS_MODES:
+        await OrchestratorAgent(CountingClient(llm_client)).run("bench-warmup", samples[0], mode=mode)
+
+    for index, processed in enumerate(samples):
+        for _ in range(runs):
+            outputs = {}
+            for mode in ANALYSIS_MODES:
+                client = CountingClient(llm_client)
+                start = time.perf_counter()
+                outputs[mode] = await OrchestratorAgent(client).run(f"bench-{index}", processed, mode=mode)
+                report[mode]["latencies"].append(time.perf_counter() - start)
+                report[mode]["llm_calls"].append(client.calls)
+            for mode in ANALYSIS_MODES:
+                report[mode]["quality"].append(compare_quality(outputs[mode], outputs["parallel"]))
+
+    summary = {}
+    for mode, data in report.items():
+        quality = data["quality"]
+        summary[mode] = {
+            "runs": len(data["latencies"]),
+            "latency_mean": round(statistics.mean(data["latencies"]), 3),
+            "latency_p50": round(statistics.median(data["latencies"]), 3),
+            "latency_max": round(max(data["latencies"]), 3),
+            "llm_calls_mean": round(statistics.mean(data["llm_calls"]), 2),
+            "skill_level_agreement": round(sum(q["skill_level_agrees"] for q in quality) / len(quality), 3),
+            "weak_topic_jaccard_mean": round(statistics.mean(q["weak_topic_jaccard"] for q in quality), 3),
+            "tasks_on_weak_topics_mean": round(statistics.mean(q["tasks_on_weak_topics"] for q in quality), 3),
+            "fallbacks": sum(q["execution_mode"] == "fused_fallback" for q in quality),
+        }
+    return {"summary": summary, "runs": report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare orchestrator analysis modes")
+    parser.add_argument("--input", help="JSON file with a list of processed_data samples")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per sample and mode")
+    parser.add_argument("--mock", action="store_true", help="Use a canned LLM client instead of Gemini")
+    args = parser.parse_args()
+
+    samples = SAMPLE_INPUT
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            samples = json.load(f)
+
+    if args.mock:
+        llm_client = mock_llm_client
+    else:
+        from services.analyser.llm_client import generate_text
+        llm_client = generate_text
+
+    results = asyncio.run(benchmark(samples, args.runs, llm_client))
+    results["config"] = {"samples": len(samples), "runs": args.runs, "mock": args.mock}
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"analysis_modes_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(results["summary"], indent=2))
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
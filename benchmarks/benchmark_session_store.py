@@ -0,0 +1,173 @@
+"""
+Benchmark harness for the SQLite session store under concurrent load.
+
+Runs the same create / update_context / get workload through two stores:
+
+- legacy: a new connection per call, rollback journal, synchronous=FULL,
+  read-modify-write of a JSON context list in two transactions (the
+  original PersistentSessionService behaviour)
+- pooled: PersistentSessionService through its async wrapper (pooled WAL
+  connections, synchronous=NORMAL, cached statements, append-only
+  session_events)
+
+Each run starts N concurrent asyncio tasks, each owning one session and
+doing --ops context updates followed by a read of the whole context, so
+legacy update cost grows with --ops while pooled appends stay flat.
+Legacy calls go through asyncio.to_thread so both stores see the same
+concurrency.
+
+Usage:
+    python benchmarks/benchmark_session_store.py [--concurrency 1,8,32] [--ops 50]
+
+Results are written to benchmarks/results/session_store_<timestamp>.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libs.sessions import PersistentSessionService
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class LegacySessionStore:
+    """Connect-per-call store with the pre-pooling SQLite settings."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL, context TEXT
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create(self, user_id: str) -> Dict:
+        session_id, now = str(uuid.uuid4()), time.time()
+        conn = self._connect()
+        conn.execute("INSERT INTO sessions VALUES (?, ?, ?, ?, ?)", (session_id, user_id, now, now, "[]"))
+        conn.commit()
+        conn.close()
+        return {"session_id": session_id}
+
+    def get(self, session_id: str, context_limit: int = None) -> Dict:
+        conn = self._connect()
+        row = conn.execute("SELECT context FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        conn.close()
+        if not row:
+            return None
+        context = json.loads(row[0])
+        return {"context": context[-context_limit:] if context_limit else context}
+
+    def update_context(self, session_id: str, item: Dict) -> bool:
+        session = self.get(session_id)
+        if not session:
+            return False
+        session["context"].append(item)
+        conn = self._connect()
+        conn.execute("UPDATE sessions SET context = ?, last_accessed = ? WHERE session_id = ?",
+                     (json.dumps(session["context"]), time.time(), session_id))
+        conn.commit()
+        conn.close()
+        return True
+
+
+class LegacyAsync:
+    """Runs LegacySessionStore calls on the default thread pool."""
+
+    def __init__(self, store: LegacySessionStore):
+        self.store = store
+
+    def __getattr__(self, name):
+        method = getattr(self.store, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return call
+
+
+async def _client(store, index: int, ops: int, latencies: List[float]) -> int:
+    start = time.perf_counter()
+    session_id = (await store.create(f"bench-{index}"))["session_id"]
+    latencies.append(time.perf_counter() - start)
+
+    for i in range(ops):
+        start = time.perf_counter()
+        await store.update_context(session_id, {"op": i, "payload": "x" * 200})
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    session = await store.get(session_id, context_limit=ops)
+    latencies.append(time.perf_counter() - start)
+    return len(session["context"])
+
+
+async def run_workload(store, concurrency: int, ops: int) -> Dict:
+    latencies: List[float] = []
+    start = time.perf_counter()
+    lengths = await asyncio.gather(*(_client(store, i, ops, latencies) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / elapsed, 1),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        "lost_updates": sum(ops - length for length in lengths),
+    }
+
+
+def benchmark(levels: List[int], ops: int) -> Dict:
+    summary = {}
+    for concurrency in levels:
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = LegacyAsync(LegacySessionStore(os.path.join(tmp, "legacy.db")))
+            pooled_service = PersistentSessionService(os.path.join(tmp, "pooled.db"))
+            try:
+                summary[str(concurrency)] = {
+                    "legacy": asyncio.run(run_workload(legacy, concurrency, ops)),
+                    "pooled": asyncio.run(run_workload(pooled_service.aio, concurrency, ops)),
+                }
+            finally:
+                pooled_service.close()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite session store")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrent client counts")
+    parser.add_argument("--ops", type=int, default=50, help="Context updates per client")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = {"summary": benchmark(levels, args.ops), "config": {"concurrency": levels, "ops": args.ops}}
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"session_store_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(results["summary"], indent=2))
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
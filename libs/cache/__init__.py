@@ -0,0 +1,4 @@
+# Cache package
+from libs.cache.tiered_cache import CacheEntry, LRUCache, SQLiteCache, TieredCache
+
+__all__ = ['CacheEntry', 'LRUCache', 'SQLiteCache', 'TieredCache']
@@ -0,0 +1,313 @@
+"""
+Two-tier cache: in-process LRU in front of a shared SQLite table.
+
+Entries carry their own TTL. Callers can read stale entries (for
+stale-while-revalidate) and decide themselves when to refresh them. Rows
+past ttl + max_stale, and the oldest rows beyond max_disk_entries, are swept
+from disk on the write path every CACHE_PURGE_INTERVAL seconds.
+"""
+import asyncio
+import sqlite3
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+import logging
+
+from libs.observability import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "data/cache.db")
+
+# Seconds between sweeps of expired and surplus disk rows, per cache
+CACHE_PURGE_INTERVAL = float(os.getenv("CACHE_PURGE_INTERVAL", "3600"))
+
+
+class CacheEntry(NamedTuple):
+    """A cached value with the time it was stored and its TTL in seconds."""
+    value: Any
+    stored_at: float
+    ttl: Optional[float]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.ttl is None or self.age < self.ttl
+
+
+class LRUCache:
+    """Bounded in-memory LRU of CacheEntry objects."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Persistent cache table shared by all namespaces.
+
+    Holds one connection for its lifetime (WAL, synchronous=NORMAL) and
+    serializes access to it with a lock, so it can be used from worker
+    threads.
+    """
+
+    def __init__(self, db_path: str = CACHE_DB_PATH):
+        self.db_path = db_path
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize connection settings and database schema."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Cache entries can be recomputed, so commits need not fsync
+            cursor.execute("PRAGMA synchronous=NORMAL")
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    ttl REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+
+            self._conn.commit()
+
+    def get(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                SELECT value, stored_at, ttl FROM cache_entries
+                WHERE namespace = ? AND key = ?
+            """, (namespace, key))
+            row = cursor.fetchone()
+
+        if not row:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
+
+    def set(self, namespace: str, key: str, entry: CacheEntry):
+        value = json.dumps(entry.value)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at, ttl)
+                VALUES (?, ?, ?, ?, ?)
+            """, (namespace, key, value, entry.stored_at, entry.ttl))
+
+    def delete(self, namespace: str, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                DELETE FROM cache_entries WHERE namespace = ? AND key = ?
+            """, (namespace, key))
+
+    def purge(self, namespace: str, max_stale: Optional[float] = None,
+              max_entries: Optional[int] = None) -> int:
+        """
+        Delete a namespace's expired rows and its oldest rows beyond a cap.
+
+        Args:
+            namespace: Namespace to sweep
+            max_stale: Delete rows older than ttl + max_stale (None keeps them)
+            max_entries: Keep only this many of the newest rows (None for no cap)
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = 0
+        with self._lock, self._conn:
+            if max_stale is not None:
+                deleted += self._conn.execute("""
+                    DELETE FROM cache_entries
+                    WHERE namespace = ? AND ttl IS NOT NULL AND stored_at + ttl + ? <= ?
+                """, (namespace, max_stale, time.time())).rowcount
+            if max_entries is not None:
+                deleted += self._conn.execute("""
+                    DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                        SELECT key FROM cache_entries WHERE namespace = ?
+                        ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (namespace, namespace, max_entries)).rowcount
+        return deleted
+
+    def close(self):
+        """Close the connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    Namespaced cache with an in-memory LRU tier and a SQLite tier.
+
+    Reads check memory first, then disk (promoting disk hits into memory).
+    Entries older than ttl + max_stale are treated as missing. Async
+    callers should use aget/aset/adelete, which keep the memory tier on
+    the event loop and run disk I/O on a worker thread.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = 1024, default_ttl: Optional[float] = None,
+                 max_stale: Optional[float] = None, db_path: str = CACHE_DB_PATH,
+                 max_disk_entries: Optional[int] = None):
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self.max_disk_entries = max_disk_entries
+        self.memory = LRUCache(max_entries)
+        self.disk = SQLiteCache(db_path)
+        # The first write sweeps rows left over from earlier runs
+        self._next_purge = 0.0
+        logger.info(f"Initialized tiered cache '{namespace}' (max_entries={max_entries}, db={db_path})")
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """
+        Look up a key.
+
+        Args:
+            key: Cache key
+            allow_stale: Return entries past their TTL (within max_stale)
+
+        Returns:
+            The CacheEntry, or None on a miss
+        """
+        entry = self.memory.get(key)
+        tier = "memory"
+        if entry is None:
+            entry = self._read_disk(key)
+            tier = "disk"
+
+        if entry is not None and self._is_expired(entry):
+            self.delete(key)
+            entry = None
+        return self._served(entry, tier, allow_stale)
+
+    async def aget(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """Like get(), but disk reads run on a worker thread instead of the event loop."""
+        entry = self.memory.get(key)
+        tier = "memory"
+        if entry is None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            tier = "disk"
+
+        if entry is not None and self._is_expired(entry):
+            await self.adelete(key)
+            entry = None
+        return self._served(entry, tier, allow_stale)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> CacheEntry:
+        """Store a JSON-serializable value under key."""
+        entry = self._new_entry(key, value, ttl)
+        self._write_disk(key, entry)
+        return entry
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> CacheEntry:
+        """Like set(), but the disk write runs on a worker thread."""
+        entry = self._new_entry(key, value, ttl)
+        await asyncio.to_thread(self._write_disk, key, entry)
+        return entry
+
+    def delete(self, key: str):
+        """Remove a key from both tiers."""
+        self.memory.delete(key)
+        self._delete_disk(key)
+
+    async def adelete(self, key: str):
+        """Like delete(), but the disk delete runs on a worker thread."""
+        self.memory.delete(key)
+        await asyncio.to_thread(self._delete_disk, key)
+
+    def _new_entry(self, key: str, value: Any, ttl: Optional[float]) -> CacheEntry:
+        """Build an entry and store it in the memory tier."""
+        entry = CacheEntry(value, time.time(), ttl if ttl is not None else self.default_ttl)
+        self.memory.set(key, entry)
+        return entry
+
+    def _read_disk(self, key: str) -> Optional[CacheEntry]:
+        """Read a key from disk, promoting hits into memory."""
+        try:
+            entry = self.disk.get(self.namespace, key)
+        except sqlite3.Error as e:
+            logger.error(f"Cache '{self.namespace}' disk read failed: {e}")
+            return None
+        if entry is not None:
+            self.memory.set(key, entry)
+        return entry
+
+    def purge(self) -> int:
+        """Delete disk rows past ttl + max_stale and the oldest rows beyond max_disk_entries."""
+        try:
+            removed = self.disk.purge(self.namespace, self.max_stale, self.max_disk_entries)
+        except sqlite3.Error as e:
+            logger.error(f"Cache '{self.namespace}' disk purge failed: {e}")
+            return 0
+        if removed:
+            logger.info(f"Cache '{self.namespace}' purged {removed} disk entries")
+            metrics_collector.increment(f"cache.{self.namespace}.purged", removed)
+        return removed
+
+    def _write_disk(self, key: str, entry: CacheEntry):
+        try:
+            self.disk.set(self.namespace, key, entry)
+        except sqlite3.Error as e:
+            logger.error(f"Cache '{self.namespace}' disk write failed: {e}")
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + CACHE_PURGE_INTERVAL
+            self.purge()
+
+    def _delete_disk(self, key: str):
+        try:
+            self.disk.delete(self.namespace, key)
+        except sqlite3.Error as e:
+            logger.error(f"Cache '{self.namespace}' disk delete failed: {e}")
+
+    def _served(self, entry: Optional[CacheEntry], tier: str, allow_stale: bool) -> Optional[CacheEntry]:
+        """Record hit/miss metrics and apply the freshness check."""
+        if entry is None or (not allow_stale and not entry.is_fresh):
+            metrics_collector.increment(f"cache.{self.namespace}.miss")
+            return None
+
+        metrics_collector.increment(f"cache.{self.namespace}.hit_{tier}")
+        if not entry.is_fresh:
+            metrics_collector.increment(f"cache.{self.namespace}.stale")
+        return entry
+
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        """True once an entry is too old to be served even as stale."""
+        if entry.ttl is None or self.max_stale is None:
+            return False
+        return entry.age >= entry.ttl + self.max_stale
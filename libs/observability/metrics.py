@@ -15,6 +15,10 @@ class MetricsCollector:
 
     def __init__(self):
         self.metrics = defaultdict(lambda: {"count": 0, "total_time": 0, "errors": 0})
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.timings = defaultdict(lambda: {"count": 0, "total_time": 0, "max_time": 0})
+        self.active_requests = 0
         self.lock = threading.Lock()
         logger.info("Metrics collector initialized")
 
@@ -26,6 +30,34 @@ class MetricsCollector:
             if not success:
                 self.metrics[endpoint]["errors"] += 1
 
+    def request_started(self):
+        """Count a request as in flight until request_finished."""
+        with self.lock:
+            self.active_requests += 1
+            self.gauges["requests.active"] = self.active_requests
+
+    def request_finished(self):
+        with self.lock:
+            self.active_requests = max(self.active_requests - 1, 0)
+            self.gauges["requests.active"] = self.active_requests
+
+    def increment(self, name: str, amount: int = 1):
+        """Increment a named counter."""
+        with self.lock:
+            self.counters[name] += amount
+
+    def set_gauge(self, name: str, value: float):
+        """Set a named gauge to its current value."""
+        with self.lock:
+            self.gauges[name] = value
+
+    def record_timing(self, name: str, duration: float):
+        """Record a duration (seconds) for a named internal operation."""
+        with self.lock:
+            self.timings[name]["count"] += 1
+            self.timings[name]["total_time"] += duration
+            self.timings[name]["max_time"] = max(self.timings[name]["max_time"], duration)
+
     def get_metrics(self) -> Dict[str, Any]:
         """Get all metrics."""
         with self.lock:
@@ -38,12 +70,28 @@ class MetricsCollector:
                     "errors": data["errors"],
                     "error_rate": round(data["errors"] / data["count"] * 100, 2) if data["count"] > 0 else 0
                 }
+            if self.counters:
+                result["counters"] = dict(self.counters)
+            if self.gauges:
+                result["gauges"] = dict(self.gauges)
+            if self.timings:
+                result["timings"] = {
+                    name: {
+                        "count": data["count"],
+                        "avg_time": round(data["total_time"] / data["count"], 3) if data["count"] > 0 else 0,
+                        "max_time": round(data["max_time"], 3)
+                    }
+                    for name, data in self.timings.items()
+                }
             return result
 
     def reset(self):
         """Reset all metrics."""
         with self.lock:
             self.metrics.clear()
+            self.counters.clear()
+            self.gauges.clear()
+            self.timings.clear()
             logger.info("Metrics reset")
 
 
@@ -82,18 +130,23 @@ def get_health_status() -> Dict[str, Any]:
 class RequestTimer:
     """Context manager for timing requests."""
 
-    def __init__(self, endpoint: str):
+    def __init__(self, endpoint: str, track_active: bool = True):
         self.endpoint = endpoint
+        self.track_active = track_active
         self.start_time = None
         self.success = True
 
     def __enter__(self):
         self.start_time = time.time()
+        if self.track_active:
+            metrics_collector.request_started()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         duration = time.time() - self.start_time
         self.success = exc_type is None
+        if self.track_active:
+            metrics_collector.request_finished()
         metrics_collector.record_request(self.endpoint, duration, self.success)
 
         if self.success:
@@ -24,5 +24,6 @@ spec2.loader.exec_module(persistent_session_service)
 # Export classes
 InMemorySessionService = session_service.InMemorySessionService
 PersistentSessionService = persistent_session_service.PersistentSessionService
+AsyncSessionService = persistent_session_service.AsyncSessionService
 
-__all__ = ['InMemorySessionService', 'PersistentSessionService']
+__all__ = ['InMemorySessionService', 'PersistentSessionService', 'AsyncSessionService']
@@ -1,31 +1,381 @@
 """
 Persistent session storage using SQLite.
+
+Connections are opened once and pooled: a single writer connection behind a
+lock (SQLite allows one writer at a time anyway) and a few reader
+connections, all in WAL mode with synchronous=NORMAL, so reads never wait on
+writes and commits skip the per-transaction fsync. Each connection keeps its
+own prepared statement cache, which the fixed SQL text below reuses.
+
+Session context is stored one row per item in session_events, so appending
+is a single insert however long the session gets, and reads fetch only the
+newest items (or one page at a time via get_context).
+
+With write_behind enabled, session creation, context appends, profile
+updates, analysis results and job records are buffered and applied by a background thread in one transaction
+every SESSION_FLUSH_INTERVAL seconds or SESSION_FLUSH_MAX_ITEMS writes,
+whichever comes first. Point reads (a session, profile, result or job)
+lay the buffered rows over what the database returns, so callers see their
+own writes without committing anything themselves; list and paging reads
+wait for the background thread to apply the buffer. close() applies
+whatever is left.
+AsyncSessionService runs the same calls on a thread pool for callers on the
+event loop.
 """
+import asyncio
 import sqlite3
 import json
+import os
+import queue
+import threading
 import time
 import uuid
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Reader connections in the pool; the async wrapper gets one thread per connection
+SESSION_DB_READERS = int(os.getenv("SESSION_DB_READERS", "4"))
+
+# Seconds a connection waits on a lock held by another process before failing
+SESSION_DB_BUSY_TIMEOUT = float(os.getenv("SESSION_DB_BUSY_TIMEOUT", "5"))
+
+# Prepared statements cached per connection
+STATEMENT_CACHE_SIZE = 128
+
+# Most recent context items returned with a session by get()
+SESSION_CONTEXT_TAIL = int(os.getenv("SESSION_CONTEXT_TAIL", "50"))
+
+# Write-behind flush triggers: seconds after the first buffered write, or buffered write count
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.005"))
+SESSION_FLUSH_MAX_ITEMS = int(os.getenv("SESSION_FLUSH_MAX_ITEMS", "100"))
+
+# "flush": fsync every committed transaction (synchronous=FULL)
+# "shutdown": rely on WAL checkpoints and checkpoint on close (synchronous=NORMAL);
+# a power loss can drop the last commits, an application crash cannot
+SESSION_DURABILITY = os.getenv("SESSION_DURABILITY", "shutdown")
+DURABILITY_MODES = ("flush", "shutdown")
+
+
+class ConnectionPool:
+    """One writer and several reader connections to a WAL-mode SQLite database."""
+
+    def __init__(self, db_path: str, readers: int = SESSION_DB_READERS):
+        self.db_path = db_path
+        self._writer = self._connect()
+        self._write_lock = threading.Lock()
+        self._readers = queue.LifoQueue()
+        for _ in range(max(readers, 1)):
+            self._readers.put(self._connect())
+        self.readers = max(readers, 1)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=SESSION_DB_BUSY_TIMEOUT,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Writer connection for one transaction, committed on success and rolled back on error."""
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def read(self):
+        """A reader connection, returned to the pool afterwards."""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        for _ in range(self.readers):
+            self._readers.get().close()
+
+
+class WriteBatch:
+    """Session writes applied together in one transaction."""
+
+    def __init__(self):
+        self.sessions: List[tuple] = []
+        self.events: List[tuple] = []
+        # Only the latest access time per session and the latest profile per user are kept
+        self.accessed: Dict[str, float] = {}
+        self.profiles: Dict[str, tuple] = {}
+        # Latest analysis result per user; job inserts and status changes in order
+        self.results: Dict[str, tuple] = {}
+        self.jobs: List[tuple] = []
+        self.job_updates: List[tuple] = []
+
+    def add_session(self, session_id: str, user_id: str, now: float):
+        self.sessions.append((session_id, user_id, now, now))
+
+    def add_event(self, session_id: str, item: Dict, now: float):
+        self.events.append((session_id, json.dumps(item, default=str), now, session_id))
+        self.accessed[session_id] = now
+
+    def add_profile(self, user_id: str, profile_data: Dict, now: float):
+        self.profiles[user_id] = (
+            user_id,
+            json.dumps(profile_data.get('platforms', [])),
+            profile_data.get('total_activities', 0),
+            profile_data.get('skill_level', 'Unknown'),
+            user_id,
+            now,
+            now
+        )
+
+    def add_result(self, user_id: str, handles: Dict, analysis_mode: str, result: Dict,
+                   fingerprint: Optional[Dict], now: float):
+        self.results[user_id] = (
+            user_id,
+            json.dumps(handles, sort_keys=True),
+            analysis_mode,
+            json.dumps(result, default=str),
+            now,
+            json.dumps(fingerprint) if fingerprint else None
+        )
+
+    def add_job(self, job_id: str, user_id: str, request: Dict, now: float):
+        self.jobs.append((job_id, user_id, json.dumps(request), now))
+
+    def add_job_update(self, job_id: str, status: str, result: Optional[Dict], error: Optional[str],
+                       status_code: Optional[int], now: float):
+        self.job_updates.append((
+            job_id,
+            status,
+            json.dumps(result, default=str) if result is not None else None,
+            error,
+            status_code,
+            now
+        ))
+
+    def split(self) -> List["WriteBatch"]:
+        """One batch per buffered row, in apply order, so failures can be isolated."""
+        parts = []
+        for name in ("sessions", "events", "jobs", "job_updates"):
+            for row in getattr(self, name):
+                part = WriteBatch()
+                getattr(part, name).append(row)
+                parts.append(part)
+        for name in ("accessed", "profiles", "results"):
+            for key, value in getattr(self, name).items():
+                part = WriteBatch()
+                getattr(part, name)[key] = value
+                parts.append(part)
+        return parts
+
+
+class WriteBehindQueue:
+    """Buffers session writes and applies them in batches from a background thread."""
+
+    def __init__(self, apply: Callable[[WriteBatch], None], interval: float = SESSION_FLUSH_INTERVAL,
+                 max_items: int = SESSION_FLUSH_MAX_ITEMS):
+        """
+        Args:
+            apply: Writes a batch to the database in one transaction
+            interval: Seconds to wait for more writes after the first buffered one
+            max_items: Buffered write count that triggers an immediate flush
+        """
+        self.apply = apply
+        self.interval = interval
+        self.max_items = max_items
+        self._batch = WriteBatch()
+        self._pending = 0
+        self._closed = False
+        # Batches taken for applying, batches applied, and whether one is being applied now
+        self._taken = 0
+        self._applied = 0
+        self._applying = False
+        self._cond = threading.Condition()
+        # Held from taking a batch until it is committed, so batches commit in order
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="session-write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, update: Callable[[WriteBatch], None]):
+        """Add a write to the buffer; update receives the pending WriteBatch."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Session write-behind queue is closed")
+            update(self._batch)
+            self._pending += 1
+            if self._pending == 1 or self._pending >= self.max_items:
+                self._cond.notify_all()
+
+    def flush(self) -> int:
+        """Apply all buffered writes now; returns how many there were."""
+        with self._flush_lock:
+            with self._cond:
+                if not self._pending:
+                    return 0
+                batch, count = self._batch, self._pending
+                self._batch, self._pending = WriteBatch(), 0
+                self._taken += 1
+                self._applying = True
+            try:
+                self.apply(batch)
+            except Exception as e:
+                # Fall back to one transaction per row so a single bad write
+                # does not take the rest of the batch down with it
+                logger.warning(f"Applying {count} buffered session writes failed ({e}); retrying one by one")
+                self._apply_each(batch)
+            finally:
+                with self._cond:
+                    self._applied += 1
+                    self._applying = False
+                    self._cond.notify_all()
+        return count
+
+    def read(self, query: Callable[[], Any], overlay: Callable[[Any, WriteBatch], Any]) -> Any:
+        """
+        Run a database read and lay the still-buffered writes over its result.
+
+        The buffer is never applied here, so a read costs no commit on the
+        caller's thread.
+
+        Args:
+            query: Reads from the database
+            overlay: Receives the query result and the pending WriteBatch and
+                     returns the result as if the batch had been applied
+
+        Returns:
+            What overlay returns
+        """
+        with self._cond:
+            taken, applying = self._taken, self._applying
+        if not applying:
+            result = query()
+            with self._cond:
+                # No batch was taken since, so the database holds none of the pending writes
+                if self._taken == taken:
+                    return overlay(result, self._batch)
+        # A batch was being applied meanwhile; wait for it instead of risking counting it twice
+        with self._flush_lock:
+            result = query()
+            with self._cond:
+                return overlay(result, self._batch)
+
+    def wait_applied(self):
+        """Block until the background thread has applied every write buffered so far."""
+        with self._cond:
+            target = self._taken + (1 if self._pending else 0)
+            self._cond.notify_all()
+            while self._applied < target:
+                self._cond.wait()
+
+    def _apply_each(self, batch: WriteBatch):
+        """Apply a batch row by row, dropping only the rows that fail."""
+        dropped = 0
+        for part in batch.split():
+            try:
+                self.apply(part)
+            except Exception as e:
+                dropped += 1
+                logger.error(f"Dropped buffered session write: {e}", exc_info=True)
+        if dropped:
+            logger.error(f"Dropped {dropped} buffered session writes")
+
+    def close(self):
+        """Stop accepting writes, apply the remaining ones and stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    break
+                # Give concurrent writers a moment to join the batch (wait_applied cuts this short)
+                if self._pending < self.max_items:
+                    self._cond.wait(self.interval)
+            self.flush()
+        self.flush()
+
 
 class PersistentSessionService:
     """Session service with SQLite persistence."""
 
-    def __init__(self, db_path: str = "data/sessions.db"):
+    def __init__(self, db_path: str = "data/sessions.db", readers: int = SESSION_DB_READERS,
+                 write_behind: bool = False, durability: str = SESSION_DURABILITY):
+        """
+        Args:
+            db_path: SQLite database file, created if missing
+            readers: Reader connections in the pool
+            write_behind: Buffer session, context, profile, result and job
+                          writes and apply them in batches; update_context then returns True
+                          once the item is buffered, and items for unknown
+                          sessions are dropped when the batch is applied
+            durability: "flush" to fsync every commit, "shutdown" to fsync at
+                        WAL checkpoints and on close()
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}, got {durability!r}")
+
         self.db_path = db_path
+        self.durability = durability
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._pool = ConnectionPool(db_path, readers)
         self._init_db()
-        logger.info(f"Initialized persistent session storage at {db_path}")
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._write_behind = WriteBehindQueue(self._apply_batch) if write_behind else None
+        self._closed = False
+        self.aio = AsyncSessionService(self)
+        logger.info(f"Initialized persistent session storage at {db_path} "
+                    f"(write-behind {'on' if write_behind else 'off'}, durability {durability})")
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool for AsyncSessionService calls, created on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._pool.readers + 1,
+                                                thread_name_prefix="session-db")
+        return self._executor
+
+    def close(self):
+        """Finish pending async calls, apply buffered writes, checkpoint and close all connections."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._write_behind is not None:
+            self._write_behind.close()
+        with self._pool.write() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._pool.close()
+        logger.info(f"Closed persistent session storage at {self.db_path}")
 
     def _init_db(self):
         """Initialize database schema."""
-        import os
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._pool.write() as conn:
+            if self.durability == "flush":
+                conn.execute("PRAGMA synchronous=FULL")
+            cursor = conn.cursor()
+            self._create_schema(cursor)
+            self._migrate_context(cursor)
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _create_schema(self, cursor):
+        """Create the tables and indexes that do not exist yet."""
 
         # Sessions table
         cursor.execute("""
@@ -50,42 +400,209 @@ class PersistentSessionService:
             )
         """)
 
-        conn.commit()
-        conn.close()
-
-    def create(self, user_id: str) -> Dict:
-        """Create a new session."""
-        session_id = str(uuid.uuid4())
-        now = time.time()
+        # Latest analysis per user, served by /analyze and kept warm by the refresh scheduler
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_results (
+                user_id TEXT PRIMARY KEY,
+                handles TEXT NOT NULL,
+                analysis_mode TEXT NOT NULL,
+                result TEXT NOT NULL,
+                computed_at REAL NOT NULL,
+                fingerprint TEXT
+            )
+        """)
+        self._ensure_column(cursor, "analysis_results", "fingerprint", "TEXT")
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Async /analyze jobs
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                job_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                request TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                status_code INTEGER,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
 
         cursor.execute("""
-            INSERT INTO sessions (session_id, user_id, created_at, last_accessed, context)
-            VALUES (?, ?, ?, ?, ?)
-        """, (session_id, user_id, now, now, json.dumps([])))
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status
+            ON analysis_jobs (status, created_at)
+        """)
 
-        conn.commit()
-        conn.close()
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_sessions_user_accessed
+            ON sessions (user_id, last_accessed)
+        """)
 
-        logger.info(f"Created session {session_id} for user {user_id}")
-        return {"session_id": session_id}
+        # Session context, one row per appended item; seq orders items within a session
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS session_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                item TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
 
-    def get(self, session_id: str) -> Optional[Dict]:
-        """Get session by ID."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_session_events_session_seq
+            ON session_events (session_id, seq)
+        """)
 
+    def _migrate_context(self, cursor):
+        """Move context lists stored in sessions.context by older versions into session_events."""
         cursor.execute("""
-            SELECT session_id, user_id, created_at, last_accessed, context
-            FROM sessions WHERE session_id = ?
-        """, (session_id,))
+            SELECT session_id, context, last_accessed FROM sessions
+            WHERE context IS NOT NULL AND context != '[]'
+        """)
+        rows = cursor.fetchall()
+        for session_id, context, last_accessed in rows:
+            cursor.executemany("""
+                INSERT INTO session_events (session_id, item, created_at) VALUES (?, ?, ?)
+            """, [(session_id, json.dumps(item), last_accessed) for item in json.loads(context)])
+        if rows:
+            cursor.execute("UPDATE sessions SET context = NULL WHERE context IS NOT NULL")
+            logger.info(f"Migrated context of {len(rows)} sessions to session_events")
+
+    def _ensure_column(self, cursor, table: str, column: str, declaration: str):
+        """Add a column to a table created by an older version of the schema."""
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+    def _apply_batch(self, batch: WriteBatch):
+        """Write a batch of session writes in one transaction."""
+        with self._pool.write() as conn:
+            cursor = conn.cursor()
+
+            cursor.executemany("""
+                INSERT INTO sessions (session_id, user_id, created_at, last_accessed)
+                VALUES (?, ?, ?, ?)
+            """, batch.sessions)
+
+            cursor.executemany("""
+                INSERT INTO session_events (session_id, item, created_at)
+                SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM sessions WHERE session_id = ?)
+            """, batch.events)
+
+            cursor.executemany("""
+                UPDATE sessions SET last_accessed = MAX(last_accessed, ?) WHERE session_id = ?
+            """, [(accessed, session_id) for session_id, accessed in batch.accessed.items()])
+
+            cursor.executemany("""
+                INSERT OR REPLACE INTO user_profiles
+                (user_id, platforms, total_activities, skill_level, created_at, updated_at)
+                VALUES (?, ?, ?, ?, COALESCE((SELECT created_at FROM user_profiles WHERE user_id = ?), ?), ?)
+            """, list(batch.profiles.values()))
+
+            cursor.executemany("""
+                INSERT OR REPLACE INTO analysis_results (user_id, handles, analysis_mode, result, computed_at, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, list(batch.results.values()))
+
+            cursor.executemany("""
+                INSERT INTO analysis_jobs (job_id, user_id, request, status, created_at)
+                VALUES (?, ?, ?, 'queued', ?)
+            """, batch.jobs)
+
+            # Status changes for one job must apply in the order they were made
+            for job_id, status, result, error, status_code, now in batch.job_updates:
+                if status == "running":
+                    cursor.execute("""
+                        UPDATE analysis_jobs SET status = ?, started_at = ? WHERE job_id = ?
+                    """, (status, now, job_id))
+                elif status == "queued":
+                    cursor.execute("""
+                        UPDATE analysis_jobs SET status = ?, started_at = NULL WHERE job_id = ?
+                    """, (status, job_id))
+                else:
+                    cursor.execute("""
+                        UPDATE analysis_jobs
+                        SET status = ?, result = ?, error = ?, status_code = ?, finished_at = ?
+                        WHERE job_id = ?
+                    """, (status, result, error, status_code, now, job_id))
+
+    def _write(self, update: Callable[[WriteBatch], None]):
+        """Buffer a write when write-behind is on, otherwise apply it now."""
+        if self._write_behind is not None:
+            self._write_behind.put(update)
+            return
+        batch = WriteBatch()
+        update(batch)
+        self._apply_batch(batch)
+
+    def _read(self, query: Callable[[sqlite3.Cursor], Any], overlay: Callable[[Any, WriteBatch], Any]) -> Any:
+        """Run a read on a pooled connection, with buffered writes laid over it by overlay."""
+        def run():
+            with self._pool.read() as conn:
+                return query(conn.cursor())
+
+        if self._write_behind is None:
+            return run()
+        return self._write_behind.read(run, overlay)
+
+    def _wait_applied(self):
+        """Before a read the buffer cannot answer, let the background thread apply buffered writes."""
+        if self._write_behind is not None:
+            self._write_behind.wait_applied()
+
+    def flush(self) -> int:
+        """Apply buffered writes now; returns how many there were."""
+        if self._write_behind is None:
+            return 0
+        return self._write_behind.flush()
 
-        row = cursor.fetchone()
-        conn.close()
+    def create(self, user_id: str) -> Dict:
+        """Create a new session."""
+        session_id = str(uuid.uuid4())
+        now = time.time()
 
-        if not row:
+        self._write(lambda batch: batch.add_session(session_id, user_id, now))
+
+        logger.info(f"Created session {session_id} for user {user_id}")
+        return {"session_id": session_id}
+
+    def get(self, session_id: str, context_limit: int = SESSION_CONTEXT_TAIL) -> Optional[Dict]:
+        """
+        Get session by ID.
+
+        Args:
+            session_id: Session to look up
+            context_limit: Number of most recent context items to include, oldest first
+
+        Returns:
+            Session dict, or None if it does not exist
+        """
+        def query(cursor):
+            cursor.execute("""
+                SELECT session_id, user_id, created_at, last_accessed
+                FROM sessions WHERE session_id = ?
+            """, (session_id,))
+
+            row = cursor.fetchone()
+            if not row:
+                return None, []
+            events = self._context_page(cursor, session_id, context_limit, None)
+            return row, [event["item"] for event in events]
+
+        def overlay(found, batch):
+            row, context = found
+            if row is None:
+                created = [pending for pending in batch.sessions if pending[0] == session_id]
+                if not created:
+                    return None, []
+                row = created[-1]
+            context = context + [json.loads(event[1]) for event in batch.events if event[0] == session_id]
+            last_accessed = max(row[3], batch.accessed.get(session_id, row[3]))
+            return (row[0], row[1], row[2], last_accessed), context[-context_limit:] if context_limit else []
+
+        row, context = self._read(query, overlay)
+        if row is None:
             return None
 
         return {
@@ -93,72 +610,92 @@ class PersistentSessionService:
             "user_id": row[1],
             "created_at": row[2],
             "last_accessed": row[3],
-            "context": json.loads(row[4])
+            "context": context
         }
 
+    def get_context(self, session_id: str, limit: int = SESSION_CONTEXT_TAIL,
+                    before_seq: Optional[int] = None) -> List[Dict]:
+        """
+        One page of a session's context, newest page first.
+
+        Args:
+            session_id: Session whose context to read
+            limit: Maximum number of items
+            before_seq: Only items older than this seq; pass the first seq of
+                        the previous page to continue backwards
+
+        Returns:
+            List of dicts with seq, item and created_at, oldest first
+        """
+        # Items get their seq when applied, so pages are read from the database only
+        self._wait_applied()
+        with self._pool.read() as conn:
+            return self._context_page(conn.cursor(), session_id, limit, before_seq)
+
+    def _context_page(self, cursor, session_id: str, limit: int, before_seq: Optional[int]) -> List[Dict]:
+        cursor.execute("""
+            SELECT seq, item, created_at FROM session_events
+            WHERE session_id = ? AND seq < ?
+            ORDER BY seq DESC
+            LIMIT ?
+        """, (session_id, before_seq if before_seq is not None else 2 ** 63 - 1, limit))
+
+        rows = cursor.fetchall()
+        return [
+            {"seq": row[0], "item": json.loads(row[1]), "created_at": row[2]}
+            for row in reversed(rows)
+        ]
+
     def update_context(self, session_id: str, item: Dict) -> bool:
-        """Update session context."""
-        session = self.get(session_id)
-        if not session:
-            return False
+        """Append an item to the session context."""
+        now = time.time()
 
-        context = session["context"]
-        context.append(item)
+        if self._write_behind is not None:
+            self._write_behind.put(lambda batch: batch.add_event(session_id, item, now))
+            return True
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._pool.write() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            UPDATE sessions
-            SET context = ?, last_accessed = ?
-            WHERE session_id = ?
-        """, (json.dumps(context), time.time(), session_id))
+            cursor.execute("""
+                UPDATE sessions SET last_accessed = ? WHERE session_id = ?
+            """, (now, session_id))
+            if cursor.rowcount == 0:
+                return False
 
-        conn.commit()
-        conn.close()
+            cursor.execute("""
+                INSERT INTO session_events (session_id, item, created_at) VALUES (?, ?, ?)
+            """, (session_id, json.dumps(item, default=str), now))
 
         logger.info(f"Updated context for session {session_id}")
         return True
 
     def update_user_profile(self, user_id: str, profile_data: Dict):
         """Update or create user profile."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         now = time.time()
 
-        cursor.execute("""
-            INSERT OR REPLACE INTO user_profiles
-            (user_id, platforms, total_activities, skill_level, created_at, updated_at)
-            VALUES (?, ?, ?, ?, COALESCE((SELECT created_at FROM user_profiles WHERE user_id = ?), ?), ?)
-        """, (
-            user_id,
-            json.dumps(profile_data.get('platforms', [])),
-            profile_data.get('total_activities', 0),
-            profile_data.get('skill_level', 'Unknown'),
-            user_id,
-            now,
-            now
-        ))
-
-        conn.commit()
-        conn.close()
+        self._write(lambda batch: batch.add_profile(user_id, profile_data, now))
 
         logger.info(f"Updated profile for user {user_id}")
 
     def get_user_profile(self, user_id: str) -> Optional[Dict]:
         """Get user profile."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT user_id, platforms, total_activities, skill_level, created_at, updated_at
-            FROM user_profiles WHERE user_id = ?
-        """, (user_id,))
-
-        row = cursor.fetchone()
-        conn.close()
-
+        def query(cursor):
+            cursor.execute("""
+                SELECT user_id, platforms, total_activities, skill_level, created_at, updated_at
+                FROM user_profiles WHERE user_id = ?
+            """, (user_id,))
+
+            return cursor.fetchone()
+
+        def overlay(row, batch):
+            pending = batch.profiles.get(user_id)
+            if pending is None:
+                return row
+            created_at = row[4] if row else pending[5]
+            return pending[0], pending[1], pending[2], pending[3], created_at, pending[6]
+
+        row = self._read(query, overlay)
         if not row:
             return None
 
@@ -170,3 +707,206 @@ class PersistentSessionService:
             "created_at": row[4],
             "updated_at": row[5]
         }
+
+    def save_analysis_result(self, user_id: str, handles: Dict, analysis_mode: str, result: Dict,
+                             fingerprint: Optional[Dict] = None):
+        """Store the latest analysis result for a user, replacing the previous one."""
+        now = time.time()
+
+        self._write(lambda batch: batch.add_result(user_id, handles, analysis_mode, result, fingerprint, now))
+
+        logger.info(f"Stored analysis result for user {user_id}")
+
+    def get_analysis_result(self, user_id: str) -> Optional[Dict]:
+        """Get the latest stored analysis result for a user."""
+        def query(cursor):
+            cursor.execute("""
+                SELECT user_id, handles, analysis_mode, result, computed_at, fingerprint
+                FROM analysis_results WHERE user_id = ?
+            """, (user_id,))
+
+            return cursor.fetchone()
+
+        # A buffered result has the same columns and replaces the stored one
+        row = self._read(query, lambda row, batch: batch.results.get(user_id, row))
+        if not row:
+            return None
+
+        return {
+            "user_id": row[0],
+            "handles": json.loads(row[1]),
+            "analysis_mode": row[2],
+            "result": json.loads(row[3]),
+            "computed_at": row[4],
+            "fingerprint": json.loads(row[5]) if row[5] else None
+        }
+
+    def get_refresh_candidates(self, active_since: float, computed_before: float, limit: int) -> List[Dict]:
+        """
+        Users with a stored result worth refreshing, most recently active first.
+
+        Args:
+            active_since: Only users with a session accessed at or after this time
+            computed_before: Only results computed before this time
+            limit: Maximum number of users
+
+        Returns:
+            List of dicts with user_id, handles, analysis_mode, computed_at and last_accessed
+        """
+        self._wait_applied()
+        with self._pool.read() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT r.user_id, r.handles, r.analysis_mode, r.computed_at, MAX(s.last_accessed) AS last_accessed
+                FROM analysis_results r JOIN sessions s ON s.user_id = r.user_id
+                WHERE r.computed_at < ?
+                GROUP BY r.user_id
+                HAVING last_accessed >= ?
+                ORDER BY last_accessed DESC
+                LIMIT ?
+            """, (computed_before, active_since, limit))
+
+            rows = cursor.fetchall()
+
+        return [
+            {
+                "user_id": row[0],
+                "handles": json.loads(row[1]),
+                "analysis_mode": row[2],
+                "computed_at": row[3],
+                "last_accessed": row[4]
+            }
+            for row in rows
+        ]
+
+    def create_job(self, job_id: str, user_id: str, request: Dict) -> Dict:
+        """Record a new queued analysis job."""
+        now = time.time()
+
+        self._write(lambda batch: batch.add_job(job_id, user_id, request, now))
+
+        return {
+            "job_id": job_id,
+            "user_id": user_id,
+            "request": request,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "status_code": None,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None
+        }
+
+    def update_job(self, job_id: str, status: str, result: Optional[Dict] = None,
+                   error: Optional[str] = None, status_code: Optional[int] = None):
+        """Move a job to a new status, recording its result or error when it finishes."""
+        now = time.time()
+
+        self._write(lambda batch: batch.add_job_update(job_id, status, result, error, status_code, now))
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get an analysis job by ID."""
+        def query(cursor):
+            cursor.execute("""
+                SELECT job_id, user_id, request, status, result, error, status_code,
+                       created_at, started_at, finished_at
+                FROM analysis_jobs WHERE job_id = ?
+            """, (job_id,))
+
+            return cursor.fetchone()
+
+        def overlay(row, batch):
+            for pending in batch.jobs:
+                if pending[0] == job_id:
+                    row = (pending[0], pending[1], pending[2], "queued", None, None, None, pending[3], None, None)
+            if row is None:
+                return None
+            # Replay buffered status changes the way _apply_batch applies them
+            row = list(row)
+            for pending_id, status, result, error, status_code, now in batch.job_updates:
+                if pending_id != job_id:
+                    continue
+                row[3] = status
+                if status == "running":
+                    row[8] = now
+                elif status == "queued":
+                    row[8] = None
+                else:
+                    row[4], row[5], row[6], row[9] = result, error, status_code, now
+            return row
+
+        row = self._read(query, overlay)
+        return self._job_from_row(row) if row else None
+
+    def get_unfinished_jobs(self) -> List[Dict]:
+        """Queued and running jobs, oldest first."""
+        self._wait_applied()
+        with self._pool.read() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT job_id, user_id, request, status, result, error, status_code,
+                       created_at, started_at, finished_at
+                FROM analysis_jobs WHERE status IN ('queued', 'running')
+                ORDER BY created_at
+            """)
+
+            rows = cursor.fetchall()
+
+        return [self._job_from_row(row) for row in rows]
+
+    def delete_finished_jobs(self, finished_before: float) -> int:
+        """Delete jobs that finished before the given time; returns how many."""
+        self._wait_applied()
+        with self._pool.write() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                DELETE FROM analysis_jobs
+                WHERE status IN ('succeeded', 'failed') AND finished_at < ?
+            """, (finished_before,))
+            deleted = cursor.rowcount
+
+        return deleted
+
+    def _job_from_row(self, row) -> Dict:
+        return {
+            "job_id": row[0],
+            "user_id": row[1],
+            "request": json.loads(row[2]),
+            "status": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "status_code": row[6],
+            "created_at": row[7],
+            "started_at": row[8],
+            "finished_at": row[9]
+        }
+
+
+class AsyncSessionService:
+    """
+    Awaitable view of a PersistentSessionService.
+
+    Every public method of the service is available here as a coroutine
+    function that runs the call on the service's thread pool, e.g.
+    ``await session_service.aio.get(session_id)``.
+    """
+
+    def __init__(self, service: PersistentSessionService):
+        self._service = service
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._service, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._service.executor, partial(attr, *args, **kwargs))
+
+        call.__name__ = name
+        call.__doc__ = attr.__doc__
+        return call
@@ -0,0 +1,63 @@
+"""
+Download a problem catalog snapshot for services/tools/problem_catalog.py.
+
+Fetches the Codeforces problemset and Kenkoooo's AtCoder problem list and
+difficulty models, and writes them to PROBLEM_CATALOG_PATH
+(default data/problem_catalog.json). Re-run to refresh the snapshot.
+
+Usage:
+    python scripts/build_problem_catalog.py [--output data/problem_catalog.json]
+"""
+import argparse
+import json
+import os
+import sys
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.tools.problem_catalog import PROBLEM_CATALOG_PATH, load_catalog
+
+CODEFORCES_PROBLEMSET_URL = "https://codeforces.com/api/problemset.problems"
+KENKOOOO_PROBLEMS_URL = "https://kenkoooo.com/atcoder/resources/problems.json"
+KENKOOOO_MODELS_URL = "https://kenkoooo.com/atcoder/resources/problem-models.json"
+
+
+def fetch_json(url):
+    print(f"Downloading {url}")
+    response = requests.get(url, timeout=120, headers={"Accept-Encoding": "gzip"})
+    response.raise_for_status()
+    return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline problem catalog")
+    parser.add_argument("--output", default=PROBLEM_CATALOG_PATH)
+    args = parser.parse_args()
+
+    codeforces = fetch_json(CODEFORCES_PROBLEMSET_URL)
+    if codeforces.get("status") != "OK":
+        raise SystemExit(f"Codeforces API error: {codeforces.get('comment')}")
+
+    snapshot = {
+        "codeforces": codeforces["result"],
+        "kenkoooo": {
+            "problems": fetch_json(KENKOOOO_PROBLEMS_URL),
+            "models": fetch_json(KENKOOOO_MODELS_URL),
+        },
+    }
+
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, args.output)
+
+    catalog = load_catalog(args.output)
+    print(f"Wrote {args.output}: {len(catalog)} rated problems on {sorted(catalog.platforms)}")
+
+
+if __name__ == "__main__":
+    main()
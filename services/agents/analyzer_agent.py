@@ -77,17 +77,39 @@ Return as JSON with keys: skill_level, languages, patterns, platform_preference"
         except Exception as e:
             logger.error(f"{self.agent_name}: Analysis failed - {e}")
             # Return fallback response
-            return {
-                "status": "error",
-                "error": str(e),
-                "analysis": {
-                    "skill_level": "Intermediate",
-                    "languages": [],
-                    "patterns": [f"Analysis based on {len(activities)} activities"],
-                    "platform_preference": "Unknown"
-                },
-                "growth_metrics": growth_metrics
-            }
+            return self._fallback_analysis(activities, growth_metrics, "error", str(e))
+
+    def _fallback_analysis(self, activities: List[Dict], growth_metrics: Dict, status: str, error: str) -> Dict[str, Any]:
+        """Generic analysis used when the LLM analysis is unavailable."""
+        return {
+            "status": status,
+            "error": error,
+            "analysis": {
+                "skill_level": "Intermediate",
+                "languages": [],
+                "patterns": [f"Analysis based on {len(activities)} activities"],
+                "platform_preference": "Unknown"
+            },
+            "growth_metrics": growth_metrics
+        }
+
+    def estimate_skill_level(self, growth_metrics: Dict) -> str:
+        """
+        Cheap skill level guess from solved counts and Codeforces rating.
+
+        Used to start downstream agents before the LLM analysis returns.
+        """
+        platform_stats = growth_metrics.get('platform_stats', {})
+        total_solved = sum(data.get('solved', 0) or 0 for data in platform_stats.values())
+        cf_rating = platform_stats.get('codeforces', {}).get('rating') or 0
+        if not isinstance(cf_rating, (int, float)):
+            cf_rating = 0
+
+        if cf_rating >= 1900 or total_solved >= 500:
+            return "Advanced"
+        if cf_rating >= 1200 or total_solved >= 100:
+            return "Intermediate"
+        return "Beginner"
 
     def _format_platform_stats(self, stats: Dict) -> str:
         """Format platform stats for prompt."""
@@ -0,0 +1,105 @@
+"""
+Deadlines and hedging for agent steps.
+
+Each agent step runs against an absolute deadline carved out of the
+request's latency budget. A step that misses its deadline is cancelled so
+the orchestrator can substitute the agent's fallback result. Optionally,
+once a step has run longer than its recent p95 latency, a hedged duplicate
+is started and whichever copy finishes first wins.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from libs.observability import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Default end-to-end budget (seconds) for the agent pipeline
+ANALYSIS_LATENCY_BUDGET = float(os.getenv("ANALYSIS_LATENCY_BUDGET", "40"))
+
+# Hedged duplicates are off unless enabled
+AGENT_HEDGING = os.getenv("AGENT_HEDGING", "false").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+LATENCY_WINDOW_SIZE = 200
+
+
+class LatencyWindow:
+    """Recent step durations, for percentile-based hedge delays."""
+
+    def __init__(self, size: int = LATENCY_WINDOW_SIZE):
+        self.samples = deque(maxlen=size)
+
+    def record(self, duration: float):
+        self.samples.append(duration)
+
+    def percentile(self, q: float, min_samples: int = HEDGE_MIN_SAMPLES) -> Optional[float]:
+        """The q-quantile of recent durations, or None with too few samples."""
+        if len(self.samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_windows: Dict[str, LatencyWindow] = {}
+
+
+def latency_window(name: str) -> LatencyWindow:
+    window = _windows.get(name)
+    if window is None:
+        window = _windows[name] = LatencyWindow()
+    return window
+
+
+async def run_with_deadline(name: str, make_call: Callable[[], Awaitable[Any]], deadline: float,
+                            hedge: Optional[bool] = None) -> Tuple[Any, bool]:
+    """
+    Run an agent step until an absolute deadline.
+
+    Args:
+        name: Step name, used for latency tracking and metrics
+        make_call: Zero-argument function starting the step (called twice when hedging)
+        deadline: time.monotonic() value by which the step must finish
+        hedge: Start a duplicate after the step's p95 latency (default AGENT_HEDGING)
+
+    Returns:
+        (result, completed); completed is False if the deadline passed, in
+        which case result is None and all copies have been cancelled
+    """
+    hedge = AGENT_HEDGING if hedge is None else hedge
+    window = latency_window(name)
+    start = time.monotonic()
+    if deadline - start <= 0:
+        metrics_collector.increment(f"agent.{name}.deadline_missed")
+        return None, False
+
+    tasks = [asyncio.ensure_future(make_call())]
+    try:
+        hedge_delay = window.percentile(HEDGE_PERCENTILE) if hedge else None
+        if hedge_delay is not None and start + hedge_delay < deadline:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done:
+                metrics_collector.increment(f"agent.{name}.hedged")
+                logger.info(f"Step {name} slower than p95 ({hedge_delay:.2f}s), sending hedged request")
+                tasks.append(asyncio.ensure_future(make_call()))
+
+        done, _ = await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0),
+                                     return_when=asyncio.FIRST_COMPLETED)
+        duration = time.monotonic() - start
+        window.record(duration)
+        if not done:
+            metrics_collector.increment(f"agent.{name}.deadline_missed")
+            logger.warning(f"Step {name} missed its deadline after {duration:.2f}s")
+            return None, False
+
+        metrics_collector.record_timing(f"agent.{name}", duration)
+        return done.pop().result(), True
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
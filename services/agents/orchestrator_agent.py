@@ -3,13 +3,122 @@ Orchestrator agent that coordinates multiple specialized agents.
 """
 import logging
 import asyncio
-from typing import Dict, List, Any
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from services.agents.analyzer_agent import AnalyzerAgent
 from services.agents.weakness_detector_agent import WeaknessDetectorAgent
 from services.agents.task_generator_agent import TaskGeneratorAgent
+from services.agents.latency_budget import ANALYSIS_LATENCY_BUDGET, run_with_deadline
+from services.preprocessor.tag_stats import compute_tag_stats, format_tag_stats
+from libs.observability import metrics_collector
 
 logger = logging.getLogger(__name__)
 
+# Structured output for the single-call pipeline
+FUSED_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis": {
+            "type": "object",
+            "properties": {
+                "skill_level": {"type": "string", "enum": ["Beginner", "Intermediate", "Advanced"]},
+                "languages": {"type": "array", "items": {"type": "string"}},
+                "patterns": {"type": "array", "items": {"type": "string"}},
+                "platform_preference": {"type": "string"}
+            },
+            "required": ["skill_level", "languages", "patterns", "platform_preference"]
+        },
+        "weaknesses": {
+            "type": "object",
+            "properties": {
+                "weak_topics": {"type": "array", "items": {"type": "string"}},
+                "missing_fundamentals": {"type": "array", "items": {"type": "string"}},
+                "improvement_priority": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["weak_topics", "missing_fundamentals", "improvement_priority"]
+        },
+        "tasks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "difficulty": {"type": "string", "enum": ["Easy", "Medium", "Hard"]},
+                    "topic": {"type": "string"},
+                    "due_days": {"type": "integer"},
+                    "reason": {"type": "string"}
+                },
+                "required": ["title", "difficulty", "topic", "due_days", "reason"]
+            }
+        }
+    },
+    "required": ["analysis", "weaknesses", "tasks"]
+}
+
+# Fractions of the latency budget by which each stage must be done: analysis
+# and (speculative) weakness detection, a weakness re-run after a speculation
+# miss, and task generation
+FIRST_STAGE_SHARE = 0.5
+RECONCILE_STAGE_SHARE = 0.7
+
+# Analysis modes selectable per request
+ANALYSIS_MODES = ("parallel", "fused")
+
+# name -> (dependency names, async fn(results so far) -> result)
+AgentGraph = Dict[str, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], Awaitable[Any]]]]
+
+# Progress callback: (stage name, stage output)
+StageCallback = Callable[[str, Any], None]
+
+# Graph steps reported as stages, in pipeline order
+REPORTED_STAGES = ("analysis", "weaknesses", "tasks")
+
+
+async def run_agent_graph(graph: AgentGraph,
+                          on_result: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    """
+    Run a dependency graph of agent steps, starting each step as soon as
+    all of its dependencies have finished.
+
+    Args:
+        graph: Mapping of step name to (dependencies, step function)
+        on_result: Called with (step name, result) as each step finishes
+
+    Returns:
+        Mapping of step name to result
+
+    Raises:
+        ValueError: If some steps can never run (unknown or cyclic dependencies)
+    """
+    results: Dict[str, Any] = {}
+    running: Dict[asyncio.Future, str] = {}
+    started = set()
+
+    def start_ready():
+        for name, (deps, fn) in graph.items():
+            if name not in started and all(dep in results for dep in deps):
+                started.add(name)
+                running[asyncio.ensure_future(fn(results))] = name
+
+    try:
+        start_ready()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                if on_result:
+                    on_result(name, results[name])
+            start_ready()
+    finally:
+        for future in running:
+            future.cancel()
+
+    if len(results) != len(graph):
+        raise ValueError(f"Unsatisfiable agent dependencies: {sorted(set(graph) - set(results))}")
+    return results
+
 
 class OrchestratorAgent:
     """Coordinates multiple specialized agents for comprehensive analysis."""
@@ -52,7 +161,8 @@ class OrchestratorAgent:
 
             # Phase 3: Task Generation (depends on weaknesses)
             logger.info(f"{self.agent_name}: Phase 3 - Task Generation")
-            tasks_result = await self.task_generator.generate_tasks(weakness_result, analysis_result)
+            tasks_result = await self.task_generator.generate_tasks(weakness_result, analysis_result,
+                                                                    activities=activities)
 
             # Combine results
             final_result = {
@@ -80,13 +190,25 @@ class OrchestratorAgent:
                 "growth_metrics": growth_metrics
             }
 
-    async def run_parallel_analysis(self, user_id: str, processed_data: Dict) -> Dict[str, Any]:
+    async def run_parallel_analysis(self, user_id: str, processed_data: Dict,
+                                    budget: Optional[float] = None,
+                                    on_stage: Optional[StageCallback] = None,
+                                    reuse: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Run analysis with parallel agent execution where possible.
 
+        Each agent gets a deadline carved out of the latency budget; agents
+        that miss it are replaced by their fallback output and the result is
+        marked partial.
+
         Args:
             user_id: User identifier
             processed_data: Processed activity data
+            budget: Seconds for the whole pipeline (default ANALYSIS_LATENCY_BUDGET)
+            on_stage: Called with ("analysis" | "weaknesses" | "tasks", output)
+                      as each agent finishes
+            reuse: Previous "analysis" and/or "weaknesses" outputs to keep
+                   instead of re-running those agents
 
         Returns:
             Analysis results from parallel execution
@@ -96,16 +218,106 @@ class OrchestratorAgent:
         activities = processed_data.get('activities', [])
         growth_metrics = processed_data.get('growth_metrics', {})
 
-        try:
-            # Phase 1: Pattern Analysis (must be first)
-            analysis_result = await self.analyzer.analyze(activities, growth_metrics)
+        budget = budget if budget is not None else ANALYSIS_LATENCY_BUDGET
+        start = time.monotonic()
+        first_deadline = start + budget * FIRST_STAGE_SHARE
+        reconcile_deadline = start + budget * RECONCILE_STAGE_SHARE
+        final_deadline = start + budget
+        timed_out: List[str] = []
+        topics = self.weakness_detector._extract_topics(activities)
 
-            # Phase 2: Run weakness detection (could be parallel in future with other tasks)
-            logger.info(f"{self.agent_name}: Running parallel agents")
-            weakness_result = await self.weakness_detector.detect_weaknesses(activities, analysis_result)
+        async def bounded(name, make_call, deadline, fallback):
+            result, completed = await run_with_deadline(name, make_call, deadline)
+            if completed:
+                return result
+            timed_out.append(name)
+            logger.warning(f"{self.agent_name}: {name} missed its deadline, using fallback")
+            return fallback()
+
+        # Weakness detection only needs a skill level, so start it right away
+        # from a heuristic estimate and redo it only if the analyzer disagrees
+        estimated_level = self.analyzer.estimate_skill_level(growth_metrics)
+        speculative_analysis = {"analysis": {"skill_level": estimated_level}}
+        speculation = {"outcome": "hit"}
+
+        async def reconcile_weaknesses(results):
+            speculative = results["speculative_weaknesses"]
+            if "analysis" in timed_out or speculative.get("source") == "rules":
+                # No real skill level to reconcile against, or the result did not depend on it
+                return speculative
+            actual_level = results["analysis"].get('analysis', {}).get('skill_level', 'Unknown')
+            if str(actual_level).strip().lower() == estimated_level.lower():
+                metrics_collector.increment("orchestrator.speculation.hit")
+                return speculative
+            metrics_collector.increment("orchestrator.speculation.miss")
+            speculation["outcome"] = "miss"
+            logger.info(f"{self.agent_name}: Skill level {actual_level!r} differs from estimate "
+                        f"{estimated_level!r}, re-running weakness detection")
+            result, completed = await run_with_deadline(
+                "weaknesses",
+                lambda: self.weakness_detector.detect_weaknesses(activities, results["analysis"]),
+                reconcile_deadline)
+            if not completed:
+                # The estimate-based result is still a reasonable answer
+                speculation["outcome"] = "miss_kept_estimate"
+                return speculative
+            return result
+
+        graph: AgentGraph = {
+            "analysis": ((), lambda results: bounded(
+                "analysis",
+                lambda: self.analyzer.analyze(activities, growth_metrics),
+                first_deadline,
+                lambda: self.analyzer._fallback_analysis(activities, growth_metrics, "timeout", "deadline exceeded"))),
+            "speculative_weaknesses": ((), lambda results: bounded(
+                "weaknesses",
+                lambda: self.weakness_detector.detect_weaknesses(activities, speculative_analysis),
+                first_deadline,
+                lambda: self.weakness_detector._fallback_weaknesses(topics, "timeout", "deadline exceeded"))),
+            "weaknesses": (("analysis", "speculative_weaknesses"), reconcile_weaknesses),
+            "tasks": (("analysis", "weaknesses"), lambda results: bounded(
+                "tasks",
+                lambda: self.task_generator.generate_tasks(results["weaknesses"], results["analysis"],
+                                                           activities=activities),
+                final_deadline,
+                lambda: {"status": "timeout", "tasks": self.task_generator._generate_fallback_tasks(
+                    results["weaknesses"].get('weaknesses', {}).get('weak_topics', []))})),
+        }
+
+        # Incremental runs: reused stages resolve immediately, and weakness
+        # detection waits for a reused analysis instead of speculating
+        reuse = reuse or {}
+
+        async def reused(value):
+            return value
+
+        if "analysis" in reuse:
+            graph["analysis"] = ((), lambda results: reused(
+                {**reuse["analysis"], "growth_metrics": growth_metrics}))
+        if "weaknesses" in reuse:
+            del graph["speculative_weaknesses"]
+            graph["weaknesses"] = ((), lambda results: reused(reuse["weaknesses"]))
+        elif "analysis" in reuse:
+            del graph["speculative_weaknesses"]
+            graph["weaknesses"] = (("analysis",), lambda results: bounded(
+                "weaknesses",
+                lambda: self.weakness_detector.detect_weaknesses(activities, results["analysis"]),
+                first_deadline,
+                lambda: self.weakness_detector._fallback_weaknesses(topics, "timeout", "deadline exceeded")))
+        if "speculative_weaknesses" not in graph:
+            speculation["outcome"] = "skipped"
+
+        try:
+            logger.info(f"{self.agent_name}: Running agent graph (estimated skill level {estimated_level}"
+                        + (f", reusing {sorted(reuse)})" if reuse else ")"))
+            def report(name, result):
+                if on_stage and name in REPORTED_STAGES:
+                    on_stage(name, result.get('tasks', []) if name == "tasks" else result)
 
-            # Phase 3: Generate final tasks
-            tasks_result = await self.task_generator.generate_tasks(weakness_result, analysis_result)
+            results = await run_agent_graph(graph, on_result=report)
+            analysis_result = results["analysis"]
+            weakness_result = results["weaknesses"]
+            tasks_result = results["tasks"]
 
             final_result = {
                 "user_id": user_id,
@@ -116,11 +328,18 @@ class OrchestratorAgent:
                 "agent_execution": {
                     "orchestrator": self.agent_name,
                     "agents_used": ["AnalyzerAgent", "WeaknessDetectorAgent", "TaskGeneratorAgent"],
-                    "execution_mode": "parallel"
-                }
+                    "execution_mode": "parallel",
+                    "speculation": speculation["outcome"],
+                    "latency_budget": budget,
+                    "timed_out": timed_out,
+                    "reused": sorted(reuse)
+                },
+                "partial": bool(timed_out)
             }
 
-            logger.info(f"{self.agent_name}: Parallel analysis complete")
+            logger.info(f"{self.agent_name}: Parallel analysis complete in {time.monotonic() - start:.2f}s")
+            if timed_out:
+                logger.warning(f"{self.agent_name}: Partial result, fallbacks used for {timed_out}")
             return final_result
 
         except Exception as e:
@@ -131,3 +350,149 @@ class OrchestratorAgent:
                 "status": "failed",
                 "growth_metrics": growth_metrics
             }
+
+    async def run_fused_analysis(self, user_id: str, processed_data: Dict, task_count: int = 5,
+                                 budget: Optional[float] = None,
+                                 on_stage: Optional[StageCallback] = None) -> Dict[str, Any]:
+        """
+        Run the analyzer, weakness and task steps as one structured LLM call.
+
+        Returns the same shape as run_parallel_analysis. Falls back to the
+        parallel pipeline (with the remaining budget) if the fused response
+        cannot be used, and to every agent's fallback if it misses the budget.
+
+        Args:
+            user_id: User identifier
+            processed_data: Processed activity data
+            task_count: Number of tasks to generate
+            budget: Seconds for the whole pipeline (default ANALYSIS_LATENCY_BUDGET)
+            on_stage: Stage callback as in run_parallel_analysis; all three
+                      stages are reported once the fused call returns
+
+        Returns:
+            Analysis results from the single fused call
+        """
+        logger.info(f"{self.agent_name}: Starting FUSED analysis")
+
+        budget = budget if budget is not None else ANALYSIS_LATENCY_BUDGET
+        deadline = time.monotonic() + budget
+        activities = processed_data.get('activities', [])
+        growth_metrics = processed_data.get('growth_metrics', {})
+        topics = self.weakness_detector._extract_topics(activities)
+
+        prompt = f"""Analyze this coding activity data, identify weak areas, and plan practice tasks.
+
+Total Activities: {len(activities)}
+Platforms: {growth_metrics.get('total_platforms', 0)}
+Days Active: {growth_metrics.get('days_active', 0)}
+Current Streak: {growth_metrics.get('streak', {}).get('current', 0)}
+
+Platform Stats:
+{self.analyzer._format_platform_stats(growth_metrics.get('platform_stats', {}))}
+
+Topics attempted: {', '.join(topics[:20])}
+
+Per-topic results:
+{format_tag_stats(compute_tag_stats(activities))}
+
+Provide:
+1. analysis: skill level assessment (Beginner/Intermediate/Advanced), primary programming languages,
+   coding patterns (consistency, difficulty progression) and platform preferences
+2. weaknesses: topics with low success rate, avoided or missing fundamental topics,
+   and an improvement priority list
+3. tasks: {task_count} personalized practice tasks for that skill level targeting the weak topics,
+   each with title, difficulty (Easy/Medium/Hard), topic, due_days and a brief reason
+
+Return JSON with keys: analysis, weaknesses, tasks"""
+
+        response, completed = await run_with_deadline(
+            "fused", lambda: self.llm_client(prompt, "gemini-2.0-flash", response_schema=FUSED_RESPONSE_SCHEMA), deadline)
+        if not completed:
+            logger.warning(f"{self.agent_name}: Fused call missed its deadline, using fallbacks")
+            weakness_result = self.weakness_detector._fallback_weaknesses(topics, "timeout", "deadline exceeded")
+            return self._report_stages(on_stage, {
+                "user_id": user_id,
+                "analysis": self.analyzer._fallback_analysis(activities, growth_metrics, "timeout", "deadline exceeded"),
+                "weaknesses": weakness_result,
+                "tasks": self.task_generator._generate_fallback_tasks(weakness_result["weaknesses"]["weak_topics"]),
+                "growth_metrics": growth_metrics,
+                "agent_execution": {
+                    "orchestrator": self.agent_name,
+                    "agents_used": [],
+                    "execution_mode": "fused",
+                    "latency_budget": budget,
+                    "timed_out": ["fused"]
+                },
+                "partial": True
+            })
+
+        try:
+            from services.analyser.llm_client import extract_json_from_text
+            fused = json.loads(extract_json_from_text(response))
+            analysis = fused["analysis"]
+            weaknesses = fused["weaknesses"]
+            tasks = fused["tasks"]
+            if not isinstance(analysis, dict) or not isinstance(weaknesses, dict) or not isinstance(tasks, list):
+                raise ValueError("fused response has the wrong shape")
+        except Exception as e:
+            logger.warning(f"{self.agent_name}: Fused response unusable ({e}), falling back to parallel analysis")
+            metrics_collector.increment("orchestrator.fused.fallback")
+            result = await self.run_parallel_analysis(user_id, processed_data,
+                                                      budget=max(deadline - time.monotonic(), 0),
+                                                      on_stage=on_stage)
+            if "agent_execution" in result:
+                result["agent_execution"]["execution_mode"] = "fused_fallback"
+            return result
+
+        if not tasks:
+            tasks = self.task_generator._generate_fallback_tasks(weaknesses.get('weak_topics', []))
+
+        logger.info(f"{self.agent_name}: Fused analysis complete")
+        return self._report_stages(on_stage, {
+            "user_id": user_id,
+            "analysis": {"status": "success", "analysis": analysis, "growth_metrics": growth_metrics},
+            "weaknesses": {"status": "success", "weaknesses": weaknesses},
+            "tasks": tasks,
+            "growth_metrics": growth_metrics,
+            "agent_execution": {
+                "orchestrator": self.agent_name,
+                "agents_used": ["AnalyzerAgent", "WeaknessDetectorAgent", "TaskGeneratorAgent"],
+                "execution_mode": "fused",
+                "latency_budget": budget,
+                "timed_out": []
+            },
+            "partial": False
+        })
+
+    def _report_stages(self, on_stage: Optional[StageCallback], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Report every stage of a finished result at once; returns the result."""
+        if on_stage:
+            for stage in REPORTED_STAGES:
+                on_stage(stage, result[stage])
+        return result
+
+    async def run(self, user_id: str, processed_data: Dict, mode: str = "parallel",
+                  budget: Optional[float] = None,
+                  on_stage: Optional[StageCallback] = None,
+                  reuse: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run the analysis pipeline in the given mode.
+
+        Args:
+            user_id: User identifier
+            processed_data: Processed activity data
+            mode: "parallel" (one call per agent) or "fused" (single call)
+            budget: Seconds for the whole pipeline (default ANALYSIS_LATENCY_BUDGET)
+            on_stage: Called with (stage, output) as each agent's output is ready
+            reuse: Previous stage outputs to keep (see run_parallel_analysis);
+                   with any reuse only the remaining agents run, in parallel mode
+
+        Returns:
+            Analysis results
+        """
+        if reuse:
+            return await self.run_parallel_analysis(user_id, processed_data, budget=budget,
+                                                    on_stage=on_stage, reuse=reuse)
+        if mode == "fused":
+            return await self.run_fused_analysis(user_id, processed_data, budget=budget, on_stage=on_stage)
+        return await self.run_parallel_analysis(user_id, processed_data, budget=budget, on_stage=on_stage)
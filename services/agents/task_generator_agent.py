@@ -2,27 +2,53 @@
 Specialized agent for generating personalized practice tasks.
 """
 import logging
-from typing import Dict, List, Any
+import math
+from typing import Dict, List, Any, Optional, Tuple
 import json
+from services.preprocessor.tag_stats import ACCEPTED_VERDICTS
+from services.tools.problem_catalog import ProblemCatalog, get_catalog
 
 logger = logging.getLogger(__name__)
 
+# Catalog rating window per skill level
+SKILL_RATING_RANGES = {
+    "beginner": (800, 1200),
+    "intermediate": (1200, 1700),
+    "advanced": (1700, 2400),
+}
+
+# Days to allow per task difficulty
+DUE_DAYS = {"Easy": 2, "Medium": 3, "Hard": 5}
+
 
 class TaskGeneratorAgent:
     """Generates personalized practice tasks and recommendations."""
 
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, catalog: Optional[ProblemCatalog] = None):
         self.llm_client = llm_client
         self.agent_name = "TaskGeneratorAgent"
+        self._catalog = catalog
+
+    @property
+    def catalog(self) -> ProblemCatalog:
+        if self._catalog is None:
+            self._catalog = get_catalog()
+        return self._catalog
 
-    async def generate_tasks(self, weaknesses: Dict, analysis: Dict, count: int = 5) -> Dict[str, Any]:
+    async def generate_tasks(self, weaknesses: Dict, analysis: Dict, count: int = 5,
+                             activities: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         Generate personalized practice tasks.
 
+        Real problems are picked from the local problem catalog when it has
+        matches, and the LLM only writes the reasons; otherwise the LLM
+        invents the tasks.
+
         Args:
             weaknesses: Weak areas from WeaknessDetectorAgent
             analysis: Analysis from AnalyzerAgent
             count: Number of tasks to generate
+            activities: User activities, to leave out problems already solved
 
         Returns:
             List of personalized tasks
@@ -32,6 +58,14 @@ class TaskGeneratorAgent:
         weak_topics = weaknesses.get('weaknesses', {}).get('weak_topics', [])
         skill_level = analysis.get('analysis', {}).get('skill_level', 'Intermediate')
 
+        if len(self.catalog):
+            picks = self._pick_catalog_problems(weak_topics, analysis, activities or [], count)
+            if picks:
+                tasks = [self._problem_to_task(problem, topic, target) for problem, topic, target in picks]
+                await self._write_reasons(tasks, skill_level)
+                logger.info(f"{self.agent_name}: Picked {len(tasks)} catalog problems")
+                return {"status": "success", "source": "catalog", "tasks": tasks}
+
         prompt = f"""Generate {count} personalized coding practice tasks:
 
 Skill Level: {skill_level}
@@ -67,6 +101,84 @@ Return as JSON array with keys: title, difficulty, topic, due_days, reason"""
             logger.error(f"{self.agent_name}: Generation failed - {e}")
             return {"status": "error", "error": str(e), "tasks": self._generate_fallback_tasks(weak_topics)}
 
+    def _rating_window(self, analysis: Dict) -> Tuple[int, int, int]:
+        """(low, high, target) problem rating for the user."""
+        cf_rating = analysis.get('growth_metrics', {}).get('platform_stats', {}).get('codeforces', {}).get('rating')
+        if isinstance(cf_rating, (int, float)) and cf_rating > 0:
+            # Slightly above the current rating
+            target = int(cf_rating) + 100
+            return max(target - 200, 800), target + 200, target
+        skill_level = str(analysis.get('analysis', {}).get('skill_level', 'Intermediate')).lower()
+        low, high = SKILL_RATING_RANGES.get(skill_level, SKILL_RATING_RANGES["intermediate"])
+        return low, high, (low + high) // 2
+
+    def _pick_catalog_problems(self, weak_topics: List[str], analysis: Dict, activities: List[Dict],
+                               count: int) -> List[Tuple[Dict, str, int]]:
+        """Unsolved catalog problems in the user's rating window, spread over weak topics."""
+        low, high, target = self._rating_window(analysis)
+        exclude = {a.get('id') for a in activities
+                   if isinstance(a, dict) and str(a.get('verdict', '')).upper() in ACCEPTED_VERDICTS}
+
+        picks = []
+        topics = [t for t in weak_topics[:5] if isinstance(t, str) and t.strip()]
+        per_topic = math.ceil(count / len(topics)) if topics else 0
+        for topic in topics:
+            for problem in self.catalog.search(tags=[topic], rating_range=(low, high), exclude_ids=exclude,
+                                               target_rating=target, count=per_topic):
+                picks.append((problem, topic, target))
+                exclude.add(problem["id"])
+
+        # Fill up with general practice when the weak topics have too few matches
+        if len(picks) < count:
+            for problem in self.catalog.search(rating_range=(low, high), exclude_ids=exclude,
+                                               target_rating=target, count=count - len(picks)):
+                topic = problem["tags"][0] if problem["tags"] else "practice"
+                picks.append((problem, topic, target))
+        return picks[:count]
+
+    def _problem_to_task(self, problem: Dict, topic: str, target: int) -> Dict:
+        if problem["rating"] < target - 100:
+            difficulty = "Easy"
+        elif problem["rating"] <= target + 100:
+            difficulty = "Medium"
+        else:
+            difficulty = "Hard"
+        return {
+            "title": problem["name"],
+            "difficulty": difficulty,
+            "topic": topic,
+            "due_days": DUE_DAYS[difficulty],
+            "reason": f"Practice {topic} at rating {problem['rating']}",
+            "platform": problem["platform"],
+            "problem_id": problem["id"],
+            "rating": problem["rating"],
+            "url": problem["url"],
+        }
+
+    async def _write_reasons(self, tasks: List[Dict], skill_level: str):
+        """Ask the fast model for one-line reasons; keeps the default reasons on failure."""
+        problem_lines = "\n".join(
+            f"- {t['problem_id']}: {t['title']} (rating {t['rating']}, topic {t['topic']})" for t in tasks)
+        prompt = f"""A {skill_level} competitive programmer was assigned these practice problems for their weak topics:
+
+{problem_lines}
+
+For each problem, write one short sentence explaining why it helps.
+
+Return a JSON object mapping each problem id to its reason"""
+
+        try:
+            response = await self.llm_client(prompt, "gemini-2.0-flash")
+            from services.analyser.llm_client import extract_json_from_text
+            reasons = json.loads(extract_json_from_text(response))
+            if isinstance(reasons, dict):
+                for task in tasks:
+                    reason = reasons.get(task["problem_id"])
+                    if isinstance(reason, str) and reason.strip():
+                        task["reason"] = reason.strip()
+        except Exception as e:
+            logger.warning(f"{self.agent_name}: Could not generate task reasons - {e}")
+
     def _generate_fallback_tasks(self, topics: List[str]) -> List[Dict]:
         """Generate fallback tasks if LLM fails."""
         fallback = [
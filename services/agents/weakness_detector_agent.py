@@ -4,6 +4,8 @@ Specialized agent for detecting weak areas and improvement opportunities.
 import logging
 from typing import Dict, List, Any
 import json
+from services.preprocessor.tag_stats import compute_tag_stats, detect_weak_topics, format_tag_stats
+from libs.observability import metrics_collector
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +32,24 @@ class WeaknessDetectorAgent:
 
         # Extract topics from activities
         topics = self._extract_topics(activities)
+        tag_stats = compute_tag_stats(activities)
+
+        # Clear per-tag failure rates answer the question without the LLM
+        rule_weaknesses = detect_weak_topics(tag_stats)
+        if rule_weaknesses:
+            metrics_collector.increment("weakness_detector.rules")
+            logger.info(f"{self.agent_name}: Weak topics from tag stats: {rule_weaknesses['weak_topics']}")
+            return {"status": "success", "source": "rules", "weaknesses": rule_weaknesses}
+        metrics_collector.increment("weakness_detector.llm")
 
         prompt = f"""Based on this coding activity, identify weak areas:
 
 Topics attempted: {', '.join(topics[:20])}
 Skill Level: {analysis.get('analysis', {}).get('skill_level', 'Unknown')}
 
+Per-topic results:
+{format_tag_stats(tag_stats)}
+
 Analyze:
 1. Topics with low success rate
 2. Avoided or missing fundamental topics
@@ -71,20 +85,24 @@ Return JSON with: weak_topics (list), missing_fundamentals (list), improvement_p
         except Exception as e:
             logger.error(f"{self.agent_name}: Detection failed - {e}")
             # Return fallback weaknesses
-            return {
-                "status": "error",
-                "error": str(e),
-                "weaknesses": {
-                    "weak_topics": topics[:3] if topics else ["algorithms", "data-structures"],
-                    "missing_fundamentals": ["practice consistency"],
-                    "improvement_priority": ["Focus on weak topics"]
-                }
+            return self._fallback_weaknesses(topics, "error", str(e))
+
+    def _fallback_weaknesses(self, topics: List[str], status: str, error: str) -> Dict[str, Any]:
+        """Topic-based weaknesses used when the LLM detection is unavailable."""
+        return {
+            "status": status,
+            "error": error,
+            "weaknesses": {
+                "weak_topics": topics[:3] if topics else ["algorithms", "data-structures"],
+                "missing_fundamentals": ["practice consistency"],
+                "improvement_priority": ["Focus on weak topics"]
             }
+        }
 
     def _extract_topics(self, activities: List[Dict]) -> List[str]:
-        """Extract unique topics from activities."""
+        """Extract unique topics from activities, sorted so prompts are reproducible."""
         topics = set()
         for activity in activities:
             if isinstance(activity, dict) and 'tags' in activity:
                 topics.update(activity.get('tags', []))
-        return list(topics)
+        return sorted(topics)
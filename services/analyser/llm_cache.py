@@ -0,0 +1,104 @@
+"""
+Prompt-level response cache for LLM clients.
+
+Wraps any async llm_client(prompt, model_name, **kwargs) callable so that
+identical prompts to the same model are answered from a tiered cache
+(in-memory LRU + SQLite) instead of another model call.
+"""
+import hashlib
+import json
+import os
+import re
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from libs.cache import TieredCache
+from libs.observability import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached LLM response is reused
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(6 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share an entry."""
+    return _WHITESPACE_RE.sub(" ", prompt).strip()
+
+
+def prompt_key(prompt: str, model_name: Optional[str], **kwargs) -> str:
+    """Cache key: hash of the model, normalized prompt and call options."""
+    digest = hashlib.sha256()
+    digest.update((model_name or "default").encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    if kwargs:
+        digest.update(b"\0")
+        digest.update(json.dumps(kwargs, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CachedLLMClient:
+    """
+    Caching wrapper around an async LLM client callable.
+
+    Usage:
+        llm_client = CachedLLMClient(generate_text)
+        orchestrator = OrchestratorAgent(llm_client)
+
+    Error responses (text starting with "Error") are never cached.
+    """
+
+    def __init__(self, llm_client: Callable[..., Awaitable[str]], cache: Optional[TieredCache] = None,
+                 ttl: float = LLM_CACHE_TTL, name: str = "llm_response"):
+        self.llm_client = llm_client
+        self.ttl = ttl
+        self.name = name
+        self._cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self) -> TieredCache:
+        """The response cache, opened on first use so importing a client touches no files."""
+        if self._cache is None:
+            # Expired responses are never served, so max_stale=0 lets the purge drop them
+            self._cache = TieredCache(self.name, max_entries=LLM_CACHE_MAX_ENTRIES, default_ttl=self.ttl,
+                                      max_stale=0)
+        return self._cache
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def __call__(self, prompt: str, model_name: Optional[str] = None, **kwargs: Any) -> str:
+        key = prompt_key(prompt, model_name, **kwargs)
+
+        entry = await self.cache.aget(key)
+        if entry is not None:
+            self._record(hit=True)
+            logger.info(f"LLM cache hit for {model_name or 'default model'}")
+            return entry.value
+
+        self._record(hit=False)
+        if model_name is None:
+            response = await self.llm_client(prompt, **kwargs)
+        else:
+            response = await self.llm_client(prompt, model_name, **kwargs)
+
+        if isinstance(response, str) and response and not response.startswith("Error"):
+            await self.cache.aset(key, response, ttl=self.ttl)
+        return response
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+            metrics_collector.increment(f"{self.name}.hits")
+        else:
+            self.misses += 1
+            metrics_collector.increment(f"{self.name}.misses")
+        metrics_collector.set_gauge(f"{self.name}.hit_rate", round(self.hit_rate, 4))
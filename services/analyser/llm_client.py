@@ -4,6 +4,13 @@ import os
 from dotenv import load_dotenv
 import logging
 import json
+import asyncio
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from services.fetcher.rate_limiter import RateLimitExceeded, get_governor
+from services.tools.gemini_tools import TOOLS, execute_tool
 
 load_dotenv()
 
@@ -12,8 +19,101 @@ genai.configure(api_key=GEMINI_API_KEY)
 
 logger = logging.getLogger(__name__)
 
+# Per-call timeout (seconds) for a single model request
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
 
-async def generate_text(prompt: str, model_name: str = "gemini-2.0-flash", use_tools: bool = False, max_retries: int = 3):
+# Worker threads for SDK calls that have no async variant
+LLM_THREAD_POOL_SIZE = int(os.getenv("LLM_THREAD_POOL_SIZE", "4"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _convert_tools(tools: List[Dict]) -> List[Dict]:
+    """Convert tool definitions to Gemini function declarations."""
+    return [{
+        "function_declarations": [{
+            "name": tool["name"],
+            "description": tool["description"],
+            "parameters": tool["parameters"]
+        }]
+    } for tool in tools]
+
+
+def _tools_signature(tools: Optional[List[Dict]]) -> str:
+    """Stable identifier for a tool schema, used in model registry keys."""
+    if not tools:
+        return "none"
+    return hashlib.sha256(json.dumps(tools, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+# Converted once at import; the schema does not change at runtime
+GEMINI_TOOLS = _convert_tools(TOOLS)
+GEMINI_TOOLS_SIGNATURE = _tools_signature(GEMINI_TOOLS)
+
+# Configured models, keyed by (model_name, tools signature)
+_models: Dict[Tuple[str, str], genai.GenerativeModel] = {}
+
+
+def get_model(model_name: str, use_tools: bool = False) -> genai.GenerativeModel:
+    """
+    Get a configured model, building it on first use.
+
+    Args:
+        model_name: The Gemini model name
+        use_tools: Whether the model should have the function calling tools
+
+    Returns:
+        A shared GenerativeModel instance
+    """
+    key = (model_name, GEMINI_TOOLS_SIGNATURE if use_tools else _tools_signature(None))
+    model = _models.get(key)
+    if model is None:
+        if use_tools:
+            model = genai.GenerativeModel(model_name, tools=GEMINI_TOOLS)
+        else:
+            model = genai.GenerativeModel(model_name)
+        _models[key] = model
+        logger.info(f"Created model {model_name} (tools={key[1]})")
+    return model
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=LLM_THREAD_POOL_SIZE, thread_name_prefix="llm")
+    return _executor
+
+
+def shutdown_llm_client():
+    """Stop the LLM worker threads without waiting on calls still running."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _call_off_loop(target, async_name: str, sync_name: str, content, timeout: float, **kwargs):
+    """
+    Run an SDK call without blocking the event loop.
+
+    Uses the SDK's async method when it has one, otherwise runs the blocking
+    method on the bounded LLM thread pool. Either way the await is cancellable
+    and bounded by timeout; a timed-out thread finishes in the background but
+    its result is discarded. Calls share the "gemini" rate limit with the
+    scraper's REST calls.
+    """
+    async with get_governor("gemini").slot():
+        async_method = getattr(target, async_name, None)
+        if async_method is not None:
+            call = async_method(content, **kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            call = loop.run_in_executor(_get_executor(), functools.partial(getattr(target, sync_name), content, **kwargs))
+        return await asyncio.wait_for(call, timeout=timeout)
+
+
+async def generate_text(prompt: str, model_name: str = "gemini-2.0-flash", use_tools: bool = False, max_retries: int = 3,
+                        timeout: Optional[float] = None, response_schema: Optional[Dict] = None):
     """
     Generate text using Gemini API with retry logic.
 
@@ -23,6 +123,9 @@ async def generate_text(prompt: str, model_name: str = "gemini-2.0-flash", use_t
                    Options: gemini-2.0-flash, gemini-2.5-flash, gemini-2.0-pro-exp
         use_tools: Whether to enable function calling tools
         max_retries: Maximum number of retry attempts (default: 3)
+        timeout: Seconds allowed per model request (default: LLM_CALL_TIMEOUT)
+        response_schema: JSON schema for structured output; the response is
+                         then a JSON document matching it
 
     Returns:
         Generated text response
@@ -31,32 +134,21 @@ async def generate_text(prompt: str, model_name: str = "gemini-2.0-flash", use_t
         logger.error("GEMINI_API_KEY not set in .env file")
         return "Error: GEMINI_API_KEY not set in .env file"
 
+    call_timeout = timeout if timeout is not None else LLM_CALL_TIMEOUT
+
+    request_options = {}
+    if response_schema:
+        request_options["generation_config"] = {
+            "response_mime_type": "application/json",
+            "response_schema": response_schema
+        }
+
     for attempt in range(max_retries):
         try:
-            # Import tools if needed
-            tools = None
-            if use_tools:
-                from services.tools.gemini_tools import TOOLS, execute_tool
-
-                # Convert tools to Gemini format
-                gemini_tools = []
-                for tool in TOOLS:
-                    gemini_tools.append({
-                        "function_declarations": [{
-                            "name": tool["name"],
-                            "description": tool["description"],
-                            "parameters": tool["parameters"]
-                        }]
-                    })
-                tools = gemini_tools
-
-            # Create model with or without tools
-            if tools:
-                model = genai.GenerativeModel(model_name, tools=tools)
-            else:
-                model = genai.GenerativeModel(model_name)
+            model = get_model(model_name, use_tools)
 
-            response = model.generate_content(prompt)
+            response = await _call_off_loop(model, "generate_content_async", "generate_content", prompt, call_timeout,
+                                            **request_options)
 
             # Handle function calls if present
             if use_tools and hasattr(response, 'candidates') and response.candidates:
@@ -65,29 +157,37 @@ async def generate_text(prompt: str, model_name: str = "gemini-2.0-flash", use_t
                     for part in candidate.content.parts:
                         if hasattr(part, 'function_call'):
                             # Execute the function call
-                            from services.tools.gemini_tools import execute_tool
                             func_call = part.function_call
                             result = execute_tool(func_call.name, dict(func_call.args))
                             logger.info(f"Function {func_call.name} executed: {result}")
 
                             # Continue conversation with function result
                             chat = model.start_chat()
-                            chat.send_message(prompt)
-                            func_response = chat.send_message({
+                            await _call_off_loop(chat, "send_message_async", "send_message", prompt, call_timeout)
+                            func_response = await _call_off_loop(chat, "send_message_async", "send_message", {
                                 "function_response": {
                                     "name": func_call.name,
                                     "response": result
                                 }
-                            })
+                            }, call_timeout)
                             return func_response.text
 
             return response.text
 
+        except RateLimitExceeded as e:
+            # Retrying would only queue for the same exhausted limit
+            logger.error(f"Gemini rate limit reached generating text: {e}")
+            return f"Error generating text: rate limited ({e})"
+
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out after {call_timeout}s generating text (attempt {attempt + 1}/{max_retries})")
+            if attempt >= max_retries - 1:
+                return f"Error generating text after {max_retries} attempts: timed out after {call_timeout}s"
+
         except Exception as e:
             logger.error(f"Error generating text (attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
                 # Wait before retrying (exponential backoff)
-                import asyncio
                 await asyncio.sleep(2 ** attempt)
             else:
                 return f"Error generating text after {max_retries} attempts: {str(e)}"
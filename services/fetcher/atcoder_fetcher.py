@@ -1,11 +1,163 @@
 import aiohttp
 import asyncio
 import logging
+from typing import Optional, Tuple
+from .http_client import get_http_session
+from .json_stream import iter_json_array
+from .profile_cache import invalidate_cached_profile
+from .rate_limiter import RateLimitExceeded, governed
+from .sync_store import get_sync_store
 
 logger = logging.getLogger(__name__)
 
 # Timeout configuration
 FETCH_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+# Full-history syncs stream large bodies, so allow longer reads
+SYNC_TIMEOUT = aiohttp.ClientTimeout(total=120, connect=10)
+
+SUBMISSIONS_URL = "https://kenkoooo.com/atcoder/atcoder-api/v3/user/submissions"
+
+# Incremental submission sync
+KENKOOOO_PAGE_LIMIT = 500
+MAX_SYNC_PAGES = 20
+# Pages pulled while a request waits; a longer first sync continues in the background
+REQUEST_SYNC_PAGES = 2
+MERGE_BATCH_SIZE = 500
+RECENT_ACTIVITY_LIMIT = 100
+
+# In-flight background backfills, keyed by lowercased username
+_backfills = {}
+
+
+async def _get_json(session: aiohttp.ClientSession, url: str, params: dict):
+    """GET a Kenkoooo API URL and return (status, parsed JSON or None)."""
+    async with governed(url), session.get(url, params=params, headers={"Cache-Control": "no-cache"}, timeout=FETCH_TIMEOUT) as response:
+        if response.status != 200:
+            return response.status, None
+        return response.status, await response.json()
+
+
+def _submission_to_activity(submission: dict) -> dict:
+    """Convert a Kenkoooo submission into the common activity format."""
+    return {
+        "platform": "atcoder",
+        "id": f"{submission.get('contest_id', '')}-{submission.get('problem_id', '')}",
+        "title": submission.get("problem_id", "Unknown"),
+        "tags": [],  # AtCoder API doesn't provide tags easily
+        "verdict": submission.get("result", "UNKNOWN"),
+        "timestamp": submission.get("epoch_second", 0),
+        "contest": submission.get("contest_id", ""),
+        "language": submission.get("language", "")
+    }
+
+
+async def _sync_submissions(session: aiohttp.ClientSession, username: str, store,
+                            max_pages: int = MAX_SYNC_PAGES) -> Tuple[Optional[int], bool]:
+    """
+    Pull submissions newer than the stored from_second watermark.
+
+    The response body is decoded element by element and merged into the
+    local history in small batches, so a full-history first sync never holds
+    the whole submission list in memory.
+
+    Args:
+        session: Shared HTTP session
+        username: AtCoder username
+        store: SyncStore holding the watermark and activity history
+        max_pages: Most pages to pull before pausing
+
+    Returns:
+        (number of new submissions merged, or None if the API failed;
+        True if the sync paused at max_pages with more submissions left)
+    """
+    from_second = await asyncio.to_thread(store.get_cursor, "atcoder", username) or 0
+    synced = 0
+    # Ids at from_second already merged from the previous (capped) page
+    boundary_ids = set()
+
+    for _ in range(max_pages):
+        page_count = 0
+        newest_second = from_second - 1
+        newest_ids = set()
+        batch = []
+
+        async with governed(SUBMISSIONS_URL), session.get(
+            SUBMISSIONS_URL,
+            params={"user": username, "from_second": from_second},
+            headers={"Cache-Control": "no-cache"},
+            timeout=SYNC_TIMEOUT
+        ) as response:
+            if response.status != 200:
+                logger.warning(f"AtCoder submissions API returned status {response.status} for username: {username}")
+                return (synced if synced else None), False
+
+            async for submission in iter_json_array(response.content):
+                page_count += 1
+                submission_id = submission.get("id", 0)
+                epoch_second = submission.get("epoch_second", 0)
+                if epoch_second > newest_second:
+                    newest_second, newest_ids = epoch_second, set()
+                if epoch_second == newest_second:
+                    newest_ids.add(submission_id)
+                if submission_id not in boundary_ids:
+                    synced += 1
+                batch.append((submission_id, epoch_second, _submission_to_activity(submission)))
+                if len(batch) >= MERGE_BATCH_SIZE:
+                    await asyncio.to_thread(store.merge_activities, "atcoder", username, batch)
+                    batch = []
+
+        # Kenkoooo caps each response; a short page means we are caught up
+        capped = page_count >= KENKOOOO_PAGE_LIMIT
+
+        if page_count:
+            # A capped page may have cut off submissions in its newest second, so the
+            # next page starts at that second again (rows are deduped on submission id).
+            # Only move past it when the whole page is that one second, to keep progressing.
+            if capped and newest_second > from_second:
+                next_second = newest_second
+                boundary_ids = newest_ids
+            else:
+                next_second = newest_second + 1
+                boundary_ids = set()
+            await asyncio.to_thread(store.merge_activities, "atcoder", username, batch, next_second)
+            from_second = next_second
+
+        if not capped:
+            break
+    else:
+        logger.info(f"AtCoder sync for {username} paused after {max_pages} pages at from_second {from_second}")
+        return synced, True
+
+    return synced, False
+
+
+def _backfill_in_background(username: str):
+    """Continue a paused sync without blocking the caller; one backfill per user."""
+    key = username.lower()
+    if key in _backfills:
+        return
+
+    async def backfill():
+        try:
+            synced, more = await _sync_submissions(get_http_session(), username, get_sync_store())
+            logger.info(f"Backfilled {synced or 0} AtCoder submissions for {username}")
+            if more:
+                logger.warning(f"AtCoder backfill for {username} paused after {MAX_SYNC_PAGES} pages; "
+                               f"resuming on the next fetch")
+            # The cached profile was built from a partial history
+            await invalidate_cached_profile("atcoder", username)
+        except Exception as e:
+            logger.error(f"AtCoder backfill failed for {username}: {e}", exc_info=True)
+        finally:
+            _backfills.pop(key, None)
+
+    # Keep a reference so the task is not garbage collected mid-flight
+    _backfills[key] = asyncio.ensure_future(backfill())
+
+
+async def _backfill_running() -> Tuple[Optional[int], bool]:
+    """Sync result while a background backfill owns the watermark."""
+    return None, False
 
 
 async def fetch_atcoder(username: str):
@@ -13,83 +165,85 @@ async def fetch_atcoder(username: str):
     Fetch AtCoder user statistics and recent submissions.
     Uses AtCoder's public API (unofficial - Kenkoooo).
 
+    Submissions are pulled incrementally from a persisted from_second
+    watermark and served from the local activity history. At most
+    REQUEST_SYNC_PAGES pages are pulled inline; a longer first sync is
+    finished by a background backfill.
+
     Args:
         username: AtCoder username
 
     Returns:
         Dict with 'activities' (list of submissions) and 'stats' (user info)
     """
-    submissions_url = f"https://kenkoooo.com/atcoder/atcoder-api/v3/user/submissions"
     user_info_url = f"https://kenkoooo.com/atcoder/atcoder-api/v3/user/info"
     logger.info(f"Fetching AtCoder data for {username} via Kenkoooo API (note: may have 15-30min delay)")
 
     try:
-        async with aiohttp.ClientSession(timeout=FETCH_TIMEOUT) as session:
-            # Fetch both submissions and user info in parallel
-            submissions_task = session.get(
-                submissions_url,
-                params={"user": username, "from_second": 0},
-                headers={"Cache-Control": "no-cache"}
-            )
-            user_info_task = session.get(
-                user_info_url,
-                params={"user": username},
-                headers={"Cache-Control": "no-cache"}
-            )
-
-            submissions_response, user_info_response = await asyncio.gather(submissions_task, user_info_task, return_exceptions=True)
-
-            # Process submissions
-            activities = []
-            if not isinstance(submissions_response, Exception):
-                if submissions_response.status == 200:
-                    submissions = await submissions_response.json()
-                    if submissions:
-                        # Get last 100 submissions
-                        for submission in submissions[:100]:
-                            activities.append({
-                                "platform": "atcoder",
-                                "id": f"{submission.get('contest_id', '')}-{submission.get('problem_id', '')}",
-                                "title": submission.get("problem_id", "Unknown"),
-                                "tags": [],  # AtCoder API doesn't provide tags easily
-                                "verdict": submission.get("result", "UNKNOWN"),
-                                "timestamp": submission.get("epoch_second", 0),
-                                "contest": submission.get("contest_id", ""),
-                                "language": submission.get("language", "")
-                            })
-                        logger.info(f"Successfully fetched {len(activities)} AtCoder submissions for {username}")
-                    else:
-                        logger.warning(f"No submissions found for AtCoder username: {username}")
-                else:
-                    logger.warning(f"AtCoder submissions API returned status {submissions_response.status} for username: {username}")
-            else:
-                logger.error(f"Error fetching AtCoder submissions: {submissions_response}")
-
-            # Process user info
-            stats = {}
-            if not isinstance(user_info_response, Exception):
-                if user_info_response.status == 200:
-                    user_info = await user_info_response.json()
-                    if user_info:
-                        stats = {
-                            "rating": user_info.get("rating", 0),
-                            "highest_rating": user_info.get("highest_rating", 0),
-                            "rank": user_info.get("rank", 0),
-                            "accepted_count": user_info.get("accepted_count", 0)
-                        }
-                        logger.info(f"AtCoder stats for {username}: rating={stats['rating']}, highest_rating={stats['highest_rating']}, accepted_count={stats['accepted_count']}")
-                    else:
-                        logger.warning(f"No user info found for AtCoder username: {username}")
+        session = get_http_session()
+        store = get_sync_store()
+
+        # A running backfill already owns the sync; serve the history as it fills
+        if username.lower() in _backfills:
+            sync = _backfill_running()
+        else:
+            sync = _sync_submissions(session, username, store, REQUEST_SYNC_PAGES)
+
+        # Sync submissions and fetch user info in parallel
+        sync_response, user_info_response = await asyncio.gather(
+            sync,
+            _get_json(session, user_info_url, {"user": username}),
+            return_exceptions=True
+        )
+
+        # Without user info the stats would be scraped; don't add load while throttled
+        if isinstance(user_info_response, RateLimitExceeded):
+            raise user_info_response
+
+        # Process submissions
+        if isinstance(sync_response, Exception):
+            logger.error(f"Error fetching AtCoder submissions: {sync_response}")
+        else:
+            synced, more = sync_response
+            if synced is not None:
+                logger.info(f"Synced {synced} new AtCoder submissions for {username}")
+            if more:
+                _backfill_in_background(username)
+
+        activities = await asyncio.to_thread(store.recent_activities, "atcoder", username, RECENT_ACTIVITY_LIMIT)
+        if activities:
+            logger.info(f"Successfully fetched {len(activities)} AtCoder submissions for {username}")
+        else:
+            logger.warning(f"No submissions found for AtCoder username: {username}")
+
+        # Process user info
+        stats = {}
+        if not isinstance(user_info_response, Exception):
+            user_info_status, user_info = user_info_response
+            if user_info_status == 200:
+                if user_info:
+                    stats = {
+                        "rating": user_info.get("rating", 0),
+                        "highest_rating": user_info.get("highest_rating", 0),
+                        "rank": user_info.get("rank", 0),
+                        "accepted_count": user_info.get("accepted_count", 0)
+                    }
+                    logger.info(f"AtCoder stats for {username}: rating={stats['rating']}, highest_rating={stats['highest_rating']}, accepted_count={stats['accepted_count']}")
                 else:
-                    logger.warning(f"AtCoder user info API returned status {user_info_response.status} for username: {username}")
+                    logger.warning(f"No user info found for AtCoder username: {username}")
             else:
-                logger.error(f"Error fetching AtCoder user info: {user_info_response}")
+                logger.warning(f"AtCoder user info API returned status {user_info_status} for username: {username}")
+        else:
+            logger.error(f"Error fetching AtCoder user info: {user_info_response}")
 
-            return {
-                "activities": activities,
-                "stats": stats
-            }
+        return {
+            "activities": activities,
+            "stats": stats
+        }
 
+    except RateLimitExceeded:
+        # Throttled locally: let the caller back off instead of trying a fallback
+        raise
     except asyncio.TimeoutError:
         logger.error(f"Timeout fetching AtCoder data for username: {username}")
         return {"activities": [], "stats": {}}
@@ -5,11 +5,12 @@ logger = logging.getLogger(__name__)
 
 async def fetch_codechef(username: str):
     """
-    Fetch CodeChef user statistics using Gemini AI web scraping.
+    Fetch CodeChef user statistics by scraping the profile page.
 
     NOTE: CodeChef does not provide an official public API as of 2024.
-    This implementation uses the Gemini scraper to extract data from
-    the profile page: https://www.codechef.com/users/{username}
+    This implementation parses the profile page with the deterministic
+    CodeChef extractor and only falls back to Gemini when it finds too
+    little: https://www.codechef.com/users/{username}
 
     Args:
         username: CodeChef username
@@ -20,11 +21,11 @@ async def fetch_codechef(username: str):
     # Import here to avoid circular dependency issues
     from .gemini_scraper import scrape_profile
 
-    logger.info(f"Fetching CodeChef data for {username} using Gemini scraper")
-    logger.info("Note: CodeChef has no official public API, using AI web scraping")
+    logger.info(f"Fetching CodeChef data for {username} using profile scraper")
+    logger.info("Note: CodeChef has no official public API, parsing the profile page")
 
     try:
-        # Use Gemini scraper to extract profile data
+        # Scrape the profile page (rules first, Gemini as last resort)
         result = await scrape_profile("codechef", username)
 
         if result and result.get("stats"):
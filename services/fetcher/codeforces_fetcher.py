@@ -1,24 +1,126 @@
 import aiohttp
 import asyncio
 import logging
+import os
+from functools import partial
+from typing import Optional
 from urllib.parse import quote
+
+from libs.observability import metrics_collector
 from .leetcode_fetcher import fetch_leetcode
 from .hackerrank_fetcher import fetch_hackerrank
 from .codechef_fetcher import fetch_codechef
 from .atcoder_fetcher import fetch_atcoder
 
 from .gemini_scraper import scrape_profile
+from .http_client import get_http_session
+from .profile_cache import get_cached_profile, set_cached_profile
+from .rate_limiter import RateLimitExceeded, governed
+from .singleflight import SingleFlight
+from .sync_store import get_sync_store
 
 logger = logging.getLogger(__name__)
 
 # Timeout configuration
 FETCH_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
 
+# Incremental submission sync
+SUBMISSIONS_PAGE_SIZE = 100
+MAX_SYNC_PAGES = 10
+RECENT_ACTIVITY_LIMIT = 100
+
+# Fetchers that already scrape the profile page themselves
+SCRAPING_FETCHERS = {"codechef"}
+
+# Gemini scraping fallback stage
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "3"))
+SCRAPE_DEADLINE = float(os.getenv("SCRAPE_DEADLINE", "45"))
+
+
+async def _get_json(session: aiohttp.ClientSession, url: str):
+    """GET a Codeforces API URL and return (status, parsed JSON or {})."""
+    async with governed(url), session.get(url, headers={"Cache-Control": "no-cache"}, timeout=FETCH_TIMEOUT) as response:
+        if response.status != 200:
+            return response.status, {}
+        return response.status, await response.json()
+
+
+def _submission_to_activity(item: dict) -> dict:
+    """Convert a Codeforces submission into the common activity format."""
+    prob = item.get("problem", {})
+    return {
+        "platform": "codeforces",
+        "id": f"{prob.get('contestId','')}-{prob.get('index','')}",
+        "title": prob.get("name", "Unknown"),
+        "tags": prob.get("tags", []),
+        "verdict": item.get("verdict", "UNKNOWN"),
+        "timestamp": item.get("creationTimeSeconds", 0)
+    }
+
+
+async def _fetch_new_submissions(session: aiohttp.ClientSession, handle: str, last_seen_id: Optional[int]):
+    """
+    Page through user.status newest-first until an already-seen submission.
+
+    On the first sync (no cursor) only the newest page is requested.
+
+    Args:
+        session: Shared HTTP session
+        handle: Codeforces username
+        last_seen_id: Newest submission id already stored, or None
+
+    Returns:
+        (new raw submissions newest first, or None if the API failed;
+        True if the cursor may advance to the newest submission (the scan
+        reached last_seen_id, the end of the history or the page limit),
+        False if a failed page left a gap the next sync should fill)
+    """
+    encoded_handle = quote(handle)
+    new_items = []
+    start = 1
+
+    for page in range(MAX_SYNC_PAGES):
+        url = f"https://codeforces.com/api/user.status?handle={encoded_handle}&from={start}&count={SUBMISSIONS_PAGE_SIZE}"
+        status, data = await _get_json(session, url)
+
+        if status != 200 or data.get("status") != "OK":
+            if status == 200:
+                logger.warning(f"Codeforces submissions API error for handle {handle}: {data.get('comment', 'Unknown error')}")
+            else:
+                logger.warning(f"Codeforces submissions API returned status {status} for handle: {handle}")
+            # Keep whatever earlier pages returned, but they leave a gap down to last_seen_id
+            return (new_items if page > 0 else None), False
+
+        result = data.get("result", [])
+        reached_seen = False
+        for item in result:
+            if last_seen_id is not None and item.get("id", 0) <= last_seen_id:
+                reached_seen = True
+                break
+            new_items.append(item)
+
+        if reached_seen or last_seen_id is None or len(result) < SUBMISSIONS_PAGE_SIZE:
+            break
+        start += SUBMISSIONS_PAGE_SIZE
+    else:
+        # The skipped submissions sit below MAX_SYNC_PAGES pages of newer ones, far past
+        # the RECENT_ACTIVITY_LIMIT the history serves. Holding the cursor back would
+        # rescan the same pages on every sync without ever reaching last_seen_id.
+        logger.warning(f"Codeforces sync for {handle} stopped after {MAX_SYNC_PAGES} pages before reaching "
+                       f"last seen submission; advancing the cursor past the unread gap")
+        metrics_collector.increment("codeforces.sync.page_limit")
+        return new_items, True
+
+    return new_items, True
+
 
 async def fetch_codeforces(handle: str):
     """
     Fetch Codeforces user submissions and user info.
 
+    Submissions are synced incrementally: only submissions newer than the
+    stored cursor are downloaded and merged into the local activity history.
+
     Args:
         handle: Codeforces username
 
@@ -27,67 +129,71 @@ async def fetch_codeforces(handle: str):
     """
     # URL encode the handle to handle special characters
     encoded_handle = quote(handle)
-    submissions_url = f"https://codeforces.com/api/user.status?handle={encoded_handle}"
     user_info_url = f"https://codeforces.com/api/user.info?handles={encoded_handle}"
 
     try:
-        async with aiohttp.ClientSession(timeout=FETCH_TIMEOUT) as session:
-            # Fetch both submissions and user info in parallel
-            submissions_task = session.get(submissions_url, headers={"Cache-Control": "no-cache"})
-            user_info_task = session.get(user_info_url, headers={"Cache-Control": "no-cache"})
-
-            submissions_response, user_info_response = await asyncio.gather(submissions_task, user_info_task)
-
-            # Process submissions
-            activities = []
-            if submissions_response.status == 200:
-                submissions_data = await submissions_response.json()
-                if submissions_data.get("status") == "OK":
-                    for item in submissions_data.get("result", [])[:100]:  # Limit to 100 most recent
-                        prob = item.get("problem", {})
-                        activities.append({
-                            "platform": "codeforces",
-                            "id": f"{prob.get('contestId','')}-{prob.get('index','')}",
-                            "title": prob.get("name", "Unknown"),
-                            "tags": prob.get("tags", []),
-                            "verdict": item.get("verdict", "UNKNOWN"),
-                            "timestamp": item.get("creationTimeSeconds", 0)
-                        })
-                    logger.info(f"Successfully fetched {len(activities)} Codeforces submissions for {handle}")
-                else:
-                    logger.warning(f"Codeforces submissions API error for handle {handle}: {submissions_data.get('comment', 'Unknown error')}")
+        session = get_http_session()
+        store = get_sync_store()
+        last_seen_id = await asyncio.to_thread(store.get_cursor, "codeforces", handle)
+
+        # Fetch new submissions and user info in parallel
+        (new_items, complete), (user_info_status, user_info_data) = await asyncio.gather(
+            _fetch_new_submissions(session, handle, last_seen_id),
+            _get_json(session, user_info_url)
+        )
+
+        # Merge new submissions into the local history
+        if new_items:
+            rows = [
+                (item["id"], item.get("creationTimeSeconds", 0), _submission_to_activity(item))
+                for item in new_items if "id" in item
+            ]
+            # Only advance the cursor past submissions that were all read; otherwise
+            # the next sync scans down to the old cursor again and fills the gap
+            newest_id = max(row[0] for row in rows) if rows and complete else None
+            await asyncio.to_thread(store.merge_activities, "codeforces", handle, rows, newest_id)
+            if complete:
+                logger.info(f"Synced {len(rows)} new Codeforces submissions for {handle} (cursor was {last_seen_id})")
             else:
-                logger.warning(f"Codeforces submissions API returned status {submissions_response.status} for handle: {handle}")
-
-            # Process user info
-            stats = {}
-            if user_info_response.status == 200:
-                user_info_data = await user_info_response.json()
-                if user_info_data.get("status") == "OK":
-                    users = user_info_data.get("result", [])
-                    if users:
-                        user = users[0]
-                        stats = {
-                            "rating": user.get("rating", 0),
-                            "max_rating": user.get("maxRating", 0),
-                            "rank": user.get("rank", "unrated"),
-                            "max_rank": user.get("maxRank", "unrated"),
-                            "contribution": user.get("contribution", 0),
-                            "friend_of_count": user.get("friendOfCount", 0)
-                        }
-                        logger.info(f"Codeforces stats for {handle}: rating={stats['rating']}, rank={stats['rank']}, max_rating={stats['max_rating']}")
-                    else:
-                        logger.warning(f"No user info found in Codeforces API response for handle: {handle}")
+                logger.warning(f"Partially synced {len(rows)} Codeforces submissions for {handle}; "
+                               f"keeping cursor at {last_seen_id}")
+        elif new_items is not None:
+            logger.info(f"No new Codeforces submissions for {handle} since {last_seen_id}")
+
+        activities = await asyncio.to_thread(store.recent_activities, "codeforces", handle, RECENT_ACTIVITY_LIMIT)
+        logger.info(f"Successfully fetched {len(activities)} Codeforces submissions for {handle}")
+
+        # Process user info
+        stats = {}
+        if user_info_status == 200:
+            if user_info_data.get("status") == "OK":
+                users = user_info_data.get("result", [])
+                if users:
+                    user = users[0]
+                    stats = {
+                        "rating": user.get("rating", 0),
+                        "max_rating": user.get("maxRating", 0),
+                        "rank": user.get("rank", "unrated"),
+                        "max_rank": user.get("maxRank", "unrated"),
+                        "contribution": user.get("contribution", 0),
+                        "friend_of_count": user.get("friendOfCount", 0)
+                    }
+                    logger.info(f"Codeforces stats for {handle}: rating={stats['rating']}, rank={stats['rank']}, max_rating={stats['max_rating']}")
                 else:
-                    logger.warning(f"Codeforces user info API error for handle {handle}: {user_info_data.get('comment', 'Unknown error')}")
+                    logger.warning(f"No user info found in Codeforces API response for handle: {handle}")
             else:
-                logger.warning(f"Codeforces user info API returned status {user_info_response.status} for handle: {handle}")
+                logger.warning(f"Codeforces user info API error for handle {handle}: {user_info_data.get('comment', 'Unknown error')}")
+        else:
+            logger.warning(f"Codeforces user info API returned status {user_info_status} for handle: {handle}")
 
-            return {
-                "activities": activities,
-                "stats": stats
-            }
+        return {
+            "activities": activities,
+            "stats": stats
+        }
 
+    except RateLimitExceeded:
+        # Throttled locally: let the caller back off instead of trying a fallback
+        raise
     except asyncio.TimeoutError:
         logger.error(f"Timeout fetching Codeforces data for handle: {handle}")
         return {"activities": [], "stats": {}}
@@ -99,10 +205,29 @@ async def fetch_codeforces(handle: str):
         return {"activities": [], "stats": {}}
 
 
-async def fetch_all(handles: dict):
+# Fetchers in the order platforms are requested
+PLATFORM_FETCHERS = {
+    "codeforces": fetch_codeforces,
+    "leetcode": fetch_leetcode,
+    "hackerrank": fetch_hackerrank,
+    "codechef": fetch_codechef,
+    "atcoder": fetch_atcoder,
+}
+
+# Coalesces concurrent fetches of the same (platform, handle)
+_fetch_flights = SingleFlight("fetch.singleflight")
+
+# In-flight stale-while-revalidate refreshes, keyed by (platform, handle)
+_background_refreshes = {}
+
+
+async def fetch_all(handles: dict, force_refresh: bool = False):
     """
     Fetch data from all supported platforms in parallel.
 
+    Results are served from the profile cache when available. Stale entries
+    are returned immediately and refreshed in the background.
+
     Args:
         handles: Dictionary with platform names as keys and usernames as values
                 Example: {
@@ -112,9 +237,10 @@ async def fetch_all(handles: dict):
                     "atcoder": "username",
                     "hackerrank": "username"
                 }
+        force_refresh: Bypass the cache and fetch every platform upstream
 
     Returns:
-        List of all activities from all platforms
+        Dict with 'activities' (all platforms) and 'stats' (keyed by platform)
     """
     if not handles:
         logger.warning("No handles dictionary provided")
@@ -138,124 +264,218 @@ async def fetch_all(handles: dict):
     logger.info(f"Starting data fetch for platforms: {list(normalized_handles.keys())}")
     logger.info(f"Normalized handles: {normalized_handles}")
 
-    tasks = []
-    platform_names = []
-    handle_values = []
+    requested = {
+        platform: normalized_handles[platform]
+        for platform in PLATFORM_FETCHERS
+        if normalized_handles.get(platform)
+    }
 
-    # Check each platform with normalized keys
-    if normalized_handles.get("codeforces"):
-        handle = normalized_handles["codeforces"]
-        tasks.append(fetch_codeforces(handle))
-        platform_names.append("codeforces")
-        handle_values.append(handle)
+    if not requested:
+        logger.warning(f"No valid platform handles provided. Input handles: {handles}, Normalized: {normalized_handles}")
+        return []
 
-    if normalized_handles.get("leetcode"):
-        handle = normalized_handles["leetcode"]
-        tasks.append(fetch_leetcode(handle))
-        platform_names.append("leetcode")
-        handle_values.append(handle)
+    # Serve cached profiles; only misses (or everything on force_refresh) go upstream
+    platform_results = {}
+    to_fetch = {}
+    for platform, handle in requested.items():
+        entry = None if force_refresh else await get_cached_profile(platform, handle)
+        if entry is None:
+            to_fetch[platform] = handle
+            continue
 
-    if normalized_handles.get("hackerrank"):
-        handle = normalized_handles["hackerrank"]
-        tasks.append(fetch_hackerrank(handle))
-        platform_names.append("hackerrank")
-        handle_values.append(handle)
+        platform_results[platform] = entry.value
+        if entry.is_fresh:
+            logger.info(f"Serving cached {platform} data for {handle} (age {entry.age:.0f}s)")
+        else:
+            logger.info(f"Serving stale {platform} data for {handle} (age {entry.age:.0f}s), refreshing in background")
+            _refresh_in_background(platform, handle)
 
-    if normalized_handles.get("codechef"):
-        handle = normalized_handles["codechef"]
-        tasks.append(fetch_codechef(handle))
-        platform_names.append("codechef")
-        handle_values.append(handle)
+    if to_fetch:
+        platform_results.update(await _fetch_platforms(to_fetch))
 
-    if normalized_handles.get("atcoder"):
-        handle = normalized_handles["atcoder"]
-        tasks.append(fetch_atcoder(handle))
-        platform_names.append("atcoder")
-        handle_values.append(handle)
+    all_activities = []
+    all_stats = {}
+    for platform in requested:
+        result = platform_results.get(platform) or {}
+        all_activities.extend(result.get("activities", []))
+        if result.get("stats"):
+            all_stats[platform] = result["stats"]
 
+    return {
+        "activities": all_activities,
+        "stats": all_stats
+    }
 
 
-    if not tasks:
-        logger.warning(f"No valid platform handles provided. Input handles: {handles}, Normalized: {normalized_handles}")
-        return []
+def _refresh_in_background(platform: str, handle: str):
+    """Refetch one platform without blocking the caller; deduplicated per handle."""
+    key = (platform, handle.lower())
+    if key in _background_refreshes:
+        return
 
-    logger.info(f"Fetching data for {len(tasks)} platforms: {list(zip(platform_names, handle_values))}")
+    async def refresh():
+        try:
+            await _fetch_platforms({platform: handle})
+        except Exception as e:
+            logger.error(f"Background refresh failed for {platform}/{handle}: {e}", exc_info=True)
+        finally:
+            _background_refreshes.pop(key, None)
 
-    # Gather all tasks with exception handling
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Keep a reference so the task is not garbage collected mid-flight
+    _background_refreshes[key] = asyncio.ensure_future(refresh())
 
-    # Process results and handle exceptions
-    all_activities = []
-    all_stats = {}
 
-    for i, result in enumerate(results):
-        platform = platform_names[i]
-        handle = handle_values[i]
+async def _fetch_platforms(handles_by_platform: dict) -> dict:
+    """
+    Fetch platforms upstream, fill missing stats via Gemini, and cache results.
+
+    Args:
+        handles_by_platform: Normalized {platform: handle} to fetch
 
+    Returns:
+        Dict of platform -> {"activities": [...], "stats": {...}}
+    """
+    platform_names = list(handles_by_platform)
+    logger.info(f"Fetching data for {len(platform_names)} platforms: {list(handles_by_platform.items())}")
+
+    # Caps concurrent Gemini scrapes across the platforms of this call
+    semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+    # Identical concurrent resolutions of the same (platform, handle) share one fetch,
+    # scrape fallback and cache write
+    results = await asyncio.gather(*(
+        _fetch_flights.do((platform, handle.lower()), partial(_resolve_platform, platform, handle, semaphore))
+        for platform, handle in handles_by_platform.items()
+    ), return_exceptions=True)
+
+    platform_results = {}
+    failed_platforms = []
+    for platform, result in zip(platform_names, results):
         if isinstance(result, Exception):
-            logger.error(f"Error fetching data from {platform} for handle '{handle}': {result}")
-            # Try Gemini scraping as fallback
-            logger.info(f"Attempting Gemini scraping for {platform}/{handle}")
-            try:
-                gemini_result = await scrape_profile(platform, handle)
-                if gemini_result and gemini_result.get("stats"):
-                    logger.info(f"Gemini scraping successful for {platform}/{handle}")
-                    all_stats[platform] = gemini_result.get("stats", {})
-                else:
-                    logger.warning(f"Gemini scraping returned no stats for {platform}/{handle}")
-            except Exception as gemini_error:
-                logger.error(f"Gemini scraping also failed for {platform}/{handle}: {gemini_error}")
-            continue
+            logger.error(f"Resolving {platform} for handle '{handles_by_platform[platform]}' failed: {result}")
+            result = {"activities": [], "stats": {}}
+        if not result["activities"] and not result["stats"]:
+            failed_platforms.append(platform)
+        platform_results[platform] = result
+
+    total_activities = sum(len(r["activities"]) for r in platform_results.values())
+    logger.info(f"Total activities fetched: {total_activities} from "
+                f"{len(platform_names) - len(failed_platforms)} platforms")
+    if failed_platforms:
+        logger.warning(f"Failed to fetch data from platforms: {failed_platforms}")
 
+    return platform_results
+
+
+async def _resolve_platform(platform: str, handle: str, semaphore: asyncio.Semaphore) -> dict:
+    """
+    Fetch one platform, scrape its stats if the API gave none, and cache the result.
+
+    Args:
+        platform: Platform name
+        handle: User handle
+        semaphore: Shared cap on concurrent Gemini scrapes
+
+    Returns:
+        {"activities": [...], "stats": {...}}
+    """
+    activities = []
+    stats = {}
+    needs_scrape = False
+
+    try:
+        result = await PLATFORM_FETCHERS[platform](handle)
+    except RateLimitExceeded as e:
+        # Scraping would only add load while the limiter says back off; serve what the cache has
+        logger.warning(f"{platform}/{handle} is rate limited ({e}); skipping the scrape fallback")
+        metrics_collector.increment("fetch.rate_limited")
+        entry = await get_cached_profile(platform, handle)
+        return entry.value if entry is not None else {"activities": [], "stats": {}}
+    except Exception as e:
+        logger.error(f"Error fetching data from {platform} for handle '{handle}': {e}")
+        needs_scrape = True
+    else:
         if result:
             # Check if result is the new dict structure or old list structure
             if isinstance(result, dict) and "activities" in result:
                 activities = result.get("activities", [])
                 stats = result.get("stats", {})
 
-                all_activities.extend(activities)
                 if stats:
-                    all_stats[platform] = stats
                     logger.info(f"Added {len(activities)} activities and stats from {platform} (handle: {handle})")
                 else:
                     # No stats from API, try Gemini scraping
-                    logger.info(f"No stats from API for {platform}/{handle}, trying Gemini scraping")
-                    try:
-                        gemini_result = await scrape_profile(platform, handle)
-                        if gemini_result and gemini_result.get("stats"):
-                            all_stats[platform] = gemini_result.get("stats", {})
-                            logger.info(f"Gemini scraping provided stats for {platform}/{handle}")
-                    except Exception as gemini_error:
-                        logger.error(f"Gemini scraping failed for {platform}/{handle}: {gemini_error}")
+                    logger.info(f"No stats from API for {platform}/{handle}, will try Gemini scraping")
                     logger.info(f"Added {len(activities)} activities from {platform} (handle: {handle})")
+                    needs_scrape = True
             elif isinstance(result, list):
                 # Legacy support for fetchers returning just a list
-                all_activities.extend(result)
+                activities = result
                 logger.info(f"Added {len(result)} activities from {platform} (handle: {handle})")
             else:
                 logger.warning(f"Unexpected data format from {platform} for handle '{handle}'")
         else:
             logger.warning(f"No data returned from {platform} for handle '{handle}'")
-            # Try Gemini scraping as fallback
-            logger.info(f"Attempting Gemini scraping for {platform}/{handle}")
-            try:
-                gemini_result = await scrape_profile(platform, handle)
-                if gemini_result and gemini_result.get("stats"):
-                    all_stats[platform] = gemini_result.get("stats", {})
-                    logger.info(f"Gemini scraping successful for {platform}/{handle}")
-                else:
-                    logger.warning(f"Gemini scraping returned no data for {platform}/{handle}")
-            except Exception as gemini_error:
-                logger.error(f"Gemini scraping also failed for {platform}/{handle}: {gemini_error}")
+            needs_scrape = True
 
-    successful_platforms = [r for r in results if not isinstance(r, Exception) and r]
-    failed_platforms = [platform_names[i] for i, r in enumerate(results) if isinstance(r, Exception) or not r]
+        # Don't scrape the same profile page twice
+        if platform in SCRAPING_FETCHERS:
+            needs_scrape = False
 
-    logger.info(f"Total activities fetched: {len(all_activities)} from {len(successful_platforms)} platforms")
-    if failed_platforms:
-        logger.warning(f"Failed to fetch data from platforms: {failed_platforms}")
+    # Fallback stage: scrape the profile page when the API gave no stats
+    if needs_scrape:
+        scraped = await _scrape_missing_stats({platform: handle}, semaphore)
+        stats = scraped.get(platform, stats)
 
-    return {
-        "activities": all_activities,
-        "stats": all_stats
+    resolved = {"activities": activities, "stats": stats}
+    await set_cached_profile(platform, handle, resolved)
+    return resolved
+
+
+async def _scrape_missing_stats(handles_by_platform: dict, semaphore: Optional[asyncio.Semaphore] = None) -> dict:
+    """
+    Run Gemini scraping fallbacks for several platforms concurrently.
+
+    All scrapes share one deadline and a concurrency cap, so the stage costs
+    about one scrape round-trip regardless of how many platforms failed.
+
+    Args:
+        handles_by_platform: {platform: handle} needing stats
+        semaphore: Concurrency cap to share with other scrapes (default: a new
+                   one of SCRAPE_CONCURRENCY slots)
+
+    Returns:
+        Dict of platform -> stats for the scrapes that succeeded in time
+    """
+    semaphore = semaphore or asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+    async def scrape(platform: str, handle: str):
+        async with semaphore:
+            logger.info(f"Attempting Gemini scraping for {platform}/{handle}")
+            return await scrape_profile(platform, handle)
+
+    tasks = {
+        asyncio.ensure_future(scrape(platform, handle)): platform
+        for platform, handle in handles_by_platform.items()
     }
+    done, pending = await asyncio.wait(tasks, timeout=SCRAPE_DEADLINE)
+
+    for task in pending:
+        logger.warning(f"Gemini scraping for {tasks[task]}/{handles_by_platform[tasks[task]]} missed the {SCRAPE_DEADLINE}s deadline")
+        task.cancel()
+
+    scraped = {}
+    for task in done:
+        platform = tasks[task]
+        handle = handles_by_platform[platform]
+        if task.exception() is not None:
+            logger.error(f"Gemini scraping also failed for {platform}/{handle}: {task.exception()}")
+            continue
+        gemini_result = task.result()
+        if gemini_result and gemini_result.get("stats"):
+            logger.info(f"Gemini scraping successful for {platform}/{handle}")
+            scraped[platform] = gemini_result.get("stats", {})
+        else:
+            logger.warning(f"Gemini scraping returned no stats for {platform}/{handle}")
+
+    return scraped
@@ -0,0 +1,62 @@
+"""
+Content-addressed cache for Gemini profile extraction results.
+
+Entries are keyed by a hash of the platform, the username, the extraction
+prompt version and the reduced page text, so an unchanged profile page never
+reaches the LLM twice and a prompt change simply stops matching the old
+entries. The username is part of the key because it is part of the prompt:
+two users with identical pages (e.g. the same "user not found" page) must
+not share an extraction.
+"""
+import hashlib
+import os
+import logging
+from typing import Dict, Optional
+
+from libs.cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed entries never go stale; the TTL and row cap only bound the
+# disk tier, since pages that changed are never looked up again
+EXTRACTION_CACHE_TTL = float(os.getenv("EXTRACTION_CACHE_TTL", str(30 * 24 * 3600)))
+EXTRACTION_CACHE_MAX_ROWS = int(os.getenv("EXTRACTION_CACHE_MAX_ROWS", "20000"))
+
+_cache: Optional[TieredCache] = None
+
+
+def _get_cache() -> TieredCache:
+    global _cache
+    if _cache is None:
+        _cache = TieredCache(
+            "gemini_extraction",
+            max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "512")),
+            default_ttl=EXTRACTION_CACHE_TTL,
+            max_stale=0,
+            max_disk_entries=EXTRACTION_CACHE_MAX_ROWS
+        )
+    return _cache
+
+
+def extraction_key(platform: str, username: str, prompt_version: str, reduced_content: str) -> str:
+    """Hash of everything that determines an extraction result."""
+    digest = hashlib.sha256()
+    for part in (platform, username.lower(), prompt_version, reduced_content):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def get_cached_extraction(platform: str, username: str, prompt_version: str,
+                                reduced_content: str) -> Optional[Dict]:
+    """Get cached extracted stats for this user's page content, or None on a miss."""
+    entry = await _get_cache().aget(extraction_key(platform, username, prompt_version, reduced_content))
+    return entry.value if entry is not None else None
+
+
+async def set_cached_extraction(platform: str, username: str, prompt_version: str, reduced_content: str,
+                                stats: Dict):
+    """Cache extracted stats. Empty results (failed extractions) are not cached."""
+    if not stats:
+        return
+    await _get_cache().aset(extraction_key(platform, username, prompt_version, reduced_content), stats)
@@ -1,12 +1,19 @@
 """
 Gemini-based profile scraper for coding platforms.
-Fetches profile pages and uses Gemini AI to extract statistics.
+Fetches profile pages, parses them with deterministic extractors, and uses
+Gemini AI to extract statistics only when those rules find too little.
 """
 import aiohttp
+import hashlib
 import logging
 import os
 import json
 from typing import Dict, Optional
+from .http_client import get_http_session
+from .extraction_cache import get_cached_extraction, set_cached_extraction
+from .html_reducer import reduce_html
+from .profile_extractors import extract_profile_stats
+from .rate_limiter import governed
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +21,9 @@ logger = logging.getLogger(__name__)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
 
+# Below this fraction of key fields found, fall back to Gemini extraction
+DETERMINISTIC_MIN_CONFIDENCE = float(os.getenv("DETERMINISTIC_MIN_CONFIDENCE", "0.6"))
+
 # Profile URL templates
 PROFILE_URLS = {
     "leetcode": "https://leetcode.com/{username}/",
@@ -23,46 +33,18 @@ PROFILE_URLS = {
     "hackerrank": "https://www.hackerrank.com/profile/{username}"
 }
 
-# Timeout configuration
-FETCH_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
-
-
-async def fetch_page_html(url: str) -> Optional[str]:
-    """Fetch HTML content from a URL."""
-    try:
-        async with aiohttp.ClientSession(timeout=FETCH_TIMEOUT) as session:
-            async with session.get(url, headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    logger.warning(f"Failed to fetch {url}: status {response.status}")
-                    return None
-    except Exception as e:
-        logger.error(f"Error fetching {url}: {e}")
-        return None
-
-
-async def extract_stats_with_gemini(platform: str, username: str, html_content: str) -> Dict:
-    """
-    Use Gemini AI to extract statistics from profile HTML.
-
-    Args:
-        platform: Platform name (leetcode, codeforces, etc.)
-        username: Username
-        html_content: HTML content of profile page
-
-    Returns:
-        Dict with extracted stats
-    """
-    if not GEMINI_API_KEY:
-        logger.error("GEMINI_API_KEY not set in environment")
-        return {}
+# class/id substrings marking the stat regions of each profile page above
+PROFILE_REGIONS = {
+    "leetcode": ["profile", "ranking", "solved", "submission", "badge"],
+    "codeforces": ["info", "userActivityFrame_counter", "userbox"],
+    "codechef": ["rating-number", "rating-star", "rating-ranks", "rating-header", "problems-solved", "user-details"],
+    "atcoder": ["dl-table"],
+    "hackerrank": ["profile-heading", "hacker-badge", "badge-title", "certificate", "score"]
+}
 
-    # Create platform-specific prompt
-    prompts = {
-        "leetcode": """Extract the following from this LeetCode profile:
+# Platform-specific fields to extract
+EXTRACTION_PROMPTS = {
+    "leetcode": """Extract the following from this LeetCode profile:
 - total_solved: total problems solved
 - easy_solved: easy problems solved
 - medium_solved: medium problems solved
@@ -71,7 +53,7 @@ async def extract_stats_with_gemini(platform: str, username: str, html_content:
 - reputation: reputation points
 - acceptance_rate: acceptance rate percentage""",
 
-        "codeforces": """Extract the following from this CodeForces profile:
+    "codeforces": """Extract the following from this CodeForces profile:
 - rating: current rating
 - max_rating: maximum rating achieved
 - rank: current rank (e.g., "Expert", "Candidate Master")
@@ -79,42 +61,99 @@ async def extract_stats_with_gemini(platform: str, username: str, html_content:
 - contribution: contribution points
 - total_solved: total problems solved (if visible)""",
 
-        "codechef": """Extract the following from this CodeChef profile:
+    "codechef": """Extract the following from this CodeChef profile:
 - rating: current rating
 - stars: star rating (e.g., "4★", "5★")
 - global_rank: global rank
 - country_rank: country rank
 - total_solved: total problems solved (if visible)""",
 
-        "atcoder": """Extract the following from this AtCoder profile:
+    "atcoder": """Extract the following from this AtCoder profile:
 - rating: current rating
 - highest_rating: highest rating achieved
 - rank: rank/color (e.g., "cyan", "blue")
 - total_solved: total problems solved (if visible)""",
 
-        "hackerrank": """Extract the following from this HackerRank profile:
+    "hackerrank": """Extract the following from this HackerRank profile:
 - total_score: total score/points
 - badges: number of badges
 - certificates: number of certificates
 - tracks: list of track names and scores"""
-    }
-
-    platform_prompt = prompts.get(platform, "Extract all visible statistics")
+}
 
-    prompt = f"""You are a data extraction assistant. Analyze this {platform} profile page HTML and extract user statistics.
+EXTRACTION_PROMPT_TEMPLATE = """You are a data extraction assistant. Analyze this {platform} profile page content and extract user statistics.
 
 Username: {username}
 
 {platform_prompt}
 
-HTML Content (first 50000 chars):
-{html_content[:50000]}
+Profile Content (reduced page text):
+{reduced_content}
 
 Return ONLY a valid JSON object with the extracted data. Use 0 or null for fields that are not visible.
 Example format: {{"total_solved": 150, "rating": 1500, "rank": "Expert"}}
 
 JSON:"""
 
+# Changes whenever the prompts or model change, invalidating cached extractions
+PROMPT_VERSION = hashlib.sha256(json.dumps(
+    [GEMINI_MODEL, EXTRACTION_PROMPT_TEMPLATE, EXTRACTION_PROMPTS], sort_keys=True
+).encode("utf-8")).hexdigest()[:16]
+
+# Timeout configuration
+FETCH_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+
+
+async def fetch_page_html(url: str) -> Optional[str]:
+    """Fetch HTML content from a URL."""
+    try:
+        session = get_http_session()
+        async with governed(url), session.get(url, timeout=FETCH_TIMEOUT, headers={
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }) as response:
+            if response.status == 200:
+                return await response.text()
+            else:
+                logger.warning(f"Failed to fetch {url}: status {response.status}")
+                return None
+    except Exception as e:
+        logger.error(f"Error fetching {url}: {e}")
+        return None
+
+
+async def extract_stats_with_gemini(platform: str, username: str, html_content: str) -> Dict:
+    """
+    Use Gemini AI to extract statistics from profile HTML.
+
+    Args:
+        platform: Platform name (leetcode, codeforces, etc.)
+        username: Username
+        html_content: HTML content of profile page
+
+    Returns:
+        Dict with extracted stats
+    """
+    # Strip markup and keep only the stat regions before prompting
+    reduced_content = reduce_html(html_content, PROFILE_REGIONS.get(platform))
+    logger.info(f"Reduced {platform} profile HTML from {len(html_content)} to {len(reduced_content)} chars")
+
+    # An unchanged page under the same prompt gives the same answer
+    cached = await get_cached_extraction(platform, username, PROMPT_VERSION, reduced_content)
+    if cached is not None:
+        logger.info(f"Using cached Gemini extraction for {platform}/{username}")
+        return cached
+
+    if not GEMINI_API_KEY:
+        logger.error("GEMINI_API_KEY not set in environment")
+        return {}
+
+    prompt = EXTRACTION_PROMPT_TEMPLATE.format(
+        platform=platform,
+        username=username,
+        platform_prompt=EXTRACTION_PROMPTS.get(platform, "Extract all visible statistics"),
+        reduced_content=reduced_content
+    )
+
     try:
         # Call Gemini API
         url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
@@ -129,35 +168,37 @@ JSON:"""
             }
         }
 
-        async with aiohttp.ClientSession(timeout=FETCH_TIMEOUT) as session:
-            async with session.post(url, json=payload) as response:
-                if response.status != 200:
-                    logger.error(f"Gemini API error: {response.status}")
-                    return {}
-
-                result = await response.json()
-
-                # Extract text from response
-                if "candidates" in result and len(result["candidates"]) > 0:
-                    text = result["candidates"][0]["content"]["parts"][0]["text"]
-
-                    # Parse JSON from response
-                    # Remove markdown code blocks if present
-                    text = text.strip()
-                    if text.startswith("```json"):
-                        text = text[7:]
-                    if text.startswith("```"):
-                        text = text[3:]
-                    if text.endswith("```"):
-                        text = text[:-3]
-                    text = text.strip()
-
-                    stats = json.loads(text)
-                    logger.info(f"Gemini extracted stats for {platform}/{username}: {stats}")
-                    return stats
-                else:
-                    logger.error(f"No candidates in Gemini response")
-                    return {}
+        session = get_http_session()
+        async with governed(url), session.post(url, json=payload, timeout=FETCH_TIMEOUT) as response:
+            if response.status != 200:
+                logger.error(f"Gemini API error: {response.status}")
+                return {}
+
+            result = await response.json()
+
+            # Extract text from response
+            if "candidates" in result and len(result["candidates"]) > 0:
+                text = result["candidates"][0]["content"]["parts"][0]["text"]
+
+                # Parse JSON from response
+                # Remove markdown code blocks if present
+                text = text.strip()
+                if text.startswith("```json"):
+                    text = text[7:]
+                if text.startswith("```"):
+                    text = text[3:]
+                if text.endswith("```"):
+                    text = text[:-3]
+                text = text.strip()
+
+                stats = json.loads(text)
+                logger.info(f"Gemini extracted stats for {platform}/{username}: {stats}")
+                if isinstance(stats, dict):
+                    await set_cached_extraction(platform, username, PROMPT_VERSION, reduced_content, stats)
+                return stats
+            else:
+                logger.error(f"No candidates in Gemini response")
+                return {}
 
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse Gemini response as JSON: {e}")
@@ -170,7 +211,7 @@ JSON:"""
 
 async def scrape_profile(platform: str, username: str) -> Dict:
     """
-    Scrape a user's profile using Gemini AI.
+    Scrape a user's profile page, using Gemini AI only when needed.
 
     Args:
         platform: Platform name (leetcode, codeforces, etc.)
@@ -198,8 +239,15 @@ async def scrape_profile(platform: str, username: str) -> Dict:
 
     logger.info(f"Fetched {len(html_content)} chars of HTML for {platform}/{username}")
 
-    # Extract stats with Gemini
-    stats = await extract_stats_with_gemini(platform, username, html_content)
+    # Parse the page with rules first; the LLM is the last resort
+    stats, confidence = extract_profile_stats(platform, html_content)
+    if confidence >= DETERMINISTIC_MIN_CONFIDENCE:
+        logger.info(f"Deterministic extraction for {platform}/{username} (confidence {confidence:.2f}): {stats}")
+    else:
+        logger.info(f"Deterministic extraction confidence {confidence:.2f} for {platform}/{username}, using Gemini")
+        gemini_stats = await extract_stats_with_gemini(platform, username, html_content)
+        # Fields the rules did find are more reliable than the LLM's
+        stats = {**gemini_stats, **stats} if isinstance(gemini_stats, dict) else stats
 
     # Return in standard format
     # Note: We don't extract activities from profile pages, only stats
@@ -0,0 +1,161 @@
+"""
+HTML pre-reduction for LLM profile extraction.
+
+Streams profile HTML through the stdlib parser, dropping scripts, styles,
+navigation and all attributes, collapsing whitespace, and keeping only the
+text of platform-specific stat regions when they can be found.
+"""
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional
+
+# Elements whose content never carries profile stats
+SKIP_TAGS = {"script", "style", "noscript", "svg", "iframe", "template", "nav", "footer", "head", "form", "select"}
+
+# Elements without closing tags
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Elements that end a line of text
+BLOCK_TAGS = {"p", "div", "li", "tr", "table", "section", "article", "ul", "ol", "dl", "dt", "dd",
+              "h1", "h2", "h3", "h4", "h5", "h6", "br", "header", "main", "aside"}
+
+# Reduced output cap (characters)
+MAX_REDUCED_CHARS = 8000
+
+# Characters fed to the parser per step
+FEED_CHUNK_SIZE = 16 * 1024
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class HtmlReducer(HTMLParser):
+    """
+    Incremental HTML-to-text reducer.
+
+    Feed chunks with feed(); call text() when done. Text inside elements
+    whose class or id contains one of the region markers is collected
+    separately so callers can send only the stat regions.
+    """
+
+    def __init__(self, region_markers: Optional[Iterable[str]] = None, max_chars: int = MAX_REDUCED_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.region_markers = [m.lower() for m in (region_markers or [])]
+        self.max_chars = max_chars
+
+        self._stack: List[str] = []
+        self._skip_depth = 0
+        self._region_depths: List[int] = []
+
+        self._page_lines: List[str] = []
+        self._page_chars = 0
+        self._region_lines: List[str] = []
+        self._region_chars = 0
+        self._line: List[str] = []
+        self._text_run: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text_run()
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._end_line()
+            return
+
+        # <body> implicitly closes an unterminated <head>
+        if tag == "body" and "head" in self._stack:
+            self.handle_endtag("head")
+
+        self._stack.append(tag)
+        if self._skip_depth or tag in SKIP_TAGS:
+            self._skip_depth += 1
+            return
+
+        if tag in BLOCK_TAGS:
+            self._end_line()
+
+        if self.region_markers:
+            names = " ".join(value for name, value in attrs if name in ("class", "id") and value).lower()
+            if names and any(marker in names for marker in self.region_markers):
+                self._region_depths.append(len(self._stack))
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_text_run()
+        if tag == "br":
+            self._end_line()
+
+    def handle_endtag(self, tag):
+        self._flush_text_run()
+        if tag in VOID_TAGS or tag not in self._stack:
+            return
+
+        # Pop up to the matching tag, tolerating unclosed children
+        while self._stack:
+            popped = self._stack.pop()
+            if self._skip_depth:
+                self._skip_depth -= 1
+            else:
+                leaving_region = bool(self._region_depths) and self._region_depths[-1] > len(self._stack)
+                if popped in BLOCK_TAGS or leaving_region:
+                    self._end_line()
+                while self._region_depths and self._region_depths[-1] > len(self._stack):
+                    self._region_depths.pop()
+            if popped == tag:
+                break
+
+    def handle_data(self, data):
+        # A text run may arrive in pieces split across feed() calls
+        if not self._skip_depth:
+            self._text_run.append(data)
+
+    def _flush_text_run(self):
+        if not self._text_run:
+            return
+        text = _WHITESPACE_RE.sub(" ", "".join(self._text_run)).strip()
+        self._text_run = []
+        if text:
+            self._line.append(text)
+
+    def _end_line(self):
+        if not self._line:
+            return
+        line = " ".join(self._line)
+        self._line = []
+
+        if self._page_chars < self.max_chars:
+            self._page_lines.append(line)
+            self._page_chars += len(line) + 1
+        if self._region_depths and self._region_chars < self.max_chars:
+            self._region_lines.append(line)
+            self._region_chars += len(line) + 1
+
+    def text(self) -> str:
+        """Reduced text: stat regions if any were found, otherwise the whole page."""
+        self.close()
+        self._flush_text_run()
+        self._end_line()
+        lines = self._region_lines if self._region_lines else self._page_lines
+
+        # Drop consecutive duplicates (repeated labels, responsive copies)
+        deduped = []
+        for line in lines:
+            if not deduped or deduped[-1] != line:
+                deduped.append(line)
+        return "\n".join(deduped)[:self.max_chars]
+
+
+def reduce_html(html_content: str, region_markers: Optional[Iterable[str]] = None,
+                max_chars: int = MAX_REDUCED_CHARS) -> str:
+    """
+    Reduce profile HTML to compact text for an LLM prompt.
+
+    Args:
+        html_content: Raw HTML
+        region_markers: class/id substrings marking stat regions
+        max_chars: Maximum length of the reduced text
+
+    Returns:
+        Reduced plain text
+    """
+    reducer = HtmlReducer(region_markers, max_chars)
+    for start in range(0, len(html_content), FEED_CHUNK_SIZE):
+        reducer.feed(html_content[start:start + FEED_CHUNK_SIZE])
+    return reducer.text()
@@ -0,0 +1,87 @@
+"""
+Shared HTTP client for all platform fetchers and the Gemini scraper.
+
+A single pooled aiohttp.ClientSession is created in the FastAPI lifespan and
+reused by every outbound request, so repeated fetches to the same hosts keep
+their TCP/TLS connections alive instead of paying fresh handshakes per call.
+"""
+import aiohttp
+import asyncio
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Connection pool configuration
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+
+# Default timeout; individual requests may override it
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _create_session() -> aiohttp.ClientSession:
+    """Create a pooled ClientSession bound to the running event loop."""
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        use_dns_cache=True,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=DEFAULT_TIMEOUT)
+
+
+async def init_http_session() -> aiohttp.ClientSession:
+    """
+    Create the shared session. Called once from the FastAPI lifespan.
+
+    Returns:
+        The shared ClientSession
+    """
+    global _session, _session_loop
+    if _session is None or _session.closed:
+        _session = _create_session()
+        _session_loop = asyncio.get_running_loop()
+        logger.info(
+            f"HTTP client initialized (limit={HTTP_POOL_LIMIT}, per_host={HTTP_POOL_LIMIT_PER_HOST}, "
+            f"keepalive={HTTP_KEEPALIVE_TIMEOUT}s, dns_ttl={HTTP_DNS_CACHE_TTL}s)"
+        )
+    return _session
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Get the shared session for outbound requests.
+
+    Outside the app lifespan (scripts, tests using asyncio.run) the session is
+    created lazily; a session left over from a previous event loop is replaced.
+
+    Returns:
+        The shared ClientSession
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = _create_session()
+        _session_loop = loop
+        logger.info("HTTP client lazily initialized outside app lifespan")
+    return _session
+
+
+async def close_http_session():
+    """Close the shared session and release pooled connections."""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+        # Give the SSL transports a moment to shut down cleanly
+        await asyncio.sleep(0.25)
+        logger.info("HTTP client closed")
+    _session = None
+    _session_loop = None
@@ -0,0 +1,101 @@
+"""
+Incremental JSON decoding for large API responses.
+
+Decodes a top-level JSON array element by element straight from the response
+body, so only the current chunk and one element are held in memory at a time.
+"""
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# What may follow a complete scalar element
+_DELIMITERS = ",]" + _WHITESPACE
+# Characters that can continue a number cut at the end of the buffer
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+# Bytes read from the body per step
+CHUNK_SIZE = 64 * 1024
+
+
+async def iter_json_array(stream, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[Any]:
+    """
+    Yield the elements of a JSON array read from an async byte stream.
+
+    Args:
+        stream: Object with an async ``read(n)`` method (e.g. aiohttp
+                ``response.content``)
+        chunk_size: Number of bytes to read per step
+
+    Yields:
+        Decoded array elements in order
+
+    Raises:
+        ValueError: If the body is not a well-formed JSON array
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    # "[" before the array, "first" right after it, "value" after a comma,
+    # "separator" after an element
+    expect = "["
+    finished = False
+    eof = False
+
+    while not finished:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expect == "[":
+                if char != "[":
+                    raise ValueError("Expected JSON array")
+                expect = "first"
+                pos += 1
+                continue
+            if expect == "separator":
+                if char == ",":
+                    expect = "value"
+                    pos += 1
+                    continue
+                if char == "]":
+                    finished = True
+                    continue
+                raise ValueError(f"Expected ',' or ']' at array position {pos}")
+            if char == "]":
+                if expect == "value":
+                    raise ValueError("Trailing comma in JSON array")
+                finished = True
+                continue
+            if char == ",":
+                raise ValueError("Missing JSON array element")
+
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Element is split across chunks; read more unless at EOF
+                if eof:
+                    raise ValueError("Truncated JSON array")
+            else:
+                # Strings, objects and arrays end with their own delimiter. A number or
+                # literal is only complete once a delimiter follows it: "-3." or "1e" at
+                # the end of the buffer may continue in the next chunk.
+                if (isinstance(value, (dict, list, str))
+                        or (end < len(buffer) and buffer[end] in _DELIMITERS)):
+                    pos = end
+                    expect = "separator"
+                    yield value
+                    continue
+                if not set(buffer[end:]) <= _NUMBER_CHARS:
+                    raise ValueError(f"Malformed JSON array element at position {pos}")
+
+        if eof:
+            raise ValueError("Truncated JSON array")
+
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
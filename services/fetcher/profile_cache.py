@@ -0,0 +1,69 @@
+"""
+Response cache for per-platform profile data.
+
+Holds the resolved {"activities", "stats"} result of each (platform, handle)
+fetch with a per-platform TTL. Stale entries are still served while a
+background refresh replaces them.
+"""
+import os
+import logging
+from typing import Dict, Optional
+
+from libs.cache import CacheEntry, TieredCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached profile counts as fresh, per platform
+PLATFORM_TTLS = {
+    "codeforces": 600,
+    "leetcode": 900,
+    "hackerrank": 3600,
+    "codechef": 1800,
+    "atcoder": 1800,  # Kenkoooo already lags 15-30 minutes
+}
+DEFAULT_TTL = 900
+
+# How long past its TTL a profile may still be served while refreshing
+MAX_STALE_SECONDS = int(os.getenv("PROFILE_CACHE_MAX_STALE", str(24 * 3600)))
+
+_cache: Optional[TieredCache] = None
+
+
+def platform_ttl(platform: str) -> int:
+    """TTL for a platform; overridable with PROFILE_CACHE_TTL_<PLATFORM>."""
+    override = os.getenv(f"PROFILE_CACHE_TTL_{platform.upper()}")
+    if override:
+        return int(override)
+    return PLATFORM_TTLS.get(platform, DEFAULT_TTL)
+
+
+def _get_cache() -> TieredCache:
+    global _cache
+    if _cache is None:
+        _cache = TieredCache(
+            "profile",
+            max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "2048")),
+            max_stale=MAX_STALE_SECONDS
+        )
+    return _cache
+
+
+def _key(platform: str, handle: str) -> str:
+    return f"{platform}:{handle.strip().lower()}"
+
+
+async def get_cached_profile(platform: str, handle: str) -> Optional[CacheEntry]:
+    """Get a cached profile result, fresh or stale, or None on a miss."""
+    return await _get_cache().aget(_key(platform, handle), allow_stale=True)
+
+
+async def set_cached_profile(platform: str, handle: str, result: Dict):
+    """Cache a resolved profile result. Empty results are not cached."""
+    if not result or (not result.get("activities") and not result.get("stats")):
+        return
+    await _get_cache().aset(_key(platform, handle), result, ttl=platform_ttl(platform))
+
+
+async def invalidate_cached_profile(platform: str, handle: str):
+    """Drop a cached profile so the next fetch goes upstream."""
+    await _get_cache().adelete(_key(platform, handle))
@@ -0,0 +1,189 @@
+"""
+Deterministic profile page extractors.
+
+Parse ratings, ranks and solved counts straight from profile HTML (page
+text, known markup and embedded JSON) so the Gemini extraction only runs
+when these rules cannot find enough fields.
+"""
+import html
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .html_reducer import reduce_html
+
+logger = logging.getLogger(__name__)
+
+# Page text can be long; extractors need all of it
+PAGE_TEXT_LIMIT = 500_000
+
+# AtCoder rating colors, by lower bound
+ATCODER_COLORS = [
+    (2800, "red"), (2400, "orange"), (2000, "yellow"), (1600, "blue"),
+    (1200, "cyan"), (800, "green"), (400, "brown"), (0, "gray"),
+]
+
+
+def _to_int(value: Optional[str]) -> Optional[int]:
+    """Parse '1,234', '1 234' or '+5' into an int."""
+    if value is None:
+        return None
+    digits = re.sub(r"[,\s]", "", value)
+    try:
+        return int(digits)
+    except ValueError:
+        return None
+
+
+def _search(pattern: str, text: str, flags: int = re.IGNORECASE) -> Optional[str]:
+    match = re.search(pattern, text, flags)
+    return match.group(1) if match else None
+
+
+def _confidence(stats: Dict, expected: Iterable[str]) -> float:
+    """Fraction of expected fields that were found."""
+    expected = list(expected)
+    found = sum(1 for key in expected if stats.get(key) not in (None, ""))
+    return found / len(expected) if expected else 0.0
+
+
+def _find_key(obj: Any, key: str) -> Any:
+    """Depth-first search for the first value stored under key in nested JSON."""
+    if isinstance(obj, dict):
+        if key in obj:
+            return obj[key]
+        children = obj.values()
+    elif isinstance(obj, list):
+        children = obj
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+def extract_codechef(page: str) -> Tuple[Dict, float]:
+    """CodeChef: rating, stars, global/country rank and problems solved."""
+    text = reduce_html(page, max_chars=PAGE_TEXT_LIMIT)
+    stats = {}
+
+    rating = _search(r'class="rating-number"[^>]*>\s*(\d+)', page)
+    if rating is None:
+        # Rating history embedded in the Drupal settings blob
+        history = re.findall(r'"rating"\s*:\s*"?(\d+)"?', page)
+        rating = history[-1] if history else None
+    stats["rating"] = _to_int(rating)
+
+    star_block = _search(r'class="rating-star"[^>]*>(.*?)</div>', page, re.IGNORECASE | re.DOTALL)
+    if star_block:
+        star_count = html.unescape(star_block).count("★")
+        stats["stars"] = f"{star_count}★" if star_count else None
+    else:
+        stars = _search(r"(\d)\s*★", text)
+        stats["stars"] = f"{stars}★" if stars else None
+
+    stats["global_rank"] = _to_int(_search(r"([\d,]+)\s*Global Rank", text))
+    stats["country_rank"] = _to_int(_search(r"([\d,]+)\s*Country Rank", text))
+    stats["highest_rating"] = _to_int(_search(r"Highest Rating\s*(\d+)", text))
+    stats["total_solved"] = _to_int(_search(r"Total Problems Solved:?\s*([\d,]+)", text))
+
+    confidence = _confidence(stats, ["rating", "stars", "global_rank", "country_rank", "total_solved"])
+    return {k: v for k, v in stats.items() if v is not None}, confidence
+
+
+def extract_codeforces(page: str) -> Tuple[Dict, float]:
+    """Codeforces: rating, max rating, ranks, contribution and problems solved."""
+    text = reduce_html(page, max_chars=PAGE_TEXT_LIMIT)
+    stats = {}
+
+    rank = _search(r'class="user-rank"[^>]*>\s*<span[^>]*>\s*([^<]+?)\s*</span>', page)
+    stats["rank"] = html.unescape(rank).strip().lower() if rank else None
+
+    rating_match = re.search(r"Contest rating:\s*(\d+)\s*\(max\.\s*([^,]+?)\s*,\s*(\d+)\s*\)", text, re.IGNORECASE)
+    if rating_match:
+        stats["rating"] = int(rating_match.group(1))
+        stats["max_rank"] = rating_match.group(2).strip().lower()
+        stats["max_rating"] = int(rating_match.group(3))
+
+    stats["contribution"] = _to_int(_search(r"Contribution:\s*([+-]?\d+)", text))
+    stats["total_solved"] = _to_int(_search(r"([\d ,]+?)\s*problems?\s*solved for all time", text))
+
+    confidence = _confidence(stats, ["rating", "max_rating", "rank", "max_rank", "total_solved"])
+    return {k: v for k, v in stats.items() if v is not None}, confidence
+
+
+def extract_atcoder(page: str) -> Tuple[Dict, float]:
+    """AtCoder: rating, highest rating, rank and rating color."""
+    text = reduce_html(page, ["dl-table"], max_chars=PAGE_TEXT_LIMIT)
+    stats = {}
+
+    stats["rank"] = _to_int(_search(r"^Rank\s*([\d,]+)(?:st|nd|rd|th)?", text, re.IGNORECASE | re.MULTILINE))
+    stats["rating"] = _to_int(_search(r"^Rating\s*(\d+)", text, re.IGNORECASE | re.MULTILINE))
+    stats["highest_rating"] = _to_int(_search(r"^Highest Rating\s*(\d+)", text, re.IGNORECASE | re.MULTILINE))
+    stats["rated_matches"] = _to_int(_search(r"^Rated Matches\s*(\d+)", text, re.IGNORECASE | re.MULTILINE))
+
+    if stats["rating"] is not None:
+        stats["color"] = next(color for bound, color in ATCODER_COLORS if stats["rating"] >= bound)
+
+    confidence = _confidence(stats, ["rating", "highest_rating", "rank"])
+    return {k: v for k, v in stats.items() if v is not None}, confidence
+
+
+def extract_leetcode(page: str) -> Tuple[Dict, float]:
+    """LeetCode: solved counts, ranking and reputation from the embedded Next.js data."""
+    blob = _search(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', page, re.IGNORECASE | re.DOTALL)
+    if not blob:
+        return {}, 0.0
+    try:
+        data = json.loads(blob)
+    except json.JSONDecodeError:
+        logger.warning("LeetCode profile has malformed __NEXT_DATA__")
+        return {}, 0.0
+
+    stats = {}
+    for entry in _find_key(data, "acSubmissionNum") or []:
+        key = {"All": "total_solved", "Easy": "easy_solved", "Medium": "medium_solved", "Hard": "hard_solved"}.get(
+            str(entry.get("difficulty", "")).strip())
+        if key:
+            stats[key] = entry.get("count")
+
+    profile = _find_key(data, "profile") or {}
+    if isinstance(profile, dict):
+        stats["ranking"] = profile.get("ranking")
+        stats["reputation"] = profile.get("reputation")
+
+    confidence = _confidence(stats, ["total_solved", "easy_solved", "medium_solved", "hard_solved", "ranking"])
+    return {k: v for k, v in stats.items() if v is not None}, confidence
+
+
+EXTRACTORS: Dict[str, Callable[[str], Tuple[Dict, float]]] = {
+    "codechef": extract_codechef,
+    "codeforces": extract_codeforces,
+    "atcoder": extract_atcoder,
+    "leetcode": extract_leetcode,
+}
+
+
+def extract_profile_stats(platform: str, page: str) -> Tuple[Dict, float]:
+    """
+    Run the rule-based extractor for a platform.
+
+    Args:
+        platform: Platform name
+        page: Profile page HTML
+
+    Returns:
+        (stats, confidence) where confidence is the fraction of the
+        platform's key fields found; ({}, 0.0) if no extractor applies
+    """
+    extractor = EXTRACTORS.get(platform)
+    if extractor is None:
+        return {}, 0.0
+    try:
+        return extractor(page)
+    except Exception as e:
+        logger.error(f"Deterministic extraction failed for {platform}: {e}", exc_info=True)
+        return {}, 0.0
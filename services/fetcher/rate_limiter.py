@@ -0,0 +1,191 @@
+"""
+Per-host rate limiting and concurrency governor for outbound fetches.
+
+Each upstream host gets a token bucket (sustained rate + burst) and a cap on
+requests in flight. Callers queue for a slot up to a deadline instead of
+bursting into 429/503 responses; past it they get RateLimitExceeded, which
+callers should treat as "back off", not as an upstream failure.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from libs.observability import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# name: (requests per second, burst, max in flight)
+DEFAULT_LIMITS = {
+    "codeforces": (0.5, 2, 2),  # Codeforces asks for about 1 request per 2 seconds
+    "leetcode": (2.0, 4, 4),
+    "kenkoooo": (1.0, 2, 2),
+    "hackerrank": (2.0, 4, 4),
+    "codechef": (1.0, 2, 2),
+    "atcoder": (1.0, 2, 2),
+    "gemini": (5.0, 10, 8),
+}
+FALLBACK_LIMIT = (2.0, 4, 4)
+
+# Hosts mapped to the limit they share
+HOST_NAMES = {
+    "codeforces.com": "codeforces",
+    "leetcode.com": "leetcode",
+    "kenkoooo.com": "kenkoooo",
+    "www.hackerrank.com": "hackerrank",
+    "hackerrank.com": "hackerrank",
+    "www.codechef.com": "codechef",
+    "codechef.com": "codechef",
+    "atcoder.jp": "atcoder",
+    "generativelanguage.googleapis.com": "gemini",
+}
+
+# Longest a request may wait for a slot, and how many may wait at once
+DEFAULT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "20"))
+DEFAULT_MAX_QUEUE = int(os.getenv("RATE_LIMIT_MAX_QUEUE", "100"))
+
+
+class RateLimitExceeded(Exception):
+    """No request slot was granted before the deadline, or the wait queue was full."""
+
+
+def _configured_limit(name: str):
+    """Limit for a name; overridable with RATE_LIMIT_<NAME>="rate,burst,max_in_flight"."""
+    override = os.getenv(f"RATE_LIMIT_{name.upper()}")
+    if override:
+        try:
+            rate, burst, in_flight = override.split(",")
+            return float(rate), int(burst), int(in_flight)
+        except ValueError:
+            logger.error(f"Invalid RATE_LIMIT_{name.upper()}={override!r}, using default")
+    return DEFAULT_LIMITS.get(name, FALLBACK_LIMIT)
+
+
+class HostGovernor:
+    """Token bucket plus max-in-flight cap for one upstream host."""
+
+    def __init__(self, name: str, rate: float, burst: int, max_in_flight: int,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.waiting = 0
+        self.in_flight = 0
+
+        self._loop = None
+        self._semaphore = None
+        self._token_lock = None
+
+    def _bind_loop(self):
+        """(Re)create asyncio primitives for the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._token_lock = asyncio.Lock()
+            self.waiting = 0
+            self.in_flight = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    async def _take_token(self):
+        # The lock keeps token waiters in FIFO order
+        async with self._token_lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    async def _acquire(self):
+        await self._semaphore.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def _report(self):
+        metrics_collector.set_gauge(f"ratelimit.{self.name}.queue_depth", self.waiting)
+        metrics_collector.set_gauge(f"ratelimit.{self.name}.in_flight", self.in_flight)
+
+    @asynccontextmanager
+    async def slot(self, max_wait: Optional[float] = None):
+        """
+        Hold a request slot for the duration of the block.
+
+        Args:
+            max_wait: Seconds to wait for a slot (default RATE_LIMIT_MAX_WAIT)
+
+        Raises:
+            RateLimitExceeded: If no slot frees up before the deadline or the
+                               queue is full
+        """
+        self._bind_loop()
+        if self.waiting >= self.max_queue:
+            metrics_collector.increment(f"ratelimit.{self.name}.rejected")
+            raise RateLimitExceeded(f"{self.name} request queue full ({self.waiting} waiting)")
+
+        start = time.monotonic()
+        self.waiting += 1
+        self._report()
+        try:
+            await asyncio.wait_for(self._acquire(), timeout=max_wait if max_wait is not None else DEFAULT_MAX_WAIT)
+        except asyncio.TimeoutError:
+            metrics_collector.increment(f"ratelimit.{self.name}.rejected")
+            logger.warning(f"Rate limiter for {self.name}: no slot within deadline")
+            raise RateLimitExceeded(f"{self.name}: no request slot within deadline") from None
+        finally:
+            self.waiting -= 1
+
+        wait_time = time.monotonic() - start
+        metrics_collector.record_timing(f"ratelimit.{self.name}.wait", wait_time)
+        if wait_time > 1:
+            logger.info(f"Rate limiter for {self.name}: waited {wait_time:.2f}s for a slot")
+
+        self.in_flight += 1
+        self._report()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self._report()
+
+
+_governors: Dict[str, HostGovernor] = {}
+
+
+def get_governor(name: str) -> HostGovernor:
+    """Get the governor for a limit name, creating it on first use."""
+    governor = _governors.get(name)
+    if governor is None:
+        rate, burst, max_in_flight = _configured_limit(name)
+        governor = HostGovernor(name, rate, burst, max_in_flight)
+        _governors[name] = governor
+        logger.info(f"Rate limiter for {name}: {rate}/s, burst {burst}, max in flight {max_in_flight}")
+    return governor
+
+
+def governed(url: str, max_wait: Optional[float] = None):
+    """
+    Async context manager holding a rate-limited slot for the URL's host.
+
+    Usage:
+        async with governed(url):
+            async with session.get(url) as response:
+                ...
+    """
+    host = (urlparse(url).hostname or "").lower()
+    return get_governor(HOST_NAMES.get(host, host)).slot(max_wait)
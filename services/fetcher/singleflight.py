@@ -0,0 +1,65 @@
+"""
+Request coalescing for concurrent identical fetches.
+
+While a fetch for a key is in flight, further callers for the same key await
+the same task instead of issuing their own upstream request.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from libs.observability import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Shares one in-flight task between concurrent callers of the same key."""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for key, or join the call already in flight for key.
+
+        Args:
+            key: Identity of the call, e.g. (platform, handle)
+            fn: Zero-argument coroutine factory performing the call
+
+        Returns:
+            The shared result; exceptions propagate to every waiter
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+
+        if task is not None and not task.done():
+            self.coalesced += 1
+            metrics_collector.increment(f"{self.name}.coalesced")
+            logger.info(f"{self.name}: joined in-flight call for {key}")
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            metrics_collector.increment(f"{self.name}.executed")
+
+        metrics_collector.set_gauge(f"{self.name}.hit_rate", round(self.hit_rate, 4))
+
+        # Shield so one cancelled waiter does not cancel the shared call
+        return await asyncio.shield(task)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of calls served by joining an in-flight call."""
+        return self.coalesced / self.calls if self.calls else 0.0
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        """Drop a finished task so the next call starts a fresh fetch."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
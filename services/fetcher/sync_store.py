@@ -0,0 +1,147 @@
+"""
+Persistent sync state for incremental platform fetches.
+
+Keeps a per-(platform, handle) sync cursor and a local activity history so
+fetchers only download submissions newer than the ones already seen.
+"""
+import sqlite3
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lives next to the sessions DB
+SYNC_DB_PATH = os.getenv("SYNC_DB_PATH", "data/sync.db")
+
+
+class SyncStore:
+    """
+    SQLite-backed sync cursors and activity history.
+
+    Holds one connection (WAL, synchronous=NORMAL) guarded by a lock. The
+    methods block, so async fetchers call them through asyncio.to_thread.
+    """
+
+    def __init__(self, db_path: str = SYNC_DB_PATH):
+        self.db_path = db_path
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._init_db()
+        logger.info(f"Initialized sync store at {db_path}")
+
+    def _init_db(self):
+        """Initialize connection settings and database schema."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # History can be re-fetched from the platform, so skip the per-commit fsync
+            cursor.execute("PRAGMA synchronous=NORMAL")
+
+            # One cursor per platform/handle (e.g. last seen submission id)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sync_cursors (
+                    platform TEXT NOT NULL,
+                    handle TEXT NOT NULL,
+                    cursor INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (platform, handle)
+                )
+            """)
+
+            # Locally persisted activity history
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS activity_history (
+                    platform TEXT NOT NULL,
+                    handle TEXT NOT NULL,
+                    submission_id INTEGER NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    activity TEXT NOT NULL,
+                    PRIMARY KEY (platform, handle, submission_id)
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_activity_history_recent
+                ON activity_history (platform, handle, timestamp DESC)
+            """)
+
+            self._conn.commit()
+
+    def get_cursor(self, platform: str, handle: str) -> Optional[int]:
+        """Get the sync cursor for a handle, or None if never synced."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                SELECT cursor FROM sync_cursors WHERE platform = ? AND handle = ?
+            """, (platform, handle.lower()))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def merge_activities(self, platform: str, handle: str,
+                         rows: List[Tuple[int, int, Dict]], new_cursor: Optional[int] = None) -> int:
+        """
+        Merge new activity rows into the history and advance the cursor.
+
+        Args:
+            platform: Platform name
+            handle: User handle
+            rows: (submission_id, timestamp, activity) tuples
+            new_cursor: Cursor to store; never moves backwards
+
+        Returns:
+            Number of rows written
+        """
+        handle = handle.lower()
+        params = [(platform, handle, sid, ts, json.dumps(activity)) for sid, ts, activity in rows]
+
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            cursor.executemany("""
+                INSERT OR REPLACE INTO activity_history (platform, handle, submission_id, timestamp, activity)
+                VALUES (?, ?, ?, ?, ?)
+            """, params)
+
+            if new_cursor is not None:
+                cursor.execute("""
+                    INSERT INTO sync_cursors (platform, handle, cursor, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (platform, handle) DO UPDATE SET
+                        cursor = MAX(cursor, excluded.cursor),
+                        updated_at = excluded.updated_at
+                """, (platform, handle, new_cursor, time.time()))
+
+        return len(rows)
+
+    def recent_activities(self, platform: str, handle: str, limit: int = 100) -> List[Dict]:
+        """Get the most recent activities from the local history, newest first."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                SELECT activity FROM activity_history
+                WHERE platform = ? AND handle = ?
+                ORDER BY timestamp DESC, submission_id DESC
+                LIMIT ?
+            """, (platform, handle.lower(), limit))
+            rows = cursor.fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        """Close the connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_sync_store: Optional[SyncStore] = None
+
+
+def get_sync_store() -> SyncStore:
+    """Get the shared sync store, creating it on first use."""
+    global _sync_store
+    if _sync_store is None:
+        _sync_store = SyncStore()
+    return _sync_store
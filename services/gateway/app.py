@@ -1,20 +1,28 @@
 from fastapi import FastAPI, HTTPException, Response
 import fastapi
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Literal, Optional
+from contextlib import asynccontextmanager
 import asyncio
+import json
 import logging
 from services.fetcher.codeforces_fetcher import fetch_all
+from services.fetcher.http_client import init_http_session, close_http_session
 from services.preprocessor.preprocess import normalize_activities
+from services.preprocessor.fingerprint import STAGES, changed_stages, compute_fingerprint
 from services.coach.coach import CoachAgent
 from libs.memory.faiss_store import FaissStore
 from libs.sessions import PersistentSessionService
-from libs.observability import get_health_status, RequestTimer
+from libs.observability import get_health_status, metrics_collector, RequestTimer
+from services.gateway.job_queue import AnalysisJobQueue, QueueFullError
+from services.gateway.refresh_scheduler import RefreshScheduler, REFRESH_SCHEDULER_ENABLED
 import uvicorn
 import os
 import sys
+import time
 
 # Fix for Windows event loop
 if sys.platform == 'win32':
@@ -28,7 +36,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-app = FastAPI(title="AI Coding Coach", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create app-lifetime resources on startup and release them on shutdown."""
+    await init_http_session()
+    await job_queue.start()
+    if REFRESH_SCHEDULER_ENABLED:
+        refresh_scheduler.start()
+    yield
+    try:
+        await refresh_scheduler.stop()
+        await job_queue.stop()
+    finally:
+        # Always apply buffered session writes, even if stopping the workers failed
+        session_service.close()
+    await close_http_session()
+    shutdown_llm_client()
+
+
+app = FastAPI(title="AI Coding Coach", version="1.0.0", lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -46,17 +72,37 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Config
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
 
+# End-to-end /analyze latency budget (seconds); the agents get what fetching leaves,
+# but never less than MIN_ANALYSIS_BUDGET
+REQUEST_LATENCY_BUDGET = float(os.getenv("REQUEST_LATENCY_BUDGET", "60"))
+MIN_ANALYSIS_BUDGET = float(os.getenv("MIN_ANALYSIS_BUDGET", "10"))
+
+# Stored results younger than this (seconds) are returned by /analyze without recomputing
+PRECOMPUTED_RESULT_MAX_AGE = float(os.getenv("PRECOMPUTED_RESULT_MAX_AGE", "1800"))
+
+# Seconds between keep-alive comments on an idle /analyze/stream connection
+SSE_KEEPALIVE_INTERVAL = float(os.getenv("SSE_KEEPALIVE_INTERVAL", "15"))
+
+# Session database file
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "data/sessions.db")
+
+# Buffer session writes off the request path (see PersistentSessionService)
+SESSION_WRITE_BEHIND = os.getenv("SESSION_WRITE_BEHIND", "true").lower() == "true"
+
 # Initialize services
 mem = FaissStore(dim=512)
 
 # Import LLM client for agents
-from services.analyser.llm_client import generate_text
+from services.analyser.llm_client import generate_text, shutdown_llm_client
+from services.analyser.llm_cache import CachedLLMClient
 
 # Initialize multi-agent orchestrator
-from services.agents.orchestrator_agent import OrchestratorAgent
-orchestrator = OrchestratorAgent(generate_text)
+from services.agents.orchestrator_agent import OrchestratorAgent, StageCallback
+orchestrator = OrchestratorAgent(CachedLLMClient(generate_text))
 
-session_service = PersistentSessionService()
+session_service = PersistentSessionService(SESSION_DB_PATH, write_behind=SESSION_WRITE_BEHIND)
+# Awaitable view of session_service for use on the event loop
+sessions = session_service.aio
 
 logger.info(f"Initialized AI Coding Coach with Multi-Agent System")
 logger.info(f"Agents: AnalyzerAgent, WeaknessDetectorAgent, TaskGeneratorAgent")
@@ -68,7 +114,10 @@ logger.info(f"Persistent storage enabled")
 class LinkRequest(BaseModel):
     user_id: str
     handles: dict
-    session_id: str = None  # Optional session ID for continuity
+    session_id: Optional[str] = None  # Optional session ID for continuity
+    force_refresh: bool = False  # Bypass the platform profile cache
+    analysis_mode: Literal["parallel", "fused"] = "parallel"  # "fused" makes one LLM call instead of three
+    latency_budget: Optional[float] = None  # End-to-end seconds (default REQUEST_LATENCY_BUDGET)
 
 
 @app.get("/")
@@ -86,120 +135,434 @@ async def health():
 @app.get("/metrics")
 async def metrics():
     """Metrics endpoint."""
-    from libs.observability import metrics_collector
     return metrics_collector.get_metrics()
 
 
-@app.post("/analyze")
-async def analyze(req: LinkRequest, response: fastapi.Response):
-    response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-    with RequestTimer("/analyze"):
+def normalize_handles(handles: dict) -> dict:
+    """Lowercase platform names and strip handles, dropping empty ones."""
+    return {
+        str(platform).lower().strip(): str(handle).strip()
+        for platform, handle in handles.items()
+        if handle is not None and str(handle).strip()
+    }
+
+
+async def run_analysis(user_id: str, handles: dict, force_refresh: bool = False,
+                       analysis_mode: str = "parallel", latency_budget: Optional[float] = None,
+                       request_start: Optional[float] = None,
+                       on_stage: Optional[StageCallback] = None) -> dict:
+    """
+    Fetch, normalize and analyze a user's platforms, and store the result.
+
+    Args:
+        user_id: User identifier
+        handles: Non-empty {platform: handle}
+        force_refresh: Bypass the platform profile cache
+        analysis_mode: "parallel" or "fused"
+        latency_budget: End-to-end seconds (default REQUEST_LATENCY_BUDGET)
+        request_start: time.monotonic() when the request started (default now)
+        on_stage: Progress callback, called with ("platform", per-platform fetch
+                  summary) as each platform arrives, then ("growth_metrics", ...),
+                  then once per agent output
+
+    Returns:
+        Orchestrator result with platforms, total_activities and fetched_at added
+
+    Raises:
+        HTTPException: 404 when no data was found, 500 when the analysis failed
+    """
+    request_start = time.monotonic() if request_start is None else request_start
+
+    logger.info(f"Valid handles to fetch: {handles}")
+    if on_stage:
+        raw_lists = await _fetch_with_progress(handles, force_refresh, on_stage)
+    else:
+        raw_lists = await fetch_all(handles, force_refresh=force_refresh)
+    # Extract activities and stats
+    activities = []
+    stats = {}
+    if isinstance(raw_lists, dict) and "activities" in raw_lists:
+        activities = raw_lists.get("activities", [])
+        stats = raw_lists.get("stats", {})
+    elif isinstance(raw_lists, list):
+        activities = raw_lists
+
+    logger.info(f"Fetched {len(activities)} total activities from {len(set(item.get('platform', 'unknown') for item in activities))} platforms")
+    logger.info(f"Fetched stats from {len(stats)} platforms: {list(stats.keys())}")
+
+    # Check if we got any data (activities OR stats)
+    if not activities and not stats:
+        logger.warning(f"No data fetched for user {user_id} from any platform")
+        raise HTTPException(
+            status_code=404,
+            detail="Could not fetch data from any platform. Please verify your usernames are correct and publicly accessible."
+        )
+
+    # Log summary of fetched data
+    platform_counts = {}
+    for item in activities:
+        p = item.get('platform', 'unknown')
+        platform_counts[p] = platform_counts.get(p, 0) + 1
+    logger.info(f"Fetched data summary for {user_id}: {platform_counts}")
+
+    # Process and normalize
+    logger.info(f"Processing {len(activities)} activities and stats from {len(stats)} platforms")
+    processed = normalize_activities(raw_lists)
+
+    # Validate processed data - we need either activities or stats
+    if not processed or (not processed.get('activities') and not processed.get('platform_stats')):
+        logger.warning(f"No valid data found after processing for user {user_id}")
+        raise HTTPException(
+            status_code=404,
+            detail="No coding data found. Please ensure you have public submissions or profile data on the provided platforms."
+        )
+
+    if on_stage:
+        on_stage("growth_metrics", {
+            "growth_metrics": processed.get("growth_metrics", {}),
+            "platforms": processed.get("platforms", []),
+            "total_activities": processed.get("total_count", 0)
+        })
+
+    # Agents whose inputs match the stored result's keep their previous output
+    growth_metrics = processed.get("growth_metrics", {})
+    fingerprint = compute_fingerprint(processed, orchestrator.analyzer.estimate_skill_level(growth_metrics))
+    previous = await _previous_result(user_id, handles, analysis_mode)
+    stages = changed_stages(previous["fingerprint"] if previous else None, fingerprint)
+
+    if not stages:
+        logger.info(f"Inputs unchanged for {user_id}, reusing previous analysis")
+        metrics_collector.increment("analyze.fingerprint.unchanged")
+        result = previous["result"]
+        for key in ("precomputed", "session_id"):
+            result.pop(key, None)
+        result["growth_metrics"] = growth_metrics
+        if isinstance(result.get("analysis"), dict):
+            result["analysis"]["growth_metrics"] = growth_metrics
+        result.setdefault("agent_execution", {})["reused"] = list(STAGES)
+        if on_stage:
+            for stage in STAGES:
+                on_stage(stage, result.get(stage))
+    else:
+        reuse = {
+            stage: previous["result"][stage]
+            for stage in STAGES
+            if previous and stage not in stages and stage in previous["result"]
+        }
+        if reuse:
+            logger.info(f"Inputs changed for {user_id}, re-running {sorted(stages)}")
+            metrics_collector.increment("analyze.fingerprint.partial")
+
+        # Run multi-agent AI analysis
+        logger.info("Running multi-agent AI analysis")
+        request_budget = latency_budget or REQUEST_LATENCY_BUDGET
+        analysis_budget = max(request_budget - (time.monotonic() - request_start), MIN_ANALYSIS_BUDGET)
+        result = await orchestrator.run(user_id, processed, mode=analysis_mode, budget=analysis_budget,
+                                        on_stage=on_stage, reuse=reuse or None)
+
+    # Check if analysis failed
+    if result.get("status") == "failed":
+        error_msg = result.get("error", "Unknown error during analysis")
+        logger.error(f"AI analysis failed for user {user_id}: {error_msg}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"AI analysis failed: {error_msg}"
+        )
+
+    result["platforms"] = processed.get("platforms", [])
+    result["total_activities"] = processed.get("total_count", 0)
+    result["fingerprint"] = fingerprint["all"]
+    result["fetched_at"] = time.time()
+
+    # Partial results are not worth serving again
+    if not result.get("partial"):
         try:
-            logger.info(f"Analysis request from user: {req.user_id}")
-
-            # Validate input
-            if not req.handles:
-                raise HTTPException(status_code=400, detail="At least one platform handle required")
-
-            # Get or create session
-            if req.session_id:
-                session = session_service.get(req.session_id)
-                if not session:
-                    logger.warning(f"Session {req.session_id} not found, creating new")
-                    session = session_service.create(req.user_id)
-            else:
-                session = session_service.create(req.user_id)
-
-            logger.info(f"Using session: {session['session_id']}")
-
-            # Fetch data from all platforms
-            logger.info(f"Received handles from user {req.user_id}: {req.handles}")
-            logger.info(f"Fetching data from platforms: {list(req.handles.keys())}")
-
-            # Validate that we have at least one non-empty handle
-            valid_handles = {k: v for k, v in req.handles.items() if v and str(v).strip()}
-            if not valid_handles:
-                logger.error(f"No valid handles provided. Received: {req.handles}")
-                raise HTTPException(
-                    status_code=400,
-                    detail="No valid platform handles provided. Please enter at least one username/handle."
-                )
-
-            logger.info(f"Valid handles to fetch: {valid_handles}")
-            raw_lists = await fetch_all(valid_handles)
-            # Extract activities and stats
-            activities = []
-            stats = {}
-            if isinstance(raw_lists, dict) and "activities" in raw_lists:
-                activities = raw_lists.get("activities", [])
-                stats = raw_lists.get("stats", {})
-            elif isinstance(raw_lists, list):
-                activities = raw_lists
-
-            logger.info(f"Fetched {len(activities)} total activities from {len(set(item.get('platform', 'unknown') for item in activities))} platforms")
-            logger.info(f"Fetched stats from {len(stats)} platforms: {list(stats.keys())}")
-
-            # Check if we got any data (activities OR stats)
-            if not activities and not stats:
-                logger.warning(f"No data fetched for user {req.user_id} from any platform")
-                raise HTTPException(
-                    status_code=404,
-                    detail="Could not fetch data from any platform. Please verify your usernames are correct and publicly accessible."
-                )
-
-            # Log summary of fetched data
-            platform_counts = {}
-            for item in activities:
-                p = item.get('platform', 'unknown')
-                platform_counts[p] = platform_counts.get(p, 0) + 1
-            logger.info(f"Fetched data summary for {req.user_id}: {platform_counts}")
-
-            # Process and normalize
-            logger.info(f"Processing {len(activities)} activities and stats from {len(stats)} platforms")
-            processed = normalize_activities(raw_lists)
-
-            # Validate processed data - we need either activities or stats
-            if not processed or (not processed.get('activities') and not processed.get('platform_stats')):
-                logger.warning(f"No valid data found after processing for user {req.user_id}")
-                raise HTTPException(
-                    status_code=404,
-                    detail="No coding data found. Please ensure you have public submissions or profile data on the provided platforms."
-                )
-
-            # Run multi-agent AI analysis
-            logger.info("Running multi-agent AI analysis")
-            result = await orchestrator.run_parallel_analysis(req.user_id, processed)
-
-            # Check if analysis failed
-            if result.get("status") == "failed":
-                error_msg = result.get("error", "Unknown error during analysis")
-                logger.error(f"AI analysis failed for user {req.user_id}: {error_msg}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"AI analysis failed: {error_msg}"
-                )
-
-            # Update session context
-            session_service.update_context(session["session_id"], {
-                "timestamp": processed.get("growth_metrics", {}).get("days_active"),
-                "platforms": processed.get("platforms", []),
-                "total_activities": processed.get("total_count", 0)
+            await sessions.save_analysis_result(user_id, normalize_handles(handles), analysis_mode, result,
+                                                 fingerprint=fingerprint)
+        except Exception as e:
+            logger.error(f"Failed to store analysis result for {user_id}: {e}")
+
+    return result
+
+
+async def _previous_result(user_id: str, handles: dict, analysis_mode: str) -> Optional[dict]:
+    """The stored result for the same handles and mode, if it has a fingerprint."""
+    try:
+        stored = await sessions.get_analysis_result(user_id)
+    except Exception as e:
+        logger.error(f"Failed to load stored analysis for {user_id}: {e}")
+        return None
+    if (not stored or not stored.get("fingerprint") or stored["analysis_mode"] != analysis_mode
+            or stored["handles"] != normalize_handles(handles)):
+        return None
+    return stored
+
+
+async def _fetch_with_progress(handles: dict, force_refresh: bool, on_stage: StageCallback) -> dict:
+    """Fetch each platform separately, reporting each as it arrives; same result shape as fetch_all."""
+    fetches = {
+        asyncio.ensure_future(fetch_all({platform: handle}, force_refresh=force_refresh)): platform
+        for platform, handle in handles.items()
+    }
+    activities = []
+    stats = {}
+    for future in asyncio.as_completed(fetches):
+        result = await future
+        if not isinstance(result, dict):
+            continue
+        platform_activities = result.get("activities", [])
+        activities.extend(platform_activities)
+        stats.update(result.get("stats", {}))
+        for platform in sorted(set(a.get("platform", "unknown") for a in platform_activities) | set(result.get("stats", {}))):
+            on_stage("platform", {
+                "platform": platform,
+                "activities": sum(1 for a in platform_activities if a.get("platform") == platform),
+                "stats": result.get("stats", {}).get(platform, {})
             })
-
-            # Add session ID and timestamp to response
+    return {"activities": activities, "stats": stats}
+
+
+async def refresh_user(user_id: str, handles: dict, analysis_mode: str):
+    """Background refresh: re-fetch upstream and re-analyze without a request."""
+    # force_refresh only bypasses the profile cache; agents whose inputs are unchanged
+    # are still reused through the fingerprint, so a quiet user costs no LLM calls
+    await run_analysis(user_id, handles, force_refresh=True, analysis_mode=analysis_mode)
+
+
+async def _record_session(session: dict, result: dict):
+    """Append a summary of this analysis to the session context."""
+    await sessions.update_context(session["session_id"], {
+        "timestamp": result.get("growth_metrics", {}).get("days_active"),
+        "platforms": result.get("platforms", []),
+        "total_activities": result.get("total_activities", 0),
+        "fingerprint": result.get("fingerprint")
+    })
+
+
+refresh_scheduler = RefreshScheduler(sessions, refresh_user)
+
+
+def _validated_handles(req: LinkRequest) -> dict:
+    """Non-empty handles from the request; raises 400 if there are none."""
+    if not req.handles:
+        raise HTTPException(status_code=400, detail="At least one platform handle required")
+
+    logger.info(f"Received handles from user {req.user_id}: {req.handles}")
+
+    # Validate that we have at least one non-empty handle
+    valid_handles = {k: v for k, v in req.handles.items() if v and str(v).strip()}
+    if not valid_handles:
+        logger.error(f"No valid handles provided. Received: {req.handles}")
+        raise HTTPException(
+            status_code=400,
+            detail="No valid platform handles provided. Please enter at least one username/handle."
+        )
+    return valid_handles
+
+
+async def process_analysis_request(req: LinkRequest, request_start: Optional[float] = None,
+                                   on_stage: Optional[StageCallback] = None) -> dict:
+    """
+    Handle one analysis request: session, stored result or a fresh analysis.
+
+    Args:
+        req: The request
+        request_start: time.monotonic() the latency budget counts from (default now)
+        on_stage: Progress callback as in run_analysis
+
+    Returns:
+        Analysis result with session_id
+
+    Raises:
+        HTTPException: On invalid input, missing data or a failed analysis
+    """
+    logger.info(f"Analysis request from user: {req.user_id}")
+    valid_handles = _validated_handles(req)
+
+    # Get or create session
+    if req.session_id:
+        session = await sessions.get(req.session_id)
+        if not session:
+            logger.warning(f"Session {req.session_id} not found, creating new")
+            session = await sessions.create(req.user_id)
+    else:
+        session = await sessions.create(req.user_id)
+
+    logger.info(f"Using session: {session['session_id']}")
+
+    # Serve the stored result when it is recent enough and for the same inputs
+    if not req.force_refresh:
+        stored = await sessions.get_analysis_result(req.user_id)
+        if (stored and stored["handles"] == normalize_handles(valid_handles)
+                and stored["analysis_mode"] == req.analysis_mode
+                and time.time() - stored["computed_at"] <= PRECOMPUTED_RESULT_MAX_AGE):
+            logger.info(f"Serving precomputed analysis for {req.user_id} "
+                        f"(age {time.time() - stored['computed_at']:.0f}s)")
+            metrics_collector.increment("analyze.precomputed")
+            result = stored["result"]
+            await _record_session(session, result)
+            if on_stage:
+                on_stage("growth_metrics", {key: result.get(key) for key in ("growth_metrics", "platforms", "total_activities")})
+                for stage in STAGES:
+                    on_stage(stage, result.get(stage))
+            result["precomputed"] = True
+            result["fetched_at"] = stored["computed_at"]
             result["session_id"] = session["session_id"]
-            import time
-            result["fetched_at"] = time.time()
-
-            logger.info(f"Analysis complete for user {req.user_id}")
             return result
 
+    logger.info(f"Fetching data from platforms: {list(valid_handles.keys())}")
+    result = await run_analysis(
+        req.user_id, valid_handles,
+        force_refresh=req.force_refresh,
+        analysis_mode=req.analysis_mode,
+        latency_budget=req.latency_budget,
+        request_start=request_start,
+        on_stage=on_stage,
+    )
+
+    await _record_session(session, result)
+
+    # Add session ID to response
+    result["session_id"] = session["session_id"]
+
+    logger.info(f"Analysis complete for user {req.user_id}")
+    return result
+
+
+async def _run_analysis_job(job: dict, on_stage: Optional[StageCallback] = None) -> dict:
+    # The latency budget counts from submission, so queueing time is part of it
+    request_start = time.monotonic() - max(time.time() - job["created_at"], 0)
+    return await process_analysis_request(LinkRequest(**job["request"]), request_start=request_start,
+                                          on_stage=on_stage)
+
+
+job_queue = AnalysisJobQueue(sessions, _run_analysis_job)
+
+
+async def _submit_job(req: LinkRequest, on_stage: Optional[StageCallback] = None) -> dict:
+    _validated_handles(req)
+    payload = req.model_dump() if hasattr(req, "model_dump") else req.dict()
+    try:
+        return await job_queue.submit(req.user_id, payload, on_stage=on_stage)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"Analysis queue is full, try again later ({e})")
+
+
+def _job_response(job: dict) -> dict:
+    response = {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+    if job["status"] == "succeeded":
+        response["result"] = job["result"]
+    elif job["status"] == "failed":
+        response["error"] = job["error"]
+        response["status_code"] = job["status_code"]
+    return response
+
+
+@app.post("/analyze/jobs", status_code=202)
+async def create_analysis_job(req: LinkRequest):
+    """Queue an analysis and return its job ID immediately."""
+    job = await _submit_job(req)
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/analyze/jobs/{job['job_id']}"
+    }
+
+
+@app.get("/analyze/jobs/{job_id}")
+async def get_analysis_job(job_id: str, response: fastapi.Response):
+    """Job status, with the result once it succeeded or the error once it failed."""
+    response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Analysis job {job_id} not found")
+    return _job_response(job)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(req: LinkRequest):
+    """
+    Analysis as Server-Sent Events, one event per stage as it completes.
+
+    Events: job, platform (one per platform), growth_metrics, analysis,
+    weaknesses, tasks, then result with the full response or error with
+    status_code and detail. A comment line is sent every
+    SSE_KEEPALIVE_INTERVAL seconds without events, so clients and proxies
+    can tell a slow stage from a dead connection.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    job = await _submit_job(req, on_stage=lambda stage, data: events.put_nowait((stage, data)))
+    job_id = job["job_id"]
+
+    async def stream():
+        with RequestTimer("/analyze/stream", track_active=False):
+            yield _sse("job", {"job_id": job_id, "status_url": f"/analyze/jobs/{job_id}"})
+            finished = asyncio.ensure_future(job_queue.wait(job_id))
+            try:
+                while not finished.done():
+                    next_event = asyncio.ensure_future(events.get())
+                    done, _ = await asyncio.wait({next_event, finished}, timeout=SSE_KEEPALIVE_INTERVAL,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if next_event.done():
+                        yield _sse(*next_event.result())
+                    else:
+                        next_event.cancel()
+                        if not done:
+                            yield ": keepalive\n\n"
+                while not events.empty():
+                    yield _sse(*events.get_nowait())
+
+                try:
+                    final = finished.result()
+                except Exception as e:
+                    logger.error(f"Analysis job {job_id} failed: {e}", exc_info=True)
+                    final = {"status": "failed", "status_code": 500, "error": f"Analysis failed: {e}"}
+                if final is None:
+                    yield _sse("error", {"status_code": 500, "detail": "Analysis job record is missing"})
+                elif final["status"] == "succeeded":
+                    yield _sse("result", final["result"])
+                else:
+                    yield _sse("error", {"status_code": final["status_code"] or 500, "detail": final["error"]})
+            finally:
+                # A disconnected client leaves the job running; its result stays pollable
+                finished.cancel()
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@app.post("/analyze")
+async def analyze(req: LinkRequest, response: fastapi.Response):
+    """Synchronous analysis: submits a job and waits for it."""
+    response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
+    # The job itself counts as the in-flight request
+    with RequestTimer("/analyze", track_active=False):
+        try:
+            job = await job_queue.wait((await _submit_job(req))["job_id"])
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Analysis failed for user {req.user_id}: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+        if job is None:
+            raise HTTPException(status_code=500, detail="Analysis job record is missing")
+        if job["status"] != "succeeded":
+            raise HTTPException(status_code=job["status_code"] or 500, detail=job["error"])
+        return job["result"]
+
 
 
 if __name__ == "__main__":
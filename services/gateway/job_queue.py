@@ -0,0 +1,231 @@
+"""
+Persistent in-process job queue for analysis requests.
+
+Jobs are recorded in the session DB before they are queued and updated as
+they run, so clients can poll them and a restart re-queues whatever was
+still queued or running. A fixed number of workers bounds how many analyses
+run at once.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from libs.observability import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "4"))
+ANALYSIS_JOB_MAX_QUEUE = int(os.getenv("ANALYSIS_JOB_MAX_QUEUE", "100"))
+
+# Finished jobs older than this (seconds) are deleted on startup and every cleanup interval
+ANALYSIS_JOB_RETENTION = float(os.getenv("ANALYSIS_JOB_RETENTION", "86400"))
+ANALYSIS_JOB_CLEANUP_INTERVAL = float(os.getenv("ANALYSIS_JOB_CLEANUP_INTERVAL", "3600"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+# handler(job, on_stage=None) -> result
+JobHandler = Callable[..., Awaitable[Dict]]
+
+# Progress listener: (stage name, stage output)
+StageListener = Callable[[str, Any], None]
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class AnalysisJobQueue:
+    """Runs analysis jobs on a bounded worker pool, persisting their state."""
+
+    def __init__(self, store, handler: JobHandler, workers: int = ANALYSIS_JOB_WORKERS,
+                 max_queued: int = ANALYSIS_JOB_MAX_QUEUE, retention: float = ANALYSIS_JOB_RETENTION,
+                 cleanup_interval: float = ANALYSIS_JOB_CLEANUP_INTERVAL):
+        """
+        Args:
+            store: AsyncSessionService (PersistentSessionService.aio) holding the analysis_jobs table
+            handler: Coroutine function taking the job dict and an on_stage listener
+                     (or None) and returning the result; exceptions with
+                     status_code/detail attributes keep them
+            workers: Number of jobs run concurrently
+            max_queued: Maximum number of jobs waiting for a worker
+            retention: Seconds finished jobs are kept
+            cleanup_interval: Seconds between deletions of expired jobs
+        """
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self.cleanup_interval = cleanup_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._listeners: Dict[str, StageListener] = {}
+
+    async def start(self):
+        """Re-queue unfinished jobs from the DB and start the workers."""
+        self._queue = asyncio.Queue()
+        await self.delete_expired()
+
+        # Jobs that were running when the process stopped start over
+        restored = await self.store.get_unfinished_jobs()
+        for job in restored:
+            if job["status"] == RUNNING:
+                await self.store.update_job(job["job_id"], QUEUED)
+            self._queue.put_nowait(job["job_id"])
+        if restored:
+            logger.info(f"Re-queued {len(restored)} unfinished analysis jobs")
+
+        self._workers = [asyncio.ensure_future(self._worker(i)) for i in range(self.workers)]
+        self._cleanup_task = asyncio.ensure_future(self._cleanup_loop())
+        self._report()
+        logger.info(f"Analysis job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are re-queued on the next start."""
+        tasks = self._workers + ([self._cleanup_task] if self._cleanup_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._cleanup_task = None
+        for waiter in self._waiters.values():
+            waiter.cancel()
+        self._waiters.clear()
+        self._listeners.clear()
+        logger.info("Analysis job queue stopped")
+
+    async def submit(self, user_id: str, request: Dict, on_stage: Optional[StageListener] = None) -> Dict:
+        """
+        Record a job and queue it.
+
+        Args:
+            user_id: User the job belongs to
+            request: JSON-serializable request payload passed to the handler
+            on_stage: Progress listener passed to the handler; not persisted,
+                      so a job re-queued after a restart runs without it
+
+        Returns:
+            The stored job dict
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue not started")
+        if self._queue.qsize() >= self.max_queued:
+            metrics_collector.increment("analysis_jobs.rejected")
+            raise QueueFullError(f"{self._queue.qsize()} analysis jobs already queued")
+
+        job_id = str(uuid.uuid4())
+        job = await self.store.create_job(job_id, user_id, request)
+        if on_stage:
+            self._listeners[job_id] = on_stage
+        self._queue.put_nowait(job_id)
+        metrics_collector.increment("analysis_jobs.submitted")
+        self._report()
+        logger.info(f"Queued analysis job {job_id} for user {user_id}")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """Current state of a job, or None if unknown."""
+        return await self.store.get_job(job_id)
+
+    async def wait(self, job_id: str) -> Dict:
+        """Wait for a job submitted by this process to finish and return its final state."""
+        # Register before checking the store, so a job finishing in between still resolves the waiter
+        waiter = self._waiters.get(job_id)
+        if waiter is None:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[job_id] = waiter
+        job = await self.store.get_job(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            self._waiters.pop(job_id, None)
+            return job
+        return await asyncio.shield(waiter)
+
+    async def delete_expired(self) -> int:
+        """Delete jobs that finished more than retention seconds ago; returns how many."""
+        removed = await self.store.delete_finished_jobs(time.time() - self.retention)
+        if removed:
+            logger.info(f"Deleted {removed} expired analysis jobs")
+            metrics_collector.increment("analysis_jobs.expired", removed)
+        return removed
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                await self.delete_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Deleting expired analysis jobs failed: {e}", exc_info=True)
+
+    def _report(self):
+        metrics_collector.set_gauge("analysis_jobs.queued", self._queue.qsize() if self._queue else 0)
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            self._report()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis job worker {index} failed on {job_id}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        """Run a job and resolve its waiter, even if the store fails along the way."""
+        job, error = None, None
+        try:
+            job = await self._execute(job_id)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            waiter = self._waiters.pop(job_id, None)
+            if waiter is not None and not waiter.done():
+                if isinstance(error, asyncio.CancelledError):
+                    waiter.cancel()
+                elif error is not None:
+                    waiter.set_exception(error)
+                else:
+                    waiter.set_result(job)
+
+    async def _execute(self, job_id: str) -> Optional[Dict]:
+        """Run the handler for a job and record the outcome; returns the final stored job."""
+        job = await self.store.get_job(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+
+        await self.store.update_job(job_id, RUNNING)
+        start = time.monotonic()
+        # Jobs count as in-flight requests for load-sensitive background work
+        metrics_collector.request_started()
+        try:
+            result = await self.handler(job, on_stage=self._listeners.get(job_id))
+            await self.store.update_job(job_id, SUCCEEDED, result=result)
+            metrics_collector.increment("analysis_jobs.succeeded")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status_code = getattr(e, "status_code", 500)
+            error = getattr(e, "detail", None) or str(e)
+            await self.store.update_job(job_id, FAILED, error=error, status_code=status_code)
+            metrics_collector.increment("analysis_jobs.failed")
+            logger.warning(f"Analysis job {job_id} failed ({status_code}): {error}")
+        finally:
+            metrics_collector.request_finished()
+            metrics_collector.record_timing("analysis_jobs.run", time.monotonic() - start)
+            self._listeners.pop(job_id, None)
+
+        return await self.store.get_job(job_id)
@@ -0,0 +1,185 @@
+"""
+Background refresh of tracked users' analyses.
+
+Users who opened the dashboard recently get their platforms re-fetched and
+re-analyzed ahead of their next visit, most recently active first, so
+/analyze can answer from the stored result. Rounds are jittered, refreshes
+yield to live traffic, and users whose platform rate limiters are already
+busy are deferred to the next round.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from libs.observability import metrics_collector
+from services.fetcher.rate_limiter import get_governor
+
+logger = logging.getLogger(__name__)
+
+# Off unless enabled: each refresh re-fetches platforms and may call Gemini
+REFRESH_SCHEDULER_ENABLED = os.getenv("REFRESH_SCHEDULER_ENABLED", "false").lower() == "true"
+
+# Seconds between rounds, +/- REFRESH_JITTER as a fraction
+REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "300"))
+REFRESH_JITTER = float(os.getenv("REFRESH_JITTER", "0.2"))
+
+# Results younger than this are left alone
+REFRESH_MIN_AGE = float(os.getenv("REFRESH_MIN_AGE", "900"))
+
+# Only users with a session accessed within this many seconds are refreshed
+REFRESH_ACTIVE_WINDOW = float(os.getenv("REFRESH_ACTIVE_WINDOW", str(7 * 86400)))
+
+# Users per round, and the pause between two refreshes in a round
+REFRESH_BATCH_SIZE = int(os.getenv("REFRESH_BATCH_SIZE", "10"))
+REFRESH_SPACING = float(os.getenv("REFRESH_SPACING", "2"))
+
+# Pause while more than this many requests are in flight; give up the round after REFRESH_MAX_PAUSE
+REFRESH_MAX_ACTIVE_REQUESTS = int(os.getenv("REFRESH_MAX_ACTIVE_REQUESTS", "2"))
+REFRESH_LOAD_CHECK_INTERVAL = 5.0
+REFRESH_MAX_PAUSE = 60.0
+
+# Limiters an analysis goes through besides the user's platforms
+SHARED_LIMITS = ["gemini"]
+
+# Platforms whose fetchers also call another host
+EXTRA_LIMITS = {"atcoder": ["kenkoooo"]}
+
+RefreshFn = Callable[[str, Dict, str], Awaitable[Dict]]
+
+
+def _jittered(seconds: float, jitter: float = REFRESH_JITTER) -> float:
+    return seconds * random.uniform(1 - jitter, 1 + jitter)
+
+
+class RefreshScheduler:
+    """Periodically re-runs the analysis for recently active users."""
+
+    def __init__(self, session_service, refresh: RefreshFn, interval: float = REFRESH_INTERVAL,
+                 min_age: float = REFRESH_MIN_AGE, active_window: float = REFRESH_ACTIVE_WINDOW,
+                 batch_size: int = REFRESH_BATCH_SIZE, spacing: float = REFRESH_SPACING,
+                 max_active_requests: int = REFRESH_MAX_ACTIVE_REQUESTS):
+        """
+        Args:
+            session_service: AsyncSessionService (PersistentSessionService.aio) holding sessions and results
+            refresh: Coroutine function (user_id, handles, analysis_mode) that
+                     re-fetches, re-analyzes and stores the result
+            interval: Seconds between rounds
+            min_age: Minimum result age before a refresh
+            active_window: Seconds since last access for a user to count as active
+            batch_size: Maximum users per round
+            spacing: Seconds between refreshes within a round
+            max_active_requests: In-flight request count above which refreshes pause
+        """
+        self.session_service = session_service
+        self.refresh = refresh
+        self.interval = interval
+        self.min_age = min_age
+        self.active_window = active_window
+        self.batch_size = batch_size
+        self.spacing = spacing
+        self.max_active_requests = max_active_requests
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the refresh loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._loop())
+            logger.info(f"Refresh scheduler started (every ~{self.interval:.0f}s, batch {self.batch_size})")
+
+    async def stop(self):
+        """Cancel the refresh loop and wait for it to exit."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Refresh scheduler stopped")
+
+    async def _loop(self):
+        # Spread the first round so restarts of several workers don't align
+        await asyncio.sleep(_jittered(self.interval, 0.5))
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Refresh round failed: {e}", exc_info=True)
+            await asyncio.sleep(_jittered(self.interval))
+
+    def _under_load(self) -> bool:
+        return metrics_collector.active_requests > self.max_active_requests
+
+    async def _wait_for_quiet(self) -> bool:
+        """Wait until request load drops; False if it stays high for REFRESH_MAX_PAUSE."""
+        waited = 0.0
+        while self._under_load():
+            if waited >= REFRESH_MAX_PAUSE:
+                return False
+            metrics_collector.set_gauge("refresh_scheduler.paused", 1)
+            await asyncio.sleep(REFRESH_LOAD_CHECK_INTERVAL)
+            waited += REFRESH_LOAD_CHECK_INTERVAL
+        metrics_collector.set_gauge("refresh_scheduler.paused", 0)
+        return True
+
+    def _limits_busy(self, handles: Dict) -> bool:
+        """True if any limiter this user's refresh would use already has a queue."""
+        names = list(SHARED_LIMITS)
+        for platform in handles:
+            names.append(platform)
+            names.extend(EXTRA_LIMITS.get(platform, []))
+        return any(get_governor(name).waiting > 0 for name in names)
+
+    async def run_once(self) -> int:
+        """
+        Refresh one batch of candidates.
+
+        Returns:
+            Number of users refreshed
+        """
+        now = time.time()
+        candidates = await self.session_service.get_refresh_candidates(
+            active_since=now - self.active_window,
+            computed_before=now - self.min_age,
+            limit=self.batch_size,
+        )
+        metrics_collector.set_gauge("refresh_scheduler.candidates", len(candidates))
+        if not candidates:
+            return 0
+
+        refreshed = 0
+        for index, candidate in enumerate(candidates):
+            if index and self.spacing:
+                await asyncio.sleep(_jittered(self.spacing))
+
+            if not await self._wait_for_quiet():
+                logger.info("Refresh round abandoned: request load stayed high")
+                metrics_collector.increment("refresh_scheduler.abandoned")
+                break
+
+            user_id, handles = candidate["user_id"], candidate["handles"]
+            if self._limits_busy(handles):
+                logger.info(f"Deferring refresh for {user_id}: platform rate limits busy")
+                metrics_collector.increment("refresh_scheduler.deferred")
+                continue
+
+            start = time.monotonic()
+            try:
+                await self.refresh(user_id, handles, candidate["analysis_mode"])
+                refreshed += 1
+                metrics_collector.increment("refresh_scheduler.refreshed")
+                metrics_collector.record_timing("refresh_scheduler.refresh", time.monotonic() - start)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics_collector.increment("refresh_scheduler.failed")
+                logger.warning(f"Background refresh failed for {user_id}: {e}")
+
+        logger.info(f"Refresh round: {refreshed}/{len(candidates)} users refreshed")
+        return refreshed
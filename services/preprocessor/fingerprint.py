@@ -0,0 +1,121 @@
+"""
+Content fingerprints of normalized activity data.
+
+A fingerprint has one digest per kind of input the agents depend on, so a
+new analysis can tell which agents would see different input than last time:
+
+- profile: platforms, ratings/ranks, languages and the estimated skill level
+  (the analyzer's inputs that matter, and everything downstream of them)
+- attempts: submissions that were not accepted, with their tags
+  (weakness detection and task generation)
+- solves: accepted submissions (weakness detection, through per-tag success
+  rates, and task generation, which skips solved problems)
+
+Volume counters and date-dependent metrics (solved counts, streaks) are left
+out on purpose: they move with every solve or every day without changing
+the analysis.
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional, Set
+
+from services.preprocessor.tag_stats import ACCEPTED_VERDICTS
+
+FINGERPRINT_VERSION = 1
+
+# Platform stats that describe skill rather than volume
+SKILL_STAT_KEYS = ("rating", "max_rating", "highest_rating", "rank", "max_rank", "stars", "color")
+
+# Agent stages, in pipeline order
+STAGES = ("analysis", "weaknesses", "tasks")
+
+# Fingerprint component -> stages whose output depends on it
+AFFECTED_STAGES = {
+    "profile": {"analysis", "weaknesses", "tasks"},
+    "attempts": {"weaknesses", "tasks"},
+    "solves": {"weaknesses", "tasks"},
+}
+
+
+def _digest(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def _profile(growth_metrics: Dict, skill_level: Optional[str]) -> Dict:
+    profile = {}
+    for platform, stats in (growth_metrics.get("platform_stats") or {}).items():
+        entry = {}
+        for key in SKILL_STAT_KEYS:
+            value = stats.get(key)
+            # Numeric ranks are leaderboard positions that shift daily
+            if value is None or (key.endswith("rank") and isinstance(value, (int, float))):
+                continue
+            entry[key] = value
+        entry["languages"] = sorted(str(language) for language in stats.get("languages") or [])
+        profile[platform] = entry
+    return {"platforms": profile, "skill_level": skill_level}
+
+
+def _submission_keys(activities: List[Dict], accepted: bool) -> List[List]:
+    keys = []
+    for activity in activities:
+        if not isinstance(activity, dict):
+            continue
+        is_accepted = str(activity.get("verdict", "")).upper() in ACCEPTED_VERDICTS
+        if is_accepted != accepted:
+            continue
+        key = [
+            activity.get("platform", "unknown"),
+            str(activity.get("id") or activity.get("timestamp") or activity.get("title") or ""),
+            sorted(str(t).strip().lower() for t in activity.get("tags") or []),
+        ]
+        if not accepted:
+            key.append(str(activity.get("verdict", "")).upper())
+        keys.append(key)
+    keys.sort()
+    return keys
+
+
+def compute_fingerprint(processed: Dict, skill_level: Optional[str] = None) -> Dict[str, str]:
+    """
+    Fingerprint the output of normalize_activities.
+
+    Args:
+        processed: Normalized data with activities and growth_metrics
+        skill_level: Heuristic skill estimate, so crossing a level re-runs the analyzer
+
+    Returns:
+        Dict of component digests (profile, attempts, solves), the combined
+        digest under "all", and the fingerprint version
+    """
+    activities = processed.get("activities", [])
+    components = {
+        "profile": _digest(_profile(processed.get("growth_metrics") or {}, skill_level)),
+        "attempts": _digest(_submission_keys(activities, accepted=False)),
+        "solves": _digest(_submission_keys(activities, accepted=True)),
+    }
+    return {**components, "all": _digest(components), "version": FINGERPRINT_VERSION}
+
+
+def changed_stages(previous: Optional[Dict], current: Dict) -> Set[str]:
+    """
+    Stages whose inputs differ between two fingerprints.
+
+    Args:
+        previous: Fingerprint of the stored result, or None
+        current: Fingerprint of the new data
+
+    Returns:
+        Subset of STAGES to re-run; empty if the stored result can be reused as is
+    """
+    if not previous or previous.get("version") != current.get("version"):
+        return set(STAGES)
+    if previous.get("all") == current.get("all"):
+        return set()
+
+    stages = set()
+    for component, affected in AFFECTED_STAGES.items():
+        if previous.get(component) != current.get(component):
+            stages |= affected
+    return stages
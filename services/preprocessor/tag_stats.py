@@ -0,0 +1,202 @@
+"""
+Per-tag submission statistics.
+
+Explodes activities into one row per (submission, tag) and computes, with
+numpy group reductions, per tag and platform: attempts, accepted count,
+acceptance rate, recency-weighted failure rate and the average time from
+first attempt to first accepted submission. The results feed the weakness
+prompt and, when the signal is strong enough, pick weak topics without an
+LLM call.
+"""
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+ACCEPTED_VERDICTS = {"OK", "ACCEPTED", "AC", "COMPLETED"}
+
+# Failures this many days old count half as much as today's
+RECENCY_HALF_LIFE_DAYS = float(os.getenv("TAG_STATS_HALF_LIFE_DAYS", "30"))
+
+# Rule-based weak topic thresholds
+MIN_TOTAL_ATTEMPTS = int(os.getenv("WEAK_TOPICS_MIN_TOTAL_ATTEMPTS", "50"))
+MIN_TAG_ATTEMPTS = int(os.getenv("WEAK_TOPICS_MIN_TAG_ATTEMPTS", "5"))
+MIN_WEAK_TOPICS = int(os.getenv("WEAK_TOPICS_MIN_COUNT", "3"))
+WEAK_FAILURE_RATE = float(os.getenv("WEAK_TOPICS_FAILURE_RATE", "0.5"))
+WEAK_FAILURE_MARGIN = 0.15  # above the user's overall recent failure rate
+MAX_WEAK_TOPICS = 5
+
+# Topics every competitive programmer is expected to have practiced
+FUNDAMENTAL_TOPICS = ["implementation", "math", "greedy", "sortings", "binary search",
+                      "strings", "dp", "graphs", "data structures", "brute force"]
+
+ALL_PLATFORMS = "all"
+
+
+def _explode(activities: List[Dict]):
+    """One row per (submission, tag): tag, platform, problem key, timestamp, accepted."""
+    tags, platforms, problems, timestamps, accepted = [], [], [], [], []
+    for index, activity in enumerate(activities):
+        if not isinstance(activity, dict):
+            continue
+        activity_tags = [str(t).strip().lower() for t in activity.get("tags") or [] if str(t).strip()]
+        if not activity_tags:
+            continue
+        platform = activity.get("platform", "unknown")
+        problem_id = str(activity.get("id") or "").strip()
+        problem = f"{platform}:{problem_id}" if problem_id else f"#{index}"
+        is_accepted = str(activity.get("verdict", "")).upper() in ACCEPTED_VERDICTS
+        for tag in activity_tags:
+            tags.append(tag)
+            platforms.append(platform)
+            problems.append(problem)
+            timestamps.append(activity.get("timestamp") or 0)
+            accepted.append(is_accepted)
+    return (np.array(tags, dtype=object), np.array(platforms, dtype=object), np.array(problems, dtype=object),
+            np.array(timestamps, dtype=np.float64), np.array(accepted, dtype=bool))
+
+
+def _join_keys(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    return np.char.add(np.char.add(left, "\x1f"), right)
+
+
+def _group_stats(group_keys: np.ndarray, problems: np.ndarray, timestamps: np.ndarray,
+                 accepted: np.ndarray, now: float):
+    """Reduce exploded rows by group key; returns (unique keys, column dict)."""
+    keys, group = np.unique(group_keys, return_inverse=True)
+    n_groups = len(keys)
+
+    attempts = np.bincount(group, minlength=n_groups)
+    accepted_count = np.bincount(group, weights=accepted, minlength=n_groups)
+
+    # Recency-weighted failure rate; fall back to unweighted where all weights vanish
+    age_days = np.maximum(now - timestamps, 0) / 86400.0
+    weights = np.exp2(-age_days / RECENCY_HALF_LIFE_DAYS)
+    weight_sum = np.bincount(group, weights=weights, minlength=n_groups)
+    failed_weight = np.bincount(group, weights=weights * ~accepted, minlength=n_groups)
+    unweighted_failure = 1 - accepted_count / attempts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        recent_failure = np.where(weight_sum > 1e-12, failed_weight / weight_sum, unweighted_failure)
+
+    # First-AC latency per (group, problem): first accepted minus first attempt
+    pair_keys, pair = np.unique(_join_keys(group.astype(str), problems.astype(str)), return_inverse=True)
+    pair = pair.ravel()
+    first_attempt = np.full(len(pair_keys), np.inf)
+    first_ac = np.full(len(pair_keys), np.inf)
+    np.minimum.at(first_attempt, pair, timestamps)
+    np.minimum.at(first_ac, pair[accepted], timestamps[accepted])
+    pair_group = np.zeros(len(pair_keys), dtype=np.int64)
+    pair_group[pair] = group
+    solved = np.isfinite(first_ac)
+    latency = np.where(solved, first_ac - first_attempt, 0.0)
+    problems_count = np.bincount(pair_group, minlength=n_groups)
+    solved_count = np.bincount(pair_group, weights=solved, minlength=n_groups)
+    latency_sum = np.bincount(pair_group, weights=latency, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_latency_hours = np.where(solved_count > 0, latency_sum / np.maximum(solved_count, 1) / 3600.0, np.nan)
+
+    return keys, {
+        "attempts": attempts,
+        "accepted": accepted_count,
+        "acceptance_rate": accepted_count / attempts,
+        "recent_failure_rate": recent_failure,
+        "problems": problems_count,
+        "solved_problems": solved_count,
+        "first_ac_latency_hours": mean_latency_hours,
+    }
+
+
+def compute_tag_stats(activities: List[Dict], now: Optional[float] = None) -> List[Dict]:
+    """
+    Compute per-tag statistics for each platform and across all platforms.
+
+    Args:
+        activities: Activity dicts with tags, platform, id, verdict and timestamp
+        now: Reference time for recency weighting (default: current time)
+
+    Returns:
+        List of stat dicts (tag, platform, attempts, accepted, acceptance_rate,
+        recent_failure_rate, problems, solved_problems, first_ac_latency_hours),
+        most attempted first; platform is "all" for cross-platform totals
+    """
+    tags, platforms, problems, timestamps, accepted = _explode(activities)
+    if len(tags) == 0:
+        return []
+    now = time.time() if now is None else now
+
+    rows = []
+    groupings = [
+        (_join_keys(platforms.astype(str), tags.astype(str)), None),
+        (tags.astype(str), ALL_PLATFORMS),
+    ]
+    for group_keys, platform_label in groupings:
+        keys, columns = _group_stats(group_keys, problems, timestamps, accepted, now)
+        for i, key in enumerate(keys):
+            key = str(key)
+            platform, tag = (platform_label, key) if platform_label else key.split("\x1f", 1)
+            latency = columns["first_ac_latency_hours"][i]
+            rows.append({
+                "tag": tag,
+                "platform": platform,
+                "attempts": int(columns["attempts"][i]),
+                "accepted": int(columns["accepted"][i]),
+                "acceptance_rate": round(float(columns["acceptance_rate"][i]), 3),
+                "recent_failure_rate": round(float(columns["recent_failure_rate"][i]), 3),
+                "problems": int(columns["problems"][i]),
+                "solved_problems": int(columns["solved_problems"][i]),
+                "first_ac_latency_hours": None if np.isnan(latency) else round(float(latency), 2),
+            })
+
+    rows.sort(key=lambda r: (-r["attempts"], r["tag"], r["platform"]))
+    return rows
+
+
+def format_tag_stats(stats: List[Dict], limit: int = 20) -> str:
+    """Cross-platform tag stats as prompt lines, most attempted first."""
+    lines = []
+    for row in [r for r in stats if r["platform"] == ALL_PLATFORMS][:limit]:
+        latency = row["first_ac_latency_hours"]
+        lines.append(
+            f"  {row['tag']}: {row['attempts']} attempts, {row['acceptance_rate']:.0%} accepted, "
+            f"recent failure rate {row['recent_failure_rate']:.0%}, "
+            f"{row['solved_problems']}/{row['problems']} problems solved"
+            + (f", first AC after {latency:.1f}h on average" if latency is not None else "")
+        )
+    return "\n".join(lines) if lines else "No tagged submissions"
+
+
+def detect_weak_topics(stats: List[Dict]) -> Optional[Dict]:
+    """
+    Pick weak topics from tag stats when the data clearly shows them.
+
+    Args:
+        stats: Output of compute_tag_stats
+
+    Returns:
+        Weaknesses dict (weak_topics, missing_fundamentals, improvement_priority),
+        or None if there is too little data for a confident answer
+    """
+    overall = [r for r in stats if r["platform"] == ALL_PLATFORMS]
+    total_attempts = sum(r["attempts"] for r in overall)
+    if total_attempts < MIN_TOTAL_ATTEMPTS:
+        return None
+
+    failed = sum(r["attempts"] - r["accepted"] for r in overall)
+    threshold = max(WEAK_FAILURE_RATE, failed / total_attempts + WEAK_FAILURE_MARGIN)
+    weak = [r for r in overall if r["attempts"] >= MIN_TAG_ATTEMPTS and r["recent_failure_rate"] >= threshold]
+    if len(weak) < MIN_WEAK_TOPICS:
+        return None
+
+    # Most failures weighted by volume first
+    weak.sort(key=lambda r: (-r["recent_failure_rate"] * np.log1p(r["attempts"]), r["tag"]))
+    weak = weak[:MAX_WEAK_TOPICS]
+    attempted = {r["tag"] for r in overall}
+    return {
+        "weak_topics": [r["tag"] for r in weak],
+        "missing_fundamentals": [t for t in FUNDAMENTAL_TOPICS if t not in attempted],
+        "improvement_priority": [
+            f"Improve {r['tag']}: {r['acceptance_rate']:.0%} accepted over {r['attempts']} attempts"
+            for r in weak
+        ],
+    }
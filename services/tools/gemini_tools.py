@@ -2,8 +2,8 @@
 Gemini function calling tools for the AI Coding Coach.
 """
 import logging
-import requests
 from typing import Dict, Any, List
+from services.tools.problem_catalog import DIFFICULTY_RATINGS, get_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -120,29 +120,37 @@ def get_problem_recommendations(
     count: int = 5
 ) -> Dict[str, Any]:
     """
-    Get problem recommendations.
-    In production, this would query platform APIs.
+    Get problem recommendations from the local problem catalog.
+    Platforms the catalog does not cover fall back to all catalog platforms.
     """
     logger.info(f"Getting {count} {difficulty} problems on {platform} for topic: {topic}")
 
-    # Mock implementation
-    problems = {
+    catalog = get_catalog()
+    rating_range = DIFFICULTY_RATINGS.get(str(difficulty).lower(), DIFFICULTY_RATINGS["medium"])
+    found = catalog.search(
+        tags=[topic],
+        rating_range=rating_range,
+        platform=platform if platform in catalog.platforms else None,
+        count=count
+    )
+
+    return {
         "topic": topic,
         "difficulty": difficulty,
         "platform": platform,
         "problems": [
             {
-                "title": f"{topic.title()} Problem {i+1}",
+                "title": problem["name"],
                 "difficulty": difficulty,
-                "url": f"https://{platform}.com/problems/{topic}-{i+1}",
-                "tags": [topic]
+                "rating": problem["rating"],
+                "platform": problem["platform"],
+                "url": problem["url"],
+                "tags": problem["tags"]
             }
-            for i in range(count)
+            for problem in found
         ]
     }
 
-    return problems
-
 
 def analyze_code_complexity(code: str, language: str = "python") -> Dict[str, Any]:
     """
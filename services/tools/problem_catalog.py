@@ -0,0 +1,217 @@
+"""
+Offline problem catalog for practice recommendations.
+
+Loads a local snapshot of the Codeforces problemset and the Kenkoooo AtCoder
+problems/difficulty models (see scripts/build_problem_catalog.py) and keeps
+in-memory inverted indexes by tag, rating band and platform, so
+recommendations are set lookups instead of API or LLM calls.
+"""
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROBLEM_CATALOG_PATH = os.getenv("PROBLEM_CATALOG_PATH", "data/problem_catalog.json")
+
+# Width of a rating band in the index
+RATING_BAND = 100
+
+# Common spellings of topics mapped to Codeforces tag names
+TAG_ALIASES = {
+    "dynamic programming": "dp",
+    "graph": "graphs",
+    "graph algorithms": "graphs",
+    "greedy algorithms": "greedy",
+    "binary-search": "binary search",
+    "binarysearch": "binary search",
+    "tree": "trees",
+    "string": "strings",
+    "mathematics": "math",
+    "sorting": "sortings",
+    "data structure": "data structures",
+    "dfs": "dfs and similar",
+    "bfs": "graphs",
+    "shortest path": "shortest paths",
+    "two-pointers": "two pointers",
+    "bit manipulation": "bitmasks",
+    "segment tree": "data structures",
+}
+
+# Rating ranges for the tool's difficulty labels
+DIFFICULTY_RATINGS = {
+    "easy": (800, 1300),
+    "medium": (1400, 1900),
+    "hard": (2000, 3500),
+}
+
+
+def normalize_tag(tag: str) -> str:
+    """Lowercase a topic and map common aliases to catalog tag names."""
+    key = " ".join(str(tag).strip().lower().replace("_", " ").split())
+    return TAG_ALIASES.get(key, TAG_ALIASES.get(key.replace("-", " "), key.replace("-", " ")))
+
+
+def _band(rating: int) -> int:
+    return rating // RATING_BAND * RATING_BAND
+
+
+class ProblemCatalog:
+    """Rated problems with inverted indexes over tag, rating band and platform."""
+
+    def __init__(self, problems: List[Dict]):
+        self.problems = problems
+        self.by_tag: Dict[str, Set[int]] = defaultdict(set)
+        self.by_band: Dict[int, Set[int]] = defaultdict(set)
+        self.by_platform: Dict[str, Set[int]] = defaultdict(set)
+        self.by_id: Dict[str, int] = {}
+
+        for index, problem in enumerate(problems):
+            self.by_id[problem["id"]] = index
+            self.by_platform[problem["platform"]].add(index)
+            self.by_band[_band(problem["rating"])].add(index)
+            for tag in problem.get("tags", []):
+                self.by_tag[tag].add(index)
+
+        logger.info(f"Problem catalog indexed {len(problems)} problems, {len(self.by_tag)} tags")
+
+    def __len__(self) -> int:
+        return len(self.problems)
+
+    @property
+    def platforms(self) -> Set[str]:
+        return set(self.by_platform)
+
+    def get(self, problem_id: str) -> Optional[Dict]:
+        index = self.by_id.get(problem_id)
+        return self.problems[index] if index is not None else None
+
+    def search(self, tags: Optional[Iterable[str]] = None, rating_range: Optional[Tuple[int, int]] = None,
+               platform: Optional[str] = None, exclude_ids: Optional[Set[str]] = None,
+               target_rating: Optional[int] = None, count: int = 5) -> List[Dict]:
+        """
+        Find problems matching all given filters.
+
+        Args:
+            tags: Any of these tags (normalized with normalize_tag)
+            rating_range: Inclusive (low, high) rating bounds
+            platform: Only this platform
+            exclude_ids: Problem IDs to leave out (e.g. already solved)
+            target_rating: Prefer ratings closest to this (default: middle of rating_range)
+            count: Maximum number of problems
+
+        Returns:
+            Problem dicts, closest to the target rating and most solved first
+        """
+        candidates: Optional[Set[int]] = None
+
+        def narrow(indices: Set[int]):
+            nonlocal candidates
+            candidates = indices if candidates is None else candidates & indices
+
+        if platform:
+            narrow(self.by_platform.get(platform, set()))
+        if tags:
+            narrow(set().union(*(self.by_tag.get(normalize_tag(t), set()) for t in tags)))
+        if rating_range:
+            low, high = rating_range
+            narrow(set().union(*(self.by_band.get(b, set())
+                                 for b in range(_band(low), _band(high) + RATING_BAND, RATING_BAND))))
+        if candidates is None:
+            candidates = set(range(len(self.problems)))
+        if exclude_ids:
+            candidates = candidates - {self.by_id[pid] for pid in exclude_ids if pid in self.by_id}
+
+        if rating_range:
+            low, high = rating_range
+            candidates = {i for i in candidates if low <= self.problems[i]["rating"] <= high}
+            if target_rating is None:
+                target_rating = (low + high) // 2
+
+        def rank(index):
+            problem = self.problems[index]
+            distance = abs(problem["rating"] - target_rating) if target_rating is not None else 0
+            return distance, -problem["solved_count"], problem["id"]
+
+        return [self.problems[i] for i in sorted(candidates, key=rank)[:count]]
+
+
+def _codeforces_problems(snapshot: Dict) -> List[Dict]:
+    """Problems from a Codeforces problemset.problems API result."""
+    solved_counts = {
+        f"{s.get('contestId')}-{s.get('index')}": s.get("solvedCount", 0)
+        for s in snapshot.get("problemStatistics", [])
+    }
+    problems = []
+    for p in snapshot.get("problems", []):
+        if "contestId" not in p or "index" not in p:
+            continue
+        problem_id = f"{p['contestId']}-{p['index']}"
+        problems.append({
+            "platform": "codeforces",
+            "id": problem_id,
+            "name": p.get("name", problem_id),
+            "rating": p.get("rating"),
+            "tags": [normalize_tag(t) for t in p.get("tags", [])],
+            "url": f"https://codeforces.com/problemset/problem/{p['contestId']}/{p['index']}",
+            "solved_count": solved_counts.get(problem_id, 0),
+        })
+    return problems
+
+
+def _atcoder_problems(snapshot: Dict) -> List[Dict]:
+    """Problems from Kenkoooo's problems.json and problem-models.json."""
+    models = snapshot.get("models", {})
+    problems = []
+    for p in snapshot.get("problems", []):
+        difficulty = (models.get(p.get("id")) or {}).get("difficulty")
+        if "id" not in p or "contest_id" not in p:
+            continue
+        problems.append({
+            "platform": "atcoder",
+            # Same form as AtCoder activity IDs
+            "id": f"{p['contest_id']}-{p['id']}",
+            "name": p.get("name") or p.get("title") or p["id"],
+            # Kenkoooo difficulties go negative for the easiest problems
+            "rating": max(int(difficulty), 0) if difficulty is not None else None,
+            "tags": [],
+            "url": f"https://atcoder.jp/contests/{p['contest_id']}/tasks/{p['id']}",
+            "solved_count": 0,
+        })
+    return problems
+
+
+def load_catalog(path: str = PROBLEM_CATALOG_PATH) -> ProblemCatalog:
+    """
+    Load and index a catalog snapshot file.
+
+    The file holds {"codeforces": <problemset.problems result>,
+    "kenkoooo": {"problems": [...], "models": {...}}}. A missing or
+    unreadable file gives an empty catalog.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Problem catalog {path} not found; run scripts/build_problem_catalog.py")
+        return ProblemCatalog([])
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to load problem catalog {path}: {e}")
+        return ProblemCatalog([])
+
+    problems = _codeforces_problems(snapshot.get("codeforces", {})) + _atcoder_problems(snapshot.get("kenkoooo", {}))
+    # Unrated problems cannot be matched to a skill level
+    return ProblemCatalog([p for p in problems if p["rating"] is not None])
+
+
+_catalog: Optional[ProblemCatalog] = None
+
+
+def get_catalog() -> ProblemCatalog:
+    """The process-wide catalog, loaded on first use."""
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog()
+    return _catalog
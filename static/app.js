@@ -1,6 +1,9 @@
 // API Configuration
 const API_BASE_URL = 'http://localhost:8080';
 
+// Give up on a stream only after this long without any data (the server sends keep-alives)
+const STREAM_IDLE_TIMEOUT = 60000;
+
 // DOM Elements
 const analyzeForm = document.getElementById('analyzeForm');
 const analyzeBtn = document.getElementById('analyzeBtn');
@@ -50,38 +53,11 @@ analyzeForm.addEventListener('submit', async (e) => {
     hideResults();
 
     try {
-        // Add timeout to fetch
-        const controller = new AbortController();
-        const timeoutId = setTimeout(() => controller.abort(), 60000); // 60 second timeout
-
-        const response = await fetch(`${API_BASE_URL}/analyze`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(requestData),
-            signal: controller.signal
-        });
-
-        clearTimeout(timeoutId);
-
-        if (!response.ok) {
-            const errorData = await response.json().catch(() => ({}));
-            throw new Error(errorData.detail || `Server error: ${response.status}`);
-        }
-
-        const data = await response.json();
-
-        if (data.status === 'failed') {
-            throw new Error(data.error || 'Analysis failed');
-        }
-
-        displayResults(data);
-
+        await analyzeStream(requestData);
     } catch (error) {
         console.error('Error:', error);
         if (error.name === 'AbortError') {
-            showError('Analysis timed out. The server is taking too long to respond.');
+            showError('Analysis timed out. The server stopped responding.');
         } else {
             showError(error.message || 'Failed to analyze. Please check if the server is running.');
         }
@@ -90,6 +66,103 @@ analyzeForm.addEventListener('submit', async (e) => {
     }
 });
 
+// Stream analysis stages and render each one as it arrives
+async function analyzeStream(requestData) {
+    // Abort when the connection goes quiet, not while stages are still arriving
+    const controller = new AbortController();
+    let idleTimer = setTimeout(() => controller.abort(), STREAM_IDLE_TIMEOUT);
+    const resetIdleTimer = () => {
+        clearTimeout(idleTimer);
+        idleTimer = setTimeout(() => controller.abort(), STREAM_IDLE_TIMEOUT);
+    };
+
+    try {
+        await readAnalysisStream(requestData, controller.signal, resetIdleTimer);
+    } finally {
+        clearTimeout(idleTimer);
+    }
+}
+
+async function readAnalysisStream(requestData, signal, onActivity) {
+    const response = await fetch(`${API_BASE_URL}/analyze/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(requestData),
+        signal
+    });
+
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || `Server error: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const fetchedPlatforms = {};
+    let buffer = '';
+    let finished = false;
+
+    while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        onActivity();
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            // Comment-only events (keep-alives) carry no data
+            let event = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            const payload = data ? JSON.parse(data) : {};
+
+            switch (event) {
+                case 'platform':
+                    fetchedPlatforms[payload.platform] = payload;
+                    displayFetchedPlatforms(fetchedPlatforms);
+                    showResults();
+                    break;
+                case 'growth_metrics':
+                    displayGrowthMetrics(payload.growth_metrics || {});
+                    displayPlatformStats((payload.growth_metrics || {}).platform_stats || {});
+                    showResults();
+                    break;
+                case 'analysis':
+                    displayAnalysis(payload || {});
+                    break;
+                case 'weaknesses':
+                    displayWeaknesses(payload || {});
+                    break;
+                case 'tasks':
+                    displayTasks(payload || []);
+                    break;
+                case 'result':
+                    if (payload.status === 'failed') {
+                        throw new Error(payload.error || 'Analysis failed');
+                    }
+                    displayResults(payload);
+                    finished = true;
+                    break;
+                case 'error':
+                    throw new Error(payload.detail || `Server error: ${payload.status_code}`);
+            }
+        }
+    }
+
+    if (!finished) {
+        throw new Error('Connection closed before the analysis finished');
+    }
+}
+
 // Set Loading State
 function setLoading(isLoading) {
     analyzeBtn.disabled = isLoading;
@@ -113,7 +186,17 @@ function displayResults(data) {
     // Display platform stats
     displayPlatformStats(growthMetrics.platform_stats || {});
 
-    // Display AI analysis - handle nested structure from AnalyzerAgent
+    displayAnalysis(analysis);
+    displayWeaknesses(data.weaknesses || {});
+    displayAgentInsights(data);
+    displayTasks(data.tasks || []);
+
+    showResults();
+    resultsSection.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+}
+
+// Display AI analysis - handle nested structure from AnalyzerAgent
+function displayAnalysis(analysis) {
     let analysisData = analysis;
     if (analysis.analysis) {
         analysisData = analysis.analysis;
@@ -187,9 +270,10 @@ function displayResults(data) {
     } else {
         analysisContent.innerHTML = '<p class="no-data">No analysis available</p>';
     }
+}
 
-    // Display Weaknesses - handle nested structure from WeaknessDetectorAgent
-    const weaknessesData = data.weaknesses || {};
+// Display Weaknesses - handle nested structure from WeaknessDetectorAgent
+function displayWeaknesses(weaknessesData) {
     const weaknessContent = document.getElementById('weaknessContent');
     const weaknessSection = document.getElementById('weaknessSection');
 
@@ -252,8 +336,10 @@ function displayResults(data) {
         weaknessContent.innerHTML = weaknessHtml || '<p class="no-data">No specific weaknesses detected. Great job!</p>';
         weaknessSection.style.display = 'block';
     }
+}
 
-    // Display Agent Insights
+// Display Agent Insights
+function displayAgentInsights(data) {
     const agentExecution = data.agent_execution || {};
     const agentInsights = document.getElementById('agentInsights');
     if (agentInsights) {
@@ -267,6 +353,11 @@ function displayResults(data) {
                     <span style="color: var(--text-secondary);">Execution Mode:</span>
                     <span style="color: var(--text-primary);">${escapeHtml(agentExecution.execution_mode || 'Sequential')}</span>
                 </div>
+                ${data.partial ? `
+                <div style="display: flex; justify-content: space-between;">
+                    <span style="color: var(--text-secondary);">Partial Result:</span>
+                    <span style="color: #fbbf24;">Fallback used for ${escapeHtml((agentExecution.timed_out || []).join(', '))}</span>
+                </div>` : ''}
                 <div style="margin-top: 0.5rem;">
                     <span style="color: var(--text-secondary);">Active Agents:</span>
                     <div style="display: flex; flex-wrap: wrap; gap: 0.5rem; margin-top: 0.25rem;">
@@ -277,16 +368,21 @@ function displayResults(data) {
         `;
     }
 
-    // Display tasks
-    const tasks = data.tasks || [];
+}
+
+// Display tasks
+function displayTasks(tasks) {
     if (tasks.length > 0) {
         tasksList.innerHTML = tasks.map(task => `
             <div class="task-item">
                 <div class="task-info">
-                    <div class="task-title">${escapeHtml(task.title || 'Untitled Task')}</div>
+                    <div class="task-title">${task.url && /^https:\/\//.test(task.url)
+                        ? `<a href="${escapeHtml(task.url)}" target="_blank" rel="noopener">${escapeHtml(task.title || 'Untitled Task')}</a>`
+                        : escapeHtml(task.title || 'Untitled Task')}</div>
                     <div class="task-meta">
                         ${task.topic ? `<span style="margin-right: 10px;"><i class="fas fa-tag"></i> ${escapeHtml(task.topic)}</span>` : ''}
-                        ${task.difficulty ? `<span><i class="fas fa-layer-group"></i> ${escapeHtml(task.difficulty)}</span>` : ''}
+                        ${task.difficulty ? `<span style="margin-right: 10px;"><i class="fas fa-layer-group"></i> ${escapeHtml(task.difficulty)}</span>` : ''}
+                        ${task.rating ? `<span><i class="fas fa-chart-line"></i> ${escapeHtml(String(task.rating))}</span>` : ''}
                     </div>
                     ${task.reason || task.reasoning ? `<div class="task-reason">"${escapeHtml(task.reason || task.reasoning)}"</div>` : ''}
                 </div>
@@ -298,10 +394,23 @@ function displayResults(data) {
     } else {
         tasksList.innerHTML = '<p style="color: var(--text-secondary);">No specific tasks recommended at this time.</p>';
     }
+}
 
-    // Show results section
-    resultsSection.style.display = 'block';
-    resultsSection.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+// Platforms fetched so far, shown until growth metrics replace them
+function displayFetchedPlatforms(fetched) {
+    platformStats.innerHTML = Object.values(fetched).map(item => `
+        <div class="platform-card">
+            <div class="platform-name">
+                <i class="fas fa-code"></i> ${escapeHtml(item.platform.toUpperCase())}
+            </div>
+            <div class="platform-data">
+                <div class="stat-row">
+                    <span class="stat-label">Submissions fetched</span>
+                    <span class="stat-val">${item.activities || 0}</span>
+                </div>
+            </div>
+        </div>
+    `).join('');
 }
 
 // Display Growth Metrics
@@ -373,9 +482,20 @@ function hideError() {
     errorSection.style.display = 'none';
 }
 
+// Show Results
+function showResults() {
+    resultsSection.style.display = 'block';
+}
+
 // Hide Results
 function hideResults() {
     resultsSection.style.display = 'none';
+    analysisContent.innerHTML = '<p class="no-data">Analyzing...</p>';
+    tasksList.innerHTML = '';
+    metricsGrid.innerHTML = '';
+    platformStats.innerHTML = '';
+    const weaknessSection = document.getElementById('weaknessSection');
+    if (weaknessSection) weaknessSection.style.display = 'none';
 }
 
 // Escape HTML to prevent XSS
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from fastapi.testclient import TestClient
+
+# The app opens its session database at import time; keep it out of data/
+_app_data = tempfile.TemporaryDirectory()
+os.environ.setdefault("SESSION_DB_PATH", os.path.join(_app_data.name, "sessions.db"))
+
+from libs.sessions import PersistentSessionService
+from services.gateway import app as app_mod
+
+HANDLES = {"codeforces": "tourist", "leetcode": "tourist"}
+
+
+async def fake_fetch_all(handles, force_refresh=False):
+    return {
+        "activities": [
+            {"platform": platform, "id": f"{platform}-1", "verdict": "ACCEPTED", "tags": ["dp"],
+             "timestamp": 1700000000}
+            for platform in handles
+        ],
+        "stats": {platform: {"solved": 1, "total": 1} for platform in handles},
+    }
+
+
+async def no_data(handles, force_refresh=False):
+    return {"activities": [], "stats": {}}
+
+
+class FakeAnalyzer:
+    def estimate_skill_level(self, growth_metrics):
+        return "Intermediate"
+
+
+class FakeOrchestrator:
+    """Reports each agent stage like OrchestratorAgent.run does."""
+
+    analyzer = FakeAnalyzer()
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.runs = 0
+
+    async def run(self, user_id, processed, mode="parallel", budget=None, on_stage=None, reuse=None):
+        self.runs += 1
+        await asyncio.sleep(self.delay)
+        result = {
+            "status": "success",
+            "analysis": {"status": "success", "analysis": {"skill_level": "Intermediate"}},
+            "weaknesses": {"status": "success", "weaknesses": {"weak_topics": ["dp"]}},
+            "tasks": [{"title": "Practice dp", "topic": "dp"}],
+        }
+        for stage in ("analysis", "weaknesses", "tasks"):
+            if on_stage:
+                on_stage(stage, result[stage])
+        return result
+
+
+class TestAnalyzeStream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sessions = PersistentSessionService(os.path.join(self.tmp.name, "sessions.db"))
+        self.orchestrator = FakeOrchestrator()
+        self.patches = [
+            patch.object(app_mod, "session_service", self.sessions),
+            patch.object(app_mod, "sessions", self.sessions.aio),
+            patch.object(app_mod.job_queue, "store", self.sessions.aio),
+            patch.object(app_mod, "orchestrator", self.orchestrator),
+            patch.object(app_mod, "fetch_all", fake_fetch_all),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+        self.sessions.close()
+        self.tmp.cleanup()
+
+    def stream(self, client, **overrides):
+        """POST /analyze/stream and return the (event, data) pairs in order."""
+        events = []
+        self.comments = []
+        body = {"user_id": "alice", "handles": HANDLES, **overrides}
+        with client.stream("POST", "/analyze/stream", json=body) as response:
+            self.assertEqual(response.headers["content-type"].split(";")[0], "text/event-stream")
+            event = None
+            for line in response.iter_lines():
+                if line.startswith(":"):
+                    self.comments.append(line)
+                elif line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    events.append((event, json.loads(line[len("data: "):])))
+        return events
+
+    def test_events_arrive_in_stage_order(self):
+        with TestClient(app_mod.app) as client:
+            events = self.stream(client)
+
+        names = [name for name, _ in events]
+        self.assertEqual(names, ["job", "platform", "platform", "growth_metrics",
+                                 "analysis", "weaknesses", "tasks", "result"])
+        self.assertCountEqual([data["platform"] for name, data in events if name == "platform"], HANDLES)
+        self.assertEqual(events[-1][1]["status"], "success")
+        self.assertIn("session_id", events[-1][1])
+
+    def test_precomputed_result_is_replayed(self):
+        with TestClient(app_mod.app) as client:
+            self.assertEqual(client.post("/analyze", json={"user_id": "alice", "handles": HANDLES}).status_code, 200)
+            events = self.stream(client)
+
+        self.assertEqual([name for name, _ in events],
+                         ["job", "growth_metrics", "analysis", "weaknesses", "tasks", "result"])
+        self.assertTrue(events[-1][1]["precomputed"])
+        self.assertEqual(events[4][1], [{"title": "Practice dp", "topic": "dp"}])
+        self.assertEqual(self.orchestrator.runs, 1)
+
+    def test_failure_ends_with_error_event(self):
+        with patch.object(app_mod, "fetch_all", no_data), TestClient(app_mod.app) as client:
+            events = self.stream(client)
+
+        self.assertEqual([name for name, _ in events], ["job", "error"])
+        self.assertEqual(events[-1][1]["status_code"], 404)
+
+    def test_missing_job_is_a_server_error(self):
+        async def lost(job_id):
+            return None
+
+        with patch.object(app_mod.job_queue, "wait", lost), TestClient(app_mod.app) as client:
+            response = client.post("/analyze", json={"user_id": "alice", "handles": HANDLES})
+            events = self.stream(client)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(events[-1][0], "error")
+        self.assertEqual(events[-1][1]["status_code"], 500)
+
+    def test_slow_stage_sends_keepalives(self):
+        self.orchestrator.delay = 0.3
+        with patch.object(app_mod, "SSE_KEEPALIVE_INTERVAL", 0.05), TestClient(app_mod.app) as client:
+            events = self.stream(client)
+
+        self.assertGreaterEqual(len(self.comments), 2)
+        self.assertEqual([name for name, _ in events][-4:], ["analysis", "weaknesses", "tasks", "result"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.fetcher import atcoder_fetcher
+from services.fetcher.json_stream import iter_json_array
+from services.fetcher.sync_store import SyncStore
+
+
+class ChunkedStream:
+    """Async byte stream returning small fixed-size chunks."""
+
+    def __init__(self, body: bytes, chunk: int = 7):
+        self.body = body
+        self.chunk = chunk
+        self.offset = 0
+
+    async def read(self, n: int) -> bytes:
+        size = min(n, self.chunk)
+        data = self.body[self.offset:self.offset + size]
+        self.offset += size
+        return data
+
+
+class SplitStream:
+    """Async byte stream returning a fixed list of chunks."""
+
+    def __init__(self, chunks):
+        # An empty read means EOF, so drop empty chunks
+        self.chunks = [chunk for chunk in chunks if chunk]
+
+    async def read(self, n: int) -> bytes:
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+async def collect_array(stream, chunk_size=64 * 1024):
+    return [item async for item in iter_json_array(stream, chunk_size=chunk_size)]
+
+
+JSON_ARRAY_FIXTURES = [
+    b'[]',
+    b' [ ] ',
+    b'[-3.5, 1e10, 2E-3, 0, -0, 12345]',
+    b'[true,false,null, "x\\u00e9", "\xc3\xa9\xe2\x9c\x93"]',
+    b'[{"a": [1, 2.5e-3, {"b": null}]}, [], [[-7]], "]", ","]',
+    b'[\n  1,\n  -0.25E+2\n]\n',
+]
+
+MALFORMED_JSON_ARRAYS = [b'[1 2]', b'[1,,2]', b'[,1]', b'[1,]', b'[-3.]', b'[truex]', b'{"a": 1}', b'[1, 2']
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.content = ChunkedStream(body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeKenkoooo:
+    """Serves submissions with epoch_second >= from_second, capped per page."""
+
+    def __init__(self, submissions, page_limit=500):
+        self.submissions = submissions
+        self.page_limit = page_limit
+        self.from_seconds = []
+
+    def get(self, url, params=None, **kwargs):
+        self.from_seconds.append(params["from_second"])
+        page = [s for s in self.submissions if s["epoch_second"] >= params["from_second"]][:self.page_limit]
+        return FakeResponse(200, json.dumps(page).encode())
+
+
+def make_submission(i):
+    return {"id": i, "epoch_second": 1000 + i, "problem_id": f"abc{i}_a",
+            "contest_id": f"abc{i}", "result": "AC", "language": "C++"}
+
+
+async def fake_user_info(session, url, params):
+    return 200, {"rating": 1200, "highest_rating": 1300, "rank": 10, "accepted_count": 5}
+
+
+class TestJsonStream(unittest.TestCase):
+    def test_decodes_array_across_chunk_boundaries(self):
+        data = [{"id": i, "name": "é✓" * (i % 4), "vals": [1, 2.5, None, True]} for i in range(40)] + [12345, "x", []]
+        body = json.dumps(data, indent=1).encode()
+
+        async def collect():
+            return [item async for item in iter_json_array(ChunkedStream(body, 3), chunk_size=3)]
+
+        self.assertEqual(asyncio.run(collect()), data)
+
+    def test_rejects_truncated_array(self):
+        async def collect():
+            return [item async for item in iter_json_array(ChunkedStream(b'[{"a": 1}, 2'))]
+
+        with self.assertRaises(ValueError):
+            asyncio.run(collect())
+
+    def test_every_split_point_decodes_the_same(self):
+        for body in JSON_ARRAY_FIXTURES:
+            expected = json.loads(body)
+            for offset in range(len(body) + 1):
+                with self.subTest(body=body, offset=offset):
+                    stream = SplitStream([body[:offset], body[offset:]])
+                    self.assertEqual(asyncio.run(collect_array(stream)), expected)
+            with self.subTest(body=body, chunk_size=1):
+                self.assertEqual(asyncio.run(collect_array(ChunkedStream(body, 1), chunk_size=1)), expected)
+
+    def test_rejects_malformed_arrays_at_every_split_point(self):
+        for body in MALFORMED_JSON_ARRAYS:
+            for offset in range(len(body) + 1):
+                with self.subTest(body=body, offset=offset):
+                    with self.assertRaises(ValueError):
+                        asyncio.run(collect_array(SplitStream([body[:offset], body[offset:]])))
+
+
+class TestAtCoderIncrementalSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SyncStore(os.path.join(self.tmp.name, "sync.db"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_fetch(self, fake):
+        async def fetch():
+            result = await atcoder_fetcher.fetch_atcoder("chokudai")
+            self.request_from_seconds = list(fake.from_seconds)
+            await asyncio.gather(*atcoder_fetcher._backfills.values())
+            return result
+
+        with patch.object(atcoder_fetcher, "get_http_session", return_value=fake), \
+                patch.object(atcoder_fetcher, "get_sync_store", return_value=self.store), \
+                patch.object(atcoder_fetcher, "_get_json", fake_user_info), \
+                patch.object(atcoder_fetcher, "invalidate_cached_profile") as self.invalidate, \
+                patch.object(atcoder_fetcher, "KENKOOOO_PAGE_LIMIT", fake.page_limit):
+            return asyncio.run(fetch())
+
+    def test_first_sync_pages_full_history_then_advances_watermark(self):
+        fake = FakeKenkoooo([make_submission(i) for i in range(1, 251)], page_limit=100)
+        result = self.run_fetch(fake)
+
+        # Capped pages resume at their newest second, which is fetched again
+        self.assertEqual(fake.from_seconds, [0, 1100, 1199])
+        self.assertEqual(self.store.get_cursor("atcoder", "chokudai"), 1251)
+        self.assertEqual(len(result["activities"]), 100)
+        # The third page came from the background backfill, after the request returned
+        newest = self.store.recent_activities("atcoder", "chokudai", 1)
+        self.assertEqual(newest[0]["id"], "abc250-abc250_a")
+        self.assertEqual(result["stats"]["rating"], 1200)
+
+    def test_request_path_pages_are_capped_and_rest_is_backfilled(self):
+        fake = FakeKenkoooo([make_submission(i) for i in range(1, 351)], page_limit=100)
+        result = self.run_fetch(fake)
+
+        # The request pulls REQUEST_SYNC_PAGES pages; the backfill finishes the history
+        self.assertEqual(self.request_from_seconds, [0, 1100])
+        self.assertEqual(result["activities"][0]["id"], "abc199-abc199_a")
+        self.assertEqual(fake.from_seconds[2:], [1199, 1298])
+        self.assertEqual(self.store.get_cursor("atcoder", "chokudai"), 1351)
+        self.invalidate.assert_called_once_with("atcoder", "chokudai")
+        self.assertEqual(atcoder_fetcher._backfills, {})
+
+        fake.from_seconds = []
+        result = self.run_fetch(fake)
+        self.assertEqual(fake.from_seconds, [1351])
+        self.assertEqual(result["activities"][0]["id"], "abc350-abc350_a")
+
+    def test_capped_page_keeps_rest_of_its_last_second(self):
+        # Five submissions share second 1003, but the page cap cuts them after three
+        submissions = [make_submission(i) for i in range(1, 4)]
+        submissions += [dict(make_submission(i), epoch_second=1003) for i in range(4, 8)]
+        fake = FakeKenkoooo(submissions, page_limit=5)
+        self.run_fetch(fake)
+
+        # The second page is all second 1003 and still capped, so the watermark moves past it
+        self.assertEqual(fake.from_seconds, [0, 1003, 1004])
+        self.assertEqual(len(self.store.recent_activities("atcoder", "chokudai", 1000)), 7)
+        self.assertEqual(self.store.get_cursor("atcoder", "chokudai"), 1004)
+
+    def test_incremental_pull_uses_watermark(self):
+        fake = FakeKenkoooo([make_submission(i) for i in range(1, 11)])
+        self.run_fetch(fake)
+
+        fake.submissions.append(make_submission(11))
+        fake.from_seconds = []
+        result = self.run_fetch(fake)
+
+        self.assertEqual(fake.from_seconds, [1011])
+        self.assertEqual(self.store.get_cursor("atcoder", "chokudai"), 1012)
+        self.assertEqual(len(result["activities"]), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
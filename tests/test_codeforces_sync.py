@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.fetcher import codeforces_fetcher
+from services.fetcher.sync_store import SyncStore
+
+
+def make_submission(sid):
+    return {
+        "id": sid,
+        "creationTimeSeconds": 1000 + sid,
+        "verdict": "OK",
+        "problem": {"contestId": 1, "index": str(sid), "name": f"P{sid}", "tags": ["dp"]}
+    }
+
+
+class FakeCodeforces:
+    """Serves user.status pages from a newest-first submission list."""
+
+    def __init__(self, submissions, fail_from=None):
+        self.submissions = submissions
+        self.fail_from = fail_from
+        self.status_calls = []
+
+    async def get_json(self, session, url):
+        if "user.info" in url:
+            return 200, {"status": "OK", "result": [{"rating": 1500, "rank": "specialist"}]}
+        params = dict(part.split("=") for part in url.split("?")[1].split("&"))
+        start, count = int(params["from"]), int(params["count"])
+        self.status_calls.append((start, count))
+        if self.fail_from is not None and start >= self.fail_from:
+            return 503, {}
+        return 200, {"status": "OK", "result": self.submissions[start - 1:start - 1 + count]}
+
+
+class TestCodeforcesIncrementalSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SyncStore(os.path.join(self.tmp.name, "sync.db"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_fetch(self, fake):
+        with patch.object(codeforces_fetcher, "_get_json", fake.get_json), \
+                patch.object(codeforces_fetcher, "get_sync_store", return_value=self.store), \
+                patch.object(codeforces_fetcher, "get_http_session", return_value=None):
+            return asyncio.run(codeforces_fetcher.fetch_codeforces("Tourist"))
+
+    def test_first_sync_requests_only_newest_page(self):
+        fake = FakeCodeforces([make_submission(i) for i in range(500, 0, -1)])
+        result = self.run_fetch(fake)
+
+        self.assertEqual(fake.status_calls, [(1, codeforces_fetcher.SUBMISSIONS_PAGE_SIZE)])
+        self.assertEqual(len(result["activities"]), 100)
+        self.assertEqual(result["activities"][0]["id"], "1-500")
+        self.assertEqual(self.store.get_cursor("codeforces", "tourist"), 500)
+        self.assertEqual(result["stats"]["rating"], 1500)
+
+    def test_incremental_sync_stops_at_seen_submission(self):
+        fake = FakeCodeforces([make_submission(i) for i in range(500, 0, -1)])
+        self.run_fetch(fake)
+
+        # 150 new submissions arrive: needs two pages, then stops at id 500
+        fake.submissions = [make_submission(i) for i in range(650, 0, -1)]
+        fake.status_calls = []
+        result = self.run_fetch(fake)
+
+        self.assertEqual(fake.status_calls, [(1, 100), (101, 100)])
+        self.assertEqual(self.store.get_cursor("codeforces", "tourist"), 650)
+        self.assertEqual(result["activities"][0]["id"], "1-650")
+        self.assertEqual(len(self.store.recent_activities("codeforces", "tourist", 1000)), 250)
+
+    def test_partial_sync_keeps_cursor(self):
+        fake = FakeCodeforces([make_submission(i) for i in range(500, 0, -1)])
+        self.run_fetch(fake)
+
+        # 250 new submissions, but the third page fails
+        fake.submissions = [make_submission(i) for i in range(750, 0, -1)]
+        fake.fail_from = 201
+        self.run_fetch(fake)
+
+        self.assertEqual(self.store.get_cursor("codeforces", "tourist"), 500)
+        self.assertEqual(len(self.store.recent_activities("codeforces", "tourist", 1000)), 300)
+
+        # The next sync reads down to the old cursor and fills the gap
+        fake.fail_from = None
+        self.run_fetch(fake)
+        self.assertEqual(self.store.get_cursor("codeforces", "tourist"), 750)
+        self.assertEqual(len(self.store.recent_activities("codeforces", "tourist", 1000)), 350)
+
+    def test_sync_capped_by_page_limit_advances_cursor(self):
+        fake = FakeCodeforces([make_submission(i) for i in range(10, 0, -1)])
+        self.run_fetch(fake)
+
+        new_count = codeforces_fetcher.MAX_SYNC_PAGES * codeforces_fetcher.SUBMISSIONS_PAGE_SIZE + 50
+        fake.submissions = [make_submission(i) for i in range(10 + new_count, 0, -1)]
+        fake.status_calls = []
+        self.run_fetch(fake)
+
+        self.assertEqual(len(fake.status_calls), codeforces_fetcher.MAX_SYNC_PAGES)
+        self.assertEqual(self.store.get_cursor("codeforces", "tourist"), 10 + new_count)
+
+        # The next sync starts from the new cursor instead of rescanning every page
+        fake.status_calls = []
+        result = self.run_fetch(fake)
+        self.assertEqual(fake.status_calls, [(1, codeforces_fetcher.SUBMISSIONS_PAGE_SIZE)])
+        self.assertEqual(result["activities"][0]["id"], f"1-{10 + new_count}")
+
+    def test_store_uses_wal(self):
+        mode = self.store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from libs.cache import TieredCache
+from services.fetcher import extraction_cache, gemini_scraper
+
+PAGE = '<div class="rating-number">1850</div><div class="rating-star">4★</div>'
+
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    async def json(self):
+        return {"candidates": [{"content": {"parts": [{"text": json.dumps(self.stats)}]}}]}
+
+
+class FakeSession:
+    def __init__(self, stats):
+        self.stats = stats
+        self.calls = 0
+
+    @asynccontextmanager
+    async def post(self, url, **kwargs):
+        self.calls += 1
+        yield FakeResponse(self.stats)
+
+
+@asynccontextmanager
+async def no_limit(url, max_wait=None):
+    yield
+
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TieredCache("gemini_extraction", db_path=os.path.join(self.tmp.name, "cache.db"))
+        self.session = FakeSession({"rating": 1850})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def extract(self, page=PAGE, prompt_version=None, username="bob"):
+        with patch.object(extraction_cache, "_cache", self.cache), \
+                patch.object(gemini_scraper, "GEMINI_API_KEY", "test-key"), \
+                patch.object(gemini_scraper, "PROMPT_VERSION", prompt_version or gemini_scraper.PROMPT_VERSION), \
+                patch.object(gemini_scraper, "get_http_session", lambda: self.session), \
+                patch.object(gemini_scraper, "governed", no_limit):
+            return asyncio.run(gemini_scraper.extract_stats_with_gemini("codechef", username, page))
+
+    def test_unchanged_page_skips_gemini(self):
+        self.assertEqual(self.extract(), {"rating": 1850})
+        self.assertEqual(self.extract(), {"rating": 1850})
+        self.assertEqual(self.session.calls, 1)
+
+    def test_markup_only_changes_still_hit(self):
+        self.extract()
+        self.extract(PAGE.replace('<div class="rating-star">', '<div class="rating-star" style="x">'))
+        self.assertEqual(self.session.calls, 1)
+
+    def test_changed_content_misses(self):
+        self.extract()
+        self.extract(PAGE.replace("1850", "1900"))
+        self.assertEqual(self.session.calls, 2)
+
+    def test_other_user_with_same_page_misses(self):
+        self.extract()
+        self.extract(username="alice")
+        self.assertEqual(self.session.calls, 2)
+
+    def test_prompt_version_change_invalidates(self):
+        self.extract()
+        self.extract(prompt_version="new-prompt")
+        self.assertEqual(self.session.calls, 2)
+
+    def test_failed_extractions_are_not_cached(self):
+        self.session.stats = {}
+        self.extract()
+        self.extract()
+        self.assertEqual(self.session.calls, 2)
+
+    def test_default_cache_is_bounded_on_disk(self):
+        with patch.object(extraction_cache, "_cache", None), \
+                patch.object(extraction_cache, "TieredCache",
+                             lambda *args, **kwargs: TieredCache(*args, db_path=self.cache.disk.db_path, **kwargs)):
+            cache = extraction_cache._get_cache()
+
+        self.assertEqual(cache.default_ttl, extraction_cache.EXTRACTION_CACHE_TTL)
+        self.assertEqual(cache.max_stale, 0)
+        self.assertEqual(cache.max_disk_entries, extraction_cache.EXTRACTION_CACHE_MAX_ROWS)
+
+
+if __name__ == '__main__':
+    unittest.main()
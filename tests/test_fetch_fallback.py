@@ -0,0 +1,113 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from libs.cache import TieredCache
+from services.fetcher import codeforces_fetcher, profile_cache
+from services.fetcher.rate_limiter import RateLimitExceeded
+
+
+async def failing_fetch(handle):
+    raise RuntimeError("upstream 503")
+
+
+async def empty_fetch(handle):
+    return {"activities": [], "stats": {}}
+
+
+class TestConcurrentScrapeFallback(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TieredCache("profile", db_path=os.path.join(self.tmp.name, "cache.db"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_fetch_all(self, fake_scrape, handles, deadline=5.0):
+        fetchers = {"codeforces": failing_fetch, "leetcode": empty_fetch, "atcoder": failing_fetch}
+        with patch.object(profile_cache, "_cache", self.cache), \
+                patch.dict(codeforces_fetcher.PLATFORM_FETCHERS, fetchers), \
+                patch.object(codeforces_fetcher, "scrape_profile", fake_scrape), \
+                patch.object(codeforces_fetcher, "SCRAPE_DEADLINE", deadline):
+            start = time.monotonic()
+            result = asyncio.run(codeforces_fetcher.fetch_all(handles))
+            return result, time.monotonic() - start
+
+    def test_scrapes_run_concurrently(self):
+        async def slow_scrape(platform, handle):
+            await asyncio.sleep(0.2)
+            return {"activities": [], "stats": {"rating": len(platform)}}
+
+        result, elapsed = self.run_fetch_all(
+            slow_scrape, {"codeforces": "a", "leetcode": "b", "atcoder": "c"})
+
+        self.assertEqual(set(result["stats"]), {"codeforces", "leetcode", "atcoder"})
+        self.assertLess(elapsed, 0.5)
+
+    def test_deadline_drops_slow_scrapes(self):
+        async def scrape(platform, handle):
+            await asyncio.sleep(5 if platform == "atcoder" else 0)
+            return {"activities": [], "stats": {"rating": 1}}
+
+        result, elapsed = self.run_fetch_all(
+            scrape, {"codeforces": "a", "atcoder": "c"}, deadline=0.2)
+
+        self.assertEqual(set(result["stats"]), {"codeforces"})
+        self.assertLess(elapsed, 1.0)
+
+    def test_concurrent_callers_share_one_scrape(self):
+        scrapes = []
+
+        async def scrape(platform, handle):
+            scrapes.append(platform)
+            await asyncio.sleep(0.1)
+            return {"activities": [], "stats": {"rating": 1}}
+
+        async def run():
+            return await asyncio.gather(*(
+                codeforces_fetcher.fetch_all({"codeforces": "a"}, force_refresh=True) for _ in range(5)))
+
+        fetchers = {"codeforces": failing_fetch}
+        with patch.object(profile_cache, "_cache", self.cache), \
+                patch.dict(codeforces_fetcher.PLATFORM_FETCHERS, fetchers), \
+                patch.object(codeforces_fetcher, "scrape_profile", scrape), \
+                patch.object(codeforces_fetcher, "set_cached_profile",
+                             wraps=codeforces_fetcher.set_cached_profile) as cache_write:
+            results = asyncio.run(run())
+
+        self.assertEqual(scrapes, ["codeforces"])
+        self.assertEqual(cache_write.call_count, 1)
+        self.assertTrue(all(result["stats"] == {"codeforces": {"rating": 1}} for result in results))
+
+    def test_rate_limited_fetch_serves_cache_without_scraping(self):
+        scrapes = []
+
+        async def throttled_fetch(handle):
+            raise RateLimitExceeded("codeforces: no request slot within deadline")
+
+        async def scrape(platform, handle):
+            scrapes.append(platform)
+            return {"activities": [], "stats": {"rating": 1}}
+
+        self.cache.set("codeforces:a", {"activities": [], "stats": {"rating": 1400}}, ttl=0)
+        fetchers = {"codeforces": throttled_fetch, "atcoder": throttled_fetch}
+        with patch.object(profile_cache, "_cache", self.cache), \
+                patch.dict(codeforces_fetcher.PLATFORM_FETCHERS, fetchers), \
+                patch.object(codeforces_fetcher, "scrape_profile", scrape):
+            result = asyncio.run(codeforces_fetcher.fetch_all({"codeforces": "a", "atcoder": "c"}, force_refresh=True))
+
+        self.assertEqual(scrapes, [])
+        self.assertEqual(result["stats"], {"codeforces": {"rating": 1400}})
+        # Nothing new was written over the stale entry
+        self.assertEqual(self.cache.get("codeforces:a", allow_stale=True).ttl, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import copy
+import os
+import sys
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.preprocessor.fingerprint import STAGES, changed_stages, compute_fingerprint
+
+PROCESSED = {
+    "activities": [
+        {"platform": "codeforces", "id": "1850-A", "verdict": "OK", "tags": ["implementation"], "timestamp": 100},
+        {"platform": "codeforces", "id": "1842-C", "verdict": "WRONG_ANSWER", "tags": ["dp"], "timestamp": 200},
+        {"platform": "leetcode", "id": "two-sum", "verdict": "ACCEPTED", "tags": [], "timestamp": 300},
+    ],
+    "growth_metrics": {
+        "platform_stats": {
+            "codeforces": {"solved": 1, "total": 2, "rating": 1400, "rank": "specialist", "languages": ["C++"]},
+            "leetcode": {"solved": 1, "total": 1, "ranking": 123456, "languages": ["Python"]},
+        },
+        "streak": {"current": 3, "longest": 5},
+        "days_active": 3,
+    },
+}
+
+
+class TestFingerprint(unittest.TestCase):
+    def fingerprint(self, processed, skill_level="Intermediate"):
+        return compute_fingerprint(processed, skill_level)
+
+    def test_stable_across_order_and_volume_counters(self):
+        changed = copy.deepcopy(PROCESSED)
+        changed["activities"].reverse()
+        changed["growth_metrics"]["streak"]["current"] = 0
+        changed["growth_metrics"]["platform_stats"]["leetcode"]["ranking"] = 120000
+
+        self.assertEqual(self.fingerprint(changed), self.fingerprint(PROCESSED))
+        self.assertEqual(changed_stages(self.fingerprint(PROCESSED), self.fingerprint(changed)), set())
+
+    def test_new_solve_reruns_weaknesses_and_tasks(self):
+        changed = copy.deepcopy(PROCESSED)
+        changed["activities"].append({"platform": "codeforces", "id": "1859-C", "verdict": "OK", "tags": ["math"]})
+        changed["growth_metrics"]["platform_stats"]["codeforces"]["solved"] = 2
+
+        previous, current = self.fingerprint(PROCESSED), self.fingerprint(changed)
+        # Only the accepted set differs, but per-tag success rates feed weakness detection
+        self.assertEqual(previous["attempts"], current["attempts"])
+        self.assertNotEqual(previous["solves"], current["solves"])
+        self.assertEqual(changed_stages(previous, current), {"weaknesses", "tasks"})
+
+    def test_new_failure_reruns_weaknesses_and_tasks(self):
+        changed = copy.deepcopy(PROCESSED)
+        changed["activities"].append({"platform": "codeforces", "id": "1859-C", "verdict": "TIME_LIMIT_EXCEEDED",
+                                      "tags": ["math"]})
+
+        self.assertEqual(changed_stages(self.fingerprint(PROCESSED), self.fingerprint(changed)),
+                         {"weaknesses", "tasks"})
+
+    def test_rating_or_skill_change_reruns_everything(self):
+        changed = copy.deepcopy(PROCESSED)
+        changed["growth_metrics"]["platform_stats"]["codeforces"]["rating"] = 1600
+
+        self.assertEqual(changed_stages(self.fingerprint(PROCESSED), self.fingerprint(changed)), set(STAGES))
+        self.assertEqual(changed_stages(self.fingerprint(PROCESSED), self.fingerprint(PROCESSED, "Advanced")),
+                         set(STAGES))
+
+    def test_missing_or_outdated_fingerprint_reruns_everything(self):
+        current = self.fingerprint(PROCESSED)
+        self.assertEqual(changed_stages(None, current), set(STAGES))
+        self.assertEqual(changed_stages({**current, "version": 0}, current), set(STAGES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.fetcher.html_reducer import HtmlReducer, reduce_html
+
+PAGE = """<html><head><title>Profile</title><style>.rating-number { color: red }</style></head>
+<body>
+<nav class="menu">Home Practice Compete</nav>
+<script>var html = '<div class="rating-number">9999</div>';</script>
+<div class="user-details"><span>Name:</span>   <b>Bob</b></div>
+<section class="rating-data-section">
+  <div class="rating-number">1850</div>
+  <div class="rating-star"><span>4&#9733;</span></div>
+  <div class="rating-ranks"><ul>
+    <li><a href="/ratings"><strong>1234</strong></a> Global Rank</li>
+    <li><strong>99</strong> Country Rank
+  </ul></div>
+</section>
+<p>Unrelated footer text</p>
+<footer>Copyright</footer>
+</body></html>"""
+
+
+class TestHtmlReducer(unittest.TestCase):
+    def test_strips_scripts_styles_and_navigation(self):
+        text = reduce_html(PAGE)
+        self.assertNotIn("9999", text)
+        self.assertNotIn("color", text)
+        self.assertNotIn("Home Practice", text)
+        self.assertNotIn("Copyright", text)
+        self.assertIn("Name: Bob", text)
+        self.assertIn("Unrelated footer text", text)
+
+    def test_keeps_only_stat_regions_when_found(self):
+        text = reduce_html(PAGE, ["rating-"])
+        self.assertEqual(text.splitlines(), ["1850", "4★", "1234 Global Rank", "99 Country Rank"])
+
+    def test_falls_back_to_page_text_without_regions(self):
+        self.assertIn("Name: Bob", reduce_html(PAGE, ["no-such-region"]))
+
+    def test_incremental_feed_matches_single_feed(self):
+        reducer = HtmlReducer(["rating-"])
+        for i in range(0, len(PAGE), 5):
+            reducer.feed(PAGE[i:i + 5])
+        self.assertEqual(reducer.text(), reduce_html(PAGE, ["rating-"]))
+
+    def test_output_is_capped(self):
+        page = "<div>" + "<p>stat line</p>" * 5000 + "</div>"
+        self.assertLessEqual(len(reduce_html(page, max_chars=500)), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
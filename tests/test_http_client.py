@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.fetcher import http_client
+
+
+class TestHttpClient(unittest.TestCase):
+    def test_session_is_shared_within_loop(self):
+        async def run():
+            await http_client.init_http_session()
+            first = http_client.get_http_session()
+            second = http_client.get_http_session()
+            self.assertIs(first, second)
+            self.assertFalse(first.closed)
+            await http_client.close_http_session()
+            self.assertTrue(first.closed)
+
+        asyncio.run(run())
+
+    def test_session_is_replaced_for_new_loop(self):
+        async def grab():
+            return http_client.get_http_session()
+
+        async def grab_and_close():
+            session = http_client.get_http_session()
+            await http_client.close_http_session()
+            return session
+
+        first = asyncio.run(grab())
+        second = asyncio.run(grab_and_close())
+        self.assertIsNot(first, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from libs.sessions import PersistentSessionService
+from services.gateway.job_queue import AnalysisJobQueue, QueueFullError
+
+
+class HandlerError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class TestAnalysisJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PersistentSessionService(os.path.join(self.tmp.name, "sessions.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_job_result_is_persisted(self):
+        async def handler(job, on_stage=None):
+            return {"user": job["request"]["user_id"], "status": "success"}
+
+        async def run():
+            queue = AnalysisJobQueue(self.store.aio, handler, workers=2)
+            await queue.start()
+            job = await queue.submit("alice", {"user_id": "alice"})
+            self.assertEqual(job["status"], "queued")
+            # A worker may already have picked it up
+            self.assertIn((await queue.get(job["job_id"]))["status"], ("queued", "running", "succeeded"))
+            finished = await queue.wait(job["job_id"])
+            await queue.stop()
+            return job["job_id"], finished
+
+        job_id, finished = asyncio.run(run())
+        self.assertEqual(finished["status"], "succeeded")
+        self.assertEqual(finished["result"], {"user": "alice", "status": "success"})
+        self.assertEqual(self.store.get_job(job_id)["result"]["user"], "alice")
+        self.assertIsNotNone(finished["finished_at"])
+
+    def test_failure_keeps_status_code(self):
+        async def handler(job, on_stage=None):
+            raise HandlerError(404, "No coding data found")
+
+        async def run():
+            queue = AnalysisJobQueue(self.store.aio, handler, workers=1)
+            await queue.start()
+            finished = await queue.wait((await queue.submit("bob", {}))["job_id"])
+            await queue.stop()
+            return finished
+
+        finished = asyncio.run(run())
+        self.assertEqual(finished["status"], "failed")
+        self.assertEqual(finished["status_code"], 404)
+        self.assertEqual(finished["error"], "No coding data found")
+
+    def test_store_failure_resolves_waiter(self):
+        update_job = self.store.update_job
+
+        def failing_update(job_id, status, **kwargs):
+            # Neither outcome can be recorded
+            if status in ("succeeded", "failed"):
+                raise RuntimeError("database is locked")
+            return update_job(job_id, status, **kwargs)
+
+        async def handler(job, on_stage=None):
+            return {}
+
+        async def run():
+            queue = AnalysisJobQueue(self.store.aio, handler, workers=1)
+            await queue.start()
+            try:
+                job = await queue.submit("carl", {})
+                with self.assertRaises(RuntimeError):
+                    await asyncio.wait_for(queue.wait(job["job_id"]), timeout=2)
+            finally:
+                await queue.stop()
+
+        with patch.object(self.store, "update_job", failing_update):
+            asyncio.run(run())
+
+    def test_worker_pool_bounds_concurrency(self):
+        running = 0
+        peak = 0
+
+        async def handler(job, on_stage=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {}
+
+        async def run():
+            queue = AnalysisJobQueue(self.store.aio, handler, workers=2)
+            await queue.start()
+            ids = [(await queue.submit(f"user{i}", {}))["job_id"] for i in range(6)]
+            await asyncio.gather(*(queue.wait(job_id) for job_id in ids))
+            await queue.stop()
+
+        asyncio.run(run())
+        self.assertEqual(peak, 2)
+
+    def test_unfinished_jobs_survive_restart(self):
+        handled = []
+
+        async def handler(job, on_stage=None):
+            handled.append(job["job_id"])
+            return {}
+
+        queued = self.store.create_job("queued-job", "carol", {})
+        interrupted = self.store.create_job("running-job", "dave", {})
+        self.store.update_job(interrupted["job_id"], "running")
+
+        async def run():
+            queue = AnalysisJobQueue(self.store.aio, handler, workers=1)
+            await queue.start()
+            await queue._queue.join()
+            await queue.stop()
+
+        asyncio.run(run())
+        self.assertEqual(handled, ["queued-job", "running-job"])
+        self.assertEqual(self.store.get_job(queued["job_id"])["status"], "succeeded")
+        self.assertEqual(self.store.get_job(interrupted["job_id"])["status"], "succeeded")
+
+    def test_full_queue_rejects_jobs(self):
+        async def handler(job, on_stage=None):
+            return {}
+
+        async def run():
+            queue = AnalysisJobQueue(self.store.aio, handler, workers=1, max_queued=1)
+            await queue.start()
+            for task in queue._workers:
+                task.cancel()
+            await queue.submit("erin", {})
+            with self.assertRaises(QueueFullError):
+                await queue.submit("erin", {})
+            await queue.stop()
+
+        asyncio.run(run())
+
+    def test_expired_jobs_are_deleted_while_running(self):
+        async def handler(job, on_stage=None):
+            return {}
+
+        async def run():
+            queue = AnalysisJobQueue(self.store.aio, handler, workers=1, retention=0.2, cleanup_interval=0.05)
+            await queue.start()
+            job = await queue.submit("frank", {})
+            await queue.wait(job["job_id"])
+            self.assertIsNotNone(await queue.get(job["job_id"]))
+
+            # Deleted by the periodic cleanup, without a restart
+            await asyncio.sleep(0.6)
+            self.assertIsNone(await queue.get(job["job_id"]))
+            await queue.stop()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
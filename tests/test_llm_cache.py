@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from libs.cache import TieredCache
+from services.analyser.llm_cache import CachedLLMClient
+
+
+class FakeLLM:
+    def __init__(self, response="ok"):
+        self.response = response
+        self.calls = []
+
+    async def __call__(self, prompt, model_name="gemini-2.0-flash", **kwargs):
+        self.calls.append((prompt, model_name))
+        return self.response
+
+
+class TestCachedLLMClient(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "cache.db")
+        self.llm = FakeLLM()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def client(self, ttl=60):
+        return CachedLLMClient(self.llm, cache=TieredCache("llm_test", db_path=self.db_path), ttl=ttl)
+
+    def test_identical_prompts_hit_the_cache(self):
+        client = self.client()
+        self.assertEqual(asyncio.run(client("Analyze  this\n data", "gemini-2.0-flash")), "ok")
+        self.assertEqual(asyncio.run(client("Analyze this data ", "gemini-2.0-flash")), "ok")
+        self.assertEqual(len(self.llm.calls), 1)
+        self.assertEqual((client.hits, client.misses), (1, 1))
+
+    def test_model_is_part_of_the_key(self):
+        client = self.client()
+        asyncio.run(client("prompt", "gemini-2.0-flash"))
+        asyncio.run(client("prompt", "gemini-1.5-pro"))
+        self.assertEqual(len(self.llm.calls), 2)
+
+    def test_disk_tier_survives_restart(self):
+        asyncio.run(self.client()("prompt", "gemini-2.0-flash"))
+        client = self.client()
+        asyncio.run(client("prompt", "gemini-2.0-flash"))
+        self.assertEqual(len(self.llm.calls), 1)
+
+    def test_expired_entries_are_refetched(self):
+        client = self.client(ttl=0)
+        asyncio.run(client("prompt", "gemini-2.0-flash"))
+        asyncio.run(client("prompt", "gemini-2.0-flash"))
+        self.assertEqual(len(self.llm.calls), 2)
+
+    def test_errors_are_not_cached(self):
+        self.llm.response = "Error generating text after 3 attempts: boom"
+        client = self.client()
+        asyncio.run(client("prompt", "gemini-2.0-flash"))
+        asyncio.run(client("prompt", "gemini-2.0-flash"))
+        self.assertEqual(len(self.llm.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
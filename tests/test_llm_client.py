@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.analyser import llm_client
+
+
+class BlockingModel:
+    """Model with only the synchronous SDK call."""
+    delay = 0.3
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt):
+        time.sleep(self.delay)
+        return SimpleNamespace(text=f"echo: {prompt}", candidates=[])
+
+
+class AsyncModel(BlockingModel):
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(text=f"async: {prompt}", candidates=[])
+
+
+class TestNonBlockingLLMClient(unittest.TestCase):
+    def generate(self, model_cls, coro_fn):
+        with patch.object(llm_client, "GEMINI_API_KEY", "test-key"), \
+                patch.object(llm_client.genai, "GenerativeModel", model_cls), \
+                patch.object(llm_client, "_models", {}):
+            return asyncio.run(coro_fn())
+
+    def test_blocking_sdk_call_runs_off_the_event_loop(self):
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            tick_task = asyncio.create_task(ticker())
+            start = time.monotonic()
+            results = await asyncio.gather(*(llm_client.generate_text(f"p{i}") for i in range(3)))
+            elapsed = time.monotonic() - start
+            tick_task.cancel()
+            return results, elapsed, ticks
+
+        results, elapsed, ticks = self.generate(BlockingModel, scenario)
+        self.assertEqual(results, ["echo: p0", "echo: p1", "echo: p2"])
+        self.assertLess(elapsed, 0.8)  # concurrent, not 3 x 0.3s
+        self.assertGreater(ticks, 10)  # loop kept running meanwhile
+
+    def test_prefers_async_sdk_call(self):
+        result = self.generate(AsyncModel, lambda: llm_client.generate_text("hi"))
+        self.assertEqual(result, "async: hi")
+
+    def test_timeout_returns_error_after_retries(self):
+        start = time.monotonic()
+        result = self.generate(AsyncModel, lambda: llm_client.generate_text("hi", max_retries=2, timeout=0.05))
+        self.assertTrue(result.startswith("Error generating text after 2 attempts: timed out"))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_sdk_calls_go_through_the_gemini_governor(self):
+        # A full wait queue rejects at once
+        governor = llm_client.get_governor("gemini")
+        full = type(governor)("gemini_full", rate=1, burst=1, max_in_flight=1, max_queue=0)
+        calls = []
+
+        class CountingModel(AsyncModel):
+            async def generate_content_async(self, prompt):
+                calls.append(prompt)
+                return await super().generate_content_async(prompt)
+
+        with patch.object(llm_client, "get_governor", return_value=full) as get_governor:
+            result = self.generate(CountingModel, lambda: llm_client.generate_text("hi"))
+
+        get_governor.assert_called_with("gemini")
+        self.assertTrue(result.startswith("Error generating text: rate limited"))
+        self.assertEqual(calls, [])
+
+    def test_cancellation_propagates(self):
+        async def scenario():
+            task = asyncio.create_task(llm_client.generate_text("hi"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.generate(AsyncModel, scenario)
+
+
+class TestModelRegistry(unittest.TestCase):
+    def test_models_are_built_once_per_name_and_tools(self):
+        built = []
+
+        def factory(model_name, **kwargs):
+            built.append((model_name, "tools" in kwargs))
+            return SimpleNamespace(model_name=model_name)
+
+        with patch.object(llm_client.genai, "GenerativeModel", factory), \
+                patch.object(llm_client, "_models", {}):
+            first = llm_client.get_model("gemini-2.0-flash")
+            self.assertIs(llm_client.get_model("gemini-2.0-flash"), first)
+            self.assertIsNot(llm_client.get_model("gemini-2.0-flash", use_tools=True), first)
+            llm_client.get_model("gemini-2.0-flash", use_tools=True)
+            llm_client.get_model("gemini-1.5-pro")
+
+        self.assertEqual(built, [("gemini-2.0-flash", False), ("gemini-2.0-flash", True), ("gemini-1.5-pro", False)])
+
+    def test_tool_schema_is_converted_once(self):
+        names = [decl["function_declarations"][0]["name"] for decl in llm_client.GEMINI_TOOLS]
+        self.assertEqual(names, [tool["name"] for tool in llm_client.TOOLS])
+        self.assertNotEqual(llm_client.GEMINI_TOOLS_SIGNATURE, "none")
+
+
+if __name__ == '__main__':
+    unittest.main()
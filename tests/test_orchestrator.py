@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.agents.latency_budget import latency_window, run_with_deadline
+from services.agents.orchestrator_agent import OrchestratorAgent, run_agent_graph
+
+LLM_DELAY = 0.2
+
+
+def make_llm(skill_level):
+    calls = []
+
+    async def llm(prompt, model_name="gemini-2.0-flash", **kwargs):
+        calls.append(prompt)
+        await asyncio.sleep(LLM_DELAY)
+        if kwargs.get("response_schema"):
+            return json.dumps({
+                "analysis": {"skill_level": skill_level, "languages": ["C++"], "patterns": [],
+                             "platform_preference": "codeforces"},
+                "weaknesses": {"weak_topics": ["dp-fused"], "missing_fundamentals": [], "improvement_priority": []},
+                "tasks": [],
+            })
+        if prompt.startswith("Analyze this coding activity"):
+            return json.dumps({"skill_level": skill_level, "languages": ["C++"]})
+        if prompt.startswith("Based on this coding activity"):
+            level = "Advanced" if "Skill Level: Advanced" in prompt else "other"
+            return json.dumps({"weak_topics": [f"dp-{level}"]})
+        return json.dumps([{"title": "t", "difficulty": "Easy", "topic": "dp", "due_days": 1, "reason": "r"}])
+
+    return llm, calls
+
+
+PROCESSED = {
+    "activities": [{"platform": "codeforces", "tags": ["dp"], "verdict": "OK"}],
+    "growth_metrics": {"platform_stats": {"codeforces": {"solved": 800, "total": 1200, "rating": 2100}}},
+}
+
+
+class TestParallelAnalysis(unittest.TestCase):
+    def run_analysis(self, skill_level):
+        llm, calls = make_llm(skill_level)
+        start = time.monotonic()
+        result = asyncio.run(OrchestratorAgent(llm).run_parallel_analysis("u1", PROCESSED))
+        return result, calls, time.monotonic() - start
+
+    def test_speculation_hit_overlaps_analysis_and_weaknesses(self):
+        result, calls, elapsed = self.run_analysis("Advanced")
+        self.assertEqual(result["agent_execution"]["speculation"], "hit")
+        self.assertEqual(result["weaknesses"]["weaknesses"]["weak_topics"], ["dp-Advanced"])
+        self.assertEqual(len(calls), 3)
+        self.assertLess(elapsed, 3 * LLM_DELAY)
+
+    def test_speculation_miss_reruns_weaknesses_with_real_skill_level(self):
+        result, calls, _ = self.run_analysis("Beginner")
+        self.assertEqual(result["agent_execution"]["speculation"], "miss")
+        self.assertEqual(result["weaknesses"]["weaknesses"]["weak_topics"], ["dp-other"])
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(len(result["tasks"]), 1)
+
+
+class TestIncrementalAnalysis(unittest.TestCase):
+    PREVIOUS_ANALYSIS = {"status": "success", "analysis": {"skill_level": "Advanced"}, "growth_metrics": {}}
+    PREVIOUS_WEAKNESSES = {"status": "success", "weaknesses": {"weak_topics": ["graphs"]}}
+
+    def test_only_tasks_rerun_when_analysis_and_weaknesses_reused(self):
+        llm, calls = make_llm("Advanced")
+        stages = []
+        reuse = {"analysis": self.PREVIOUS_ANALYSIS, "weaknesses": self.PREVIOUS_WEAKNESSES}
+        result = asyncio.run(OrchestratorAgent(llm).run(
+            "u1", PROCESSED, on_stage=lambda stage, output: stages.append(stage), reuse=reuse))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(result["weaknesses"]["weaknesses"]["weak_topics"], ["graphs"])
+        self.assertEqual(result["analysis"]["growth_metrics"], PROCESSED["growth_metrics"])
+        self.assertEqual(result["agent_execution"]["reused"], ["analysis", "weaknesses"])
+        self.assertEqual(result["agent_execution"]["speculation"], "skipped")
+        self.assertEqual(stages[-1], "tasks")
+        self.assertCountEqual(stages, ["analysis", "weaknesses", "tasks"])
+
+    def test_weaknesses_use_reused_analysis_without_speculating(self):
+        llm, calls = make_llm("Beginner")
+        result = asyncio.run(OrchestratorAgent(llm).run("u1", PROCESSED, reuse={"analysis": self.PREVIOUS_ANALYSIS}))
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(result["weaknesses"]["weaknesses"]["weak_topics"], ["dp-Advanced"])
+        self.assertEqual(result["agent_execution"]["reused"], ["analysis"])
+
+
+class TestFusedAnalysis(unittest.TestCase):
+    def test_single_call_split_into_pipeline_shape(self):
+        llm, calls = make_llm("Advanced")
+        result = asyncio.run(OrchestratorAgent(llm).run("u1", PROCESSED, mode="fused"))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(result["agent_execution"]["execution_mode"], "fused")
+        self.assertEqual(result["analysis"]["analysis"]["skill_level"], "Advanced")
+        self.assertEqual(result["weaknesses"]["weaknesses"]["weak_topics"], ["dp-fused"])
+        self.assertTrue(result["tasks"])  # empty task list replaced by fallback tasks
+
+    def test_unusable_response_falls_back_to_parallel(self):
+        async def llm(prompt, model_name="gemini-2.0-flash", **kwargs):
+            if kwargs.get("response_schema"):
+                return "not json"
+            return json.dumps({"skill_level": "Beginner"})
+
+        result = asyncio.run(OrchestratorAgent(llm).run("u1", PROCESSED, mode="fused"))
+        self.assertEqual(result["agent_execution"]["execution_mode"], "fused_fallback")
+
+
+class TestLatencyBudget(unittest.TestCase):
+    def test_slow_agent_is_replaced_by_fallback_and_marked_partial(self):
+        async def llm(prompt, model_name="gemini-2.0-flash", **kwargs):
+            if prompt.startswith("Generate"):
+                await asyncio.sleep(5)
+            return json.dumps({"skill_level": "Advanced", "weak_topics": ["dp"]})
+
+        start = time.monotonic()
+        result = asyncio.run(OrchestratorAgent(llm).run_parallel_analysis("u1", PROCESSED, budget=0.3))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertTrue(result["partial"])
+        self.assertEqual(result["agent_execution"]["timed_out"], ["tasks"])
+        self.assertEqual(result["tasks"][0]["topic"], "dp")  # fallback tasks built from weak topics
+
+    def test_fused_call_missing_budget_uses_all_fallbacks(self):
+        async def llm(prompt, model_name="gemini-2.0-flash", **kwargs):
+            await asyncio.sleep(5)
+
+        result = asyncio.run(OrchestratorAgent(llm).run("u1", PROCESSED, mode="fused", budget=0.1))
+        self.assertTrue(result["partial"])
+        self.assertEqual(result["analysis"]["status"], "timeout")
+        self.assertEqual(result["weaknesses"]["weaknesses"]["weak_topics"], ["dp"])
+        self.assertTrue(result["tasks"])
+
+
+class TestRunWithDeadline(unittest.TestCase):
+    def test_hedged_duplicate_wins_when_first_call_stalls(self):
+        window = latency_window("hedge-test")
+        for _ in range(20):
+            window.record(0.01)
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(5 if len(calls) == 1 else 0)
+            return len(calls)
+
+        async def scenario():
+            return await run_with_deadline("hedge-test", call, time.monotonic() + 1, hedge=True)
+
+        start = time.monotonic()
+        result, completed = asyncio.run(scenario())
+        self.assertTrue(completed)
+        self.assertEqual(result, 2)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+class TestRunAgentGraph(unittest.TestCase):
+    def test_steps_start_when_dependencies_finish(self):
+        order = []
+
+        def step(name, delay):
+            async def fn(results):
+                order.append(f"start {name}")
+                await asyncio.sleep(delay)
+                return name
+            return fn
+
+        graph = {
+            "slow": ((), step("slow", 0.1)),
+            "fast": ((), step("fast", 0.0)),
+            "after_fast": (("fast",), step("after_fast", 0.0)),
+            "join": (("slow", "after_fast"), step("join", 0.0)),
+        }
+        results = asyncio.run(run_agent_graph(graph))
+        self.assertEqual(results["join"], "join")
+        self.assertLess(order.index("start after_fast"), order.index("start join"))
+
+    def test_unsatisfiable_dependencies_raise(self):
+        async def fn(results):
+            return 1
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run_agent_graph({"a": (("missing",), fn)}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from libs.sessions import AsyncSessionService, PersistentSessionService
+
+
+class TestPersistentSessionService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "sessions.db")
+        self.sessions = PersistentSessionService(self.db_path, readers=2)
+
+    def tearDown(self):
+        self.sessions.close()
+        self.tmp.cleanup()
+
+    def test_database_uses_wal(self):
+        conn = sqlite3.connect(self.db_path)
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        self.assertEqual(mode, "wal")
+
+    def test_concurrent_context_updates_are_kept(self):
+        session_id = self.sessions.create("alice")["session_id"]
+
+        def append(worker):
+            for i in range(25):
+                self.sessions.update_context(session_id, {"worker": worker, "i": i})
+
+        threads = [threading.Thread(target=append, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.sessions.get_context(session_id, limit=1000)), 100)
+
+    def test_failed_write_is_rolled_back(self):
+        with self.assertRaises(RuntimeError):
+            with self.sessions._pool.write() as conn:
+                conn.execute("INSERT INTO sessions VALUES ('s1', 'bob', 0, 0, '[]')")
+                raise RuntimeError("boom")
+        self.assertIsNone(self.sessions.get("s1"))
+
+    def test_async_wrapper(self):
+        self.assertIsInstance(self.sessions.aio, AsyncSessionService)
+
+        async def run():
+            created = await asyncio.gather(*(self.sessions.aio.create(f"user{i}") for i in range(10)))
+            await asyncio.gather(*(self.sessions.aio.update_context(s["session_id"], {"n": 1}) for s in created))
+            return await asyncio.gather(*(self.sessions.aio.get(s["session_id"]) for s in created))
+
+        sessions = asyncio.run(run())
+        self.assertEqual([s["user_id"] for s in sessions], [f"user{i}" for i in range(10)])
+        self.assertTrue(all(s["context"] == [{"n": 1}] for s in sessions))
+
+    def test_get_returns_context_tail(self):
+        session_id = self.sessions.create("dave")["session_id"]
+        for i in range(10):
+            self.sessions.update_context(session_id, {"i": i})
+
+        session = self.sessions.get(session_id, context_limit=3)
+        self.assertEqual(session["context"], [{"i": 7}, {"i": 8}, {"i": 9}])
+
+    def test_context_pages_backwards(self):
+        session_id = self.sessions.create("erin")["session_id"]
+        other_id = self.sessions.create("frank")["session_id"]
+        for i in range(5):
+            self.sessions.update_context(session_id, {"i": i})
+            self.sessions.update_context(other_id, {"other": i})
+
+        pages = []
+        before = None
+        while True:
+            page = self.sessions.get_context(session_id, limit=2, before_seq=before)
+            if not page:
+                break
+            pages.append([event["item"]["i"] for event in page])
+            before = page[0]["seq"]
+        self.assertEqual(pages, [[3, 4], [1, 2], [0]])
+
+    def test_update_unknown_session(self):
+        self.assertFalse(self.sessions.update_context("missing", {"i": 1}))
+        self.assertEqual(self.sessions.get_context("missing"), [])
+
+    def test_legacy_context_is_migrated(self):
+        session_id = self.sessions.create("gina")["session_id"]
+        self.sessions.close()
+
+        # Context list as written by versions before session_events
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE sessions SET context = ? WHERE session_id = ?", ('[{"i": 0}, {"i": 1}]', session_id))
+        conn.commit()
+        conn.close()
+
+        self.sessions = PersistentSessionService(self.db_path)
+        self.sessions.update_context(session_id, {"i": 2})
+        self.assertEqual(self.sessions.get(session_id)["context"], [{"i": 0}, {"i": 1}, {"i": 2}])
+
+    def test_data_survives_reopen(self):
+        self.sessions.update_user_profile("carol", {"platforms": ["leetcode"], "total_activities": 3})
+        self.sessions.close()
+
+        self.sessions = PersistentSessionService(self.db_path)
+        profile = self.sessions.get_user_profile("carol")
+        self.assertEqual(profile["platforms"], ["leetcode"])
+        self.assertEqual(profile["total_activities"], 3)
+
+
+
+class TestWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "sessions.db")
+        self.sessions = None
+
+    def tearDown(self):
+        if self.sessions is not None:
+            self.sessions.close()
+        self.tmp.cleanup()
+
+    def _open(self, **kwargs):
+        self.sessions = PersistentSessionService(self.db_path, write_behind=True, **kwargs)
+        # Long interval so only reads, max_items and close() trigger a flush
+        self.sessions._write_behind.interval = 60
+        return self.sessions
+
+    def _stored_events(self):
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute("SELECT COUNT(*) FROM session_events").fetchone()[0]
+        conn.close()
+        return count
+
+    def test_reads_see_buffered_writes(self):
+        sessions = self._open()
+        session_id = sessions.create("alice")["session_id"]
+        # Let the background thread pick up the first write and start waiting
+        time.sleep(0.05)
+        self.assertTrue(sessions.update_context(session_id, {"i": 1}))
+        self.assertEqual(self._stored_events(), 0)
+
+        # Served from the buffer without applying it
+        self.assertEqual(sessions.get(session_id)["context"], [{"i": 1}])
+        self.assertEqual(self._stored_events(), 0)
+
+        # Paging needs seqs, so get_context waits for the background thread
+        self.assertEqual([event["item"] for event in sessions.get_context(session_id)], [{"i": 1}])
+        self.assertEqual(self._stored_events(), 1)
+
+    def test_reads_do_not_commit_on_the_calling_thread(self):
+        sessions = self._open()
+        sessions._write_behind.interval = 0.001
+        writers = []
+        pool_write = sessions._pool.write
+
+        def tracked_write():
+            writers.append(threading.current_thread().name)
+            return pool_write()
+
+        sessions._pool.write = tracked_write
+
+        async def analyze(user):
+            # The session and job calls one /analyze makes
+            session_id = (await sessions.aio.create(user))["session_id"]
+            await sessions.aio.get_analysis_result(user)
+            await sessions.aio.create_job(f"job-{user}", user, {"user_id": user})
+            await sessions.aio.update_job(f"job-{user}", "running")
+            await sessions.aio.save_analysis_result(user, {"codeforces": user}, "parallel", {"n": 1})
+            await sessions.aio.update_context(session_id, {"user": user})
+            await sessions.aio.update_job(f"job-{user}", "succeeded", result={"n": 1})
+            return (await sessions.aio.get(session_id), await sessions.aio.get_job(f"job-{user}"),
+                    await sessions.aio.get_analysis_result(user))
+
+        async def run():
+            return await asyncio.gather(*(analyze(f"user{i}") for i in range(20)))
+
+        results = asyncio.run(run())
+
+        for i, (session, job, stored) in enumerate(results):
+            self.assertEqual(session["context"], [{"user": f"user{i}"}])
+            self.assertEqual(job["status"], "succeeded")
+            self.assertIsNotNone(job["started_at"])
+            self.assertEqual(stored["result"], {"n": 1})
+        self.assertTrue(writers)
+        self.assertEqual(set(writers), {"session-write-behind"})
+        sessions._pool.write = pool_write
+
+    def test_full_buffer_is_flushed(self):
+        sessions = self._open()
+        sessions._write_behind.max_items = 5
+        session_id = sessions.create("bob")["session_id"]
+        for i in range(4):
+            sessions.update_context(session_id, {"i": i})
+
+        deadline = time.time() + 2
+        while self._stored_events() < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._stored_events(), 4)
+
+    def test_close_applies_buffered_writes(self):
+        sessions = self._open()
+        session_id = sessions.create("carol")["session_id"]
+        for i in range(3):
+            sessions.update_context(session_id, {"i": i})
+        sessions.update_context("missing", {"i": 0})
+        sessions.close()
+        self.assertEqual(self._stored_events(), 3)
+
+        self.sessions = PersistentSessionService(self.db_path)
+        self.assertEqual(len(self.sessions.get(session_id)["context"]), 3)
+
+    def test_profile_updates_coalesce(self):
+        sessions = self._open()
+        sessions.update_user_profile("dave", {"platforms": ["leetcode"], "total_activities": 1})
+        sessions.update_user_profile("dave", {"platforms": ["leetcode", "codeforces"], "total_activities": 2})
+        self.assertEqual(sessions.flush(), 2)
+        self.assertEqual(sessions.get_user_profile("dave")["total_activities"], 2)
+
+    def test_jobs_and_results_are_buffered(self):
+        sessions = self._open()
+        sessions.create_job("job-1", "frank", {"handles": {"codeforces": "frank"}})
+        sessions.update_job("job-1", "running")
+        sessions.update_job("job-1", "succeeded", result={"status": "success"})
+        sessions.save_analysis_result("frank", {"codeforces": "frank"}, "parallel", {"status": "success"})
+
+        conn = sqlite3.connect(self.db_path)
+        stored = conn.execute("SELECT COUNT(*) FROM analysis_jobs").fetchone()[0]
+        conn.close()
+        self.assertEqual(stored, 0)
+
+        job = sessions.get_job("job-1")
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"], {"status": "success"})
+        self.assertIsNotNone(job["started_at"])
+        self.assertEqual(sessions.get_analysis_result("frank")["analysis_mode"], "parallel")
+
+    def test_failed_write_does_not_drop_the_batch(self):
+        sessions = self._open()
+        session_id = sessions.create("erin")["session_id"]
+        sessions.flush()
+        sessions.update_context(session_id, {"i": 0})
+        # A second session row with an existing id violates the primary key
+        sessions._write_behind.put(lambda batch: batch.add_session(session_id, "erin", time.time()))
+        sessions.update_context(session_id, {"i": 1})
+        sessions.update_user_profile("erin", {"platforms": ["atcoder"], "total_activities": 4})
+
+        self.assertEqual(sessions.flush(), 4)
+        self.assertEqual(self._stored_events(), 2)
+        self.assertEqual(sessions.get_user_profile("erin")["total_activities"], 4)
+
+    def test_flush_durability(self):
+        sessions = self._open(durability="flush")
+        with sessions._pool.write() as conn:
+            # 2 = FULL
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 2)
+
+    def test_unknown_durability(self):
+        with self.assertRaises(ValueError):
+            PersistentSessionService(self.db_path, durability="never")
+
+
+if __name__ == '__main__':
+    unittest.main()
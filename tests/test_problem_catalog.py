@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.agents.task_generator_agent import TaskGeneratorAgent
+from services.tools.problem_catalog import ProblemCatalog, load_catalog, normalize_tag
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "problem_catalog.json")
+
+
+class TestProblemCatalog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog = load_catalog(CATALOG_PATH)
+
+    def test_loads_rated_problems_from_both_sources(self):
+        self.assertEqual(len(self.catalog), 11)
+        self.assertIsNone(self.catalog.get("1000-Z"))
+        self.assertEqual(self.catalog.get("abc300-abc300_a")["rating"], 0)
+        self.assertEqual(self.catalog.get("1842-C")["url"], "https://codeforces.com/problemset/problem/1842/C")
+        self.assertEqual(self.catalog.platforms, {"codeforces", "atcoder"})
+
+    def test_search_by_tag_rating_and_exclusion(self):
+        found = self.catalog.search(tags=["Dynamic Programming"], rating_range=(1200, 1500), count=10)
+        self.assertEqual([p["id"] for p in found], ["1842-C", "1843-D", "1859-C", "1851-E"])
+
+        found = self.catalog.search(tags=["dp"], rating_range=(1200, 1500), exclude_ids={"1842-C"}, count=1)
+        self.assertEqual([p["id"] for p in found], ["1843-D"])
+
+    def test_search_by_platform(self):
+        found = self.catalog.search(platform="atcoder", rating_range=(1000, 1400))
+        self.assertEqual([p["id"] for p in found], ["abc300-abc300_d"])
+
+    def test_missing_file_gives_empty_catalog(self):
+        self.assertEqual(len(load_catalog("/nonexistent/catalog.json")), 0)
+
+    def test_normalize_tag(self):
+        self.assertEqual(normalize_tag("Binary-Search"), "binary search")
+        self.assertEqual(normalize_tag(" Graph "), "graphs")
+
+
+class TestCatalogTaskGeneration(unittest.TestCase):
+    def test_tasks_are_real_unsolved_problems_with_llm_reasons(self):
+        prompts = []
+
+        async def llm(prompt, model_name="gemini-2.0-flash", **kwargs):
+            prompts.append((prompt, model_name))
+            return json.dumps({"1843-D": "Combines trees with DP."})
+
+        agent = TaskGeneratorAgent(llm, catalog=load_catalog(CATALOG_PATH))
+        weaknesses = {"weaknesses": {"weak_topics": ["dp", "trees"]}}
+        analysis = {"analysis": {"skill_level": "Intermediate"},
+                    "growth_metrics": {"platform_stats": {"codeforces": {"rating": 1250}}}}
+        activities = [{"id": "1842-C", "verdict": "OK"}]
+
+        result = asyncio.run(agent.generate_tasks(weaknesses, analysis, count=3, activities=activities))
+
+        self.assertEqual(result["source"], "catalog")
+        ids = [t["problem_id"] for t in result["tasks"]]
+        self.assertEqual(len(ids), 3)
+        self.assertNotIn("1842-C", ids)
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(prompts[0][1], "gemini-2.0-flash")
+        reasons = {t["problem_id"]: t["reason"] for t in result["tasks"]}
+        self.assertEqual(reasons["1843-D"], "Combines trees with DP.")
+
+    def test_empty_catalog_uses_llm_tasks(self):
+        async def llm(prompt, model_name="gemini-2.0-flash", **kwargs):
+            return json.dumps([{"title": "t", "difficulty": "Easy", "topic": "dp", "due_days": 1, "reason": "r"}])
+
+        result = asyncio.run(TaskGeneratorAgent(llm, catalog=ProblemCatalog([])).generate_tasks({}, {}))
+        self.assertEqual(result["tasks"][0]["title"], "t")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from libs.cache import CacheEntry, TieredCache
+from services.fetcher import codeforces_fetcher, profile_cache
+
+
+class TestTieredCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "cache.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_disk_tier_survives_new_instance(self):
+        TieredCache("test", db_path=self.db_path).set("k", {"rating": 1500}, ttl=60)
+        entry = TieredCache("test", db_path=self.db_path).get("k")
+        self.assertEqual(entry.value, {"rating": 1500})
+        self.assertTrue(entry.is_fresh)
+
+    def test_stale_entries_only_served_when_allowed(self):
+        cache = TieredCache("test", db_path=self.db_path, max_stale=60)
+        cache.set("k", "v", ttl=0)
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.get("k", allow_stale=True).value, "v")
+
+    def test_entries_past_max_stale_are_dropped(self):
+        cache = TieredCache("test", db_path=self.db_path, max_stale=0)
+        cache.set("k", "v", ttl=0)
+        self.assertIsNone(cache.get("k", allow_stale=True))
+
+    def test_lru_evicts_oldest_from_memory(self):
+        cache = TieredCache("test", max_entries=2, db_path=self.db_path)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        self.assertIsNone(cache.memory.get("a"))
+        # Still available from disk
+        self.assertEqual(cache.get("a").value, "a")
+
+    def test_purge_drops_expired_and_surplus_rows(self):
+        cache = TieredCache("test", db_path=self.db_path, max_stale=0, max_disk_entries=2)
+        cache.set("expired", "v", ttl=0)
+        for key in ("a", "b", "c"):
+            cache.set(key, key, ttl=60)
+        other = TieredCache("other", db_path=self.db_path)
+        other.set("kept", "v", ttl=0)
+
+        cache.purge()
+        self.assertEqual([key for key in ("expired", "a", "b", "c") if cache.disk.get("test", key)], ["b", "c"])
+        self.assertIsNotNone(other.disk.get("other", "kept"))
+
+    def test_writes_purge_periodically(self):
+        cache = TieredCache("test", db_path=self.db_path, max_stale=0)
+        cache.disk.set("test", "left_over", CacheEntry("v", 0, 60))
+
+        # The first write sweeps, later ones wait for CACHE_PURGE_INTERVAL
+        cache.set("a", "a", ttl=60)
+        self.assertIsNone(cache.disk.get("test", "left_over"))
+        cache.set("b", "b", ttl=0)
+        self.assertIsNotNone(cache.disk.get("test", "b"))
+
+    def test_disk_tier_uses_wal(self):
+        TieredCache("test", db_path=self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        self.assertEqual(mode, "wal")
+
+    def test_async_access_reads_disk_off_the_loop(self):
+        cache = TieredCache("test", max_entries=1, db_path=self.db_path, max_stale=0)
+
+        async def run():
+            await cache.aset("a", {"n": 1}, ttl=60)
+            await cache.aset("b", {"n": 2}, ttl=0)
+            # "a" was evicted from memory, so this is a disk read on a worker thread
+            with patch("libs.cache.tiered_cache.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+                entry = await cache.aget("a")
+                self.assertTrue(to_thread.called)
+            # Expired past max_stale: dropped from both tiers
+            self.assertIsNone(await cache.aget("b", allow_stale=True))
+            return entry
+
+        self.assertEqual(asyncio.run(run()).value, {"n": 1})
+        self.assertIsNone(cache.disk.get("test", "b"))
+
+
+class TestFetchAllCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TieredCache("profile", db_path=os.path.join(self.tmp.name, "cache.db"), max_stale=3600)
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def fake_fetch(self, handle):
+        self.calls.append(handle)
+        return {"activities": [{"platform": "codeforces", "id": f"1-{len(self.calls)}"}],
+                "stats": {"rating": 1500 + len(self.calls)}}
+
+    def run_fetch_all(self, coro_factory):
+        with patch.object(profile_cache, "_cache", self.cache), \
+                patch.dict(codeforces_fetcher.PLATFORM_FETCHERS, {"codeforces": self.fake_fetch}):
+            return asyncio.run(coro_factory())
+
+    def test_second_call_is_served_from_cache(self):
+        async def run():
+            first = await codeforces_fetcher.fetch_all({"codeforces": "tourist"})
+            second = await codeforces_fetcher.fetch_all({"Codeforces": " Tourist "})
+            return first, second
+
+        first, second = self.run_fetch_all(run)
+        self.assertEqual(self.calls, ["tourist"])
+        self.assertEqual(first, second)
+
+    def test_force_refresh_bypasses_cache(self):
+        async def run():
+            await codeforces_fetcher.fetch_all({"codeforces": "tourist"})
+            return await codeforces_fetcher.fetch_all({"codeforces": "tourist"}, force_refresh=True)
+
+        result = self.run_fetch_all(run)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(result["stats"]["codeforces"]["rating"], 1502)
+
+    def test_stale_entry_served_then_refreshed_in_background(self):
+        self.cache.set("codeforces:tourist", {"activities": [], "stats": {"rating": 1400}},
+                       ttl=0)
+
+        async def run():
+            result = await codeforces_fetcher.fetch_all({"codeforces": "tourist"})
+            # Let the background refresh finish
+            for _ in range(20):
+                await asyncio.sleep(0)
+            return result
+
+        result = self.run_fetch_all(run)
+        self.assertEqual(result["stats"]["codeforces"]["rating"], 1400)
+        self.assertEqual(self.calls, ["tourist"])
+        refreshed = self.cache.get("codeforces:tourist")
+        self.assertEqual(refreshed.value["stats"]["rating"], 1501)
+        self.assertLess(refreshed.age, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.fetcher import gemini_scraper
+from services.fetcher.profile_extractors import extract_profile_stats
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "profiles")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestProfileExtractors(unittest.TestCase):
+    def test_codechef(self):
+        stats, confidence = extract_profile_stats("codechef", load_fixture("codechef.html"))
+        self.assertEqual(confidence, 1.0)
+        self.assertEqual(stats, {
+            "rating": 1853, "stars": "4★", "global_rank": 4512, "country_rank": 3877,
+            "highest_rating": 1901, "total_solved": 412,
+        })
+
+    def test_codeforces(self):
+        stats, confidence = extract_profile_stats("codeforces", load_fixture("codeforces.html"))
+        self.assertEqual(confidence, 1.0)
+        self.assertEqual(stats, {
+            "rank": "legendary grandmaster", "rating": 3775, "max_rank": "legendary grandmaster",
+            "max_rating": 4009, "contribution": 135, "total_solved": 3012,
+        })
+
+    def test_atcoder(self):
+        stats, confidence = extract_profile_stats("atcoder", load_fixture("atcoder.html"))
+        self.assertEqual(confidence, 1.0)
+        self.assertEqual(stats, {
+            "rank": 8245, "rating": 1436, "highest_rating": 1502, "rated_matches": 57, "color": "cyan",
+        })
+
+    def test_leetcode(self):
+        stats, confidence = extract_profile_stats("leetcode", load_fixture("leetcode.html"))
+        self.assertEqual(confidence, 1.0)
+        self.assertEqual(stats, {
+            "total_solved": 2451, "easy_solved": 712, "medium_solved": 1233, "hard_solved": 506,
+            "ranking": 2871, "reputation": 142,
+        })
+
+    def test_unrecognized_page_has_no_confidence(self):
+        self.assertEqual(extract_profile_stats("codechef", load_fixture("codechef_minimal.html")), ({}, 0.0))
+        self.assertEqual(extract_profile_stats("hackerrank", "<html></html>"), ({}, 0.0))
+
+
+class TestScrapeProfileFallback(unittest.TestCase):
+    def scrape(self, platform, fixture, gemini_stats):
+        gemini = AsyncMock(return_value=gemini_stats)
+        with patch.object(gemini_scraper, "fetch_page_html", AsyncMock(return_value=load_fixture(fixture))), \
+                patch.object(gemini_scraper, "extract_stats_with_gemini", gemini):
+            result = asyncio.run(gemini_scraper.scrape_profile(platform, "someone"))
+        return result, gemini
+
+    def test_skips_gemini_when_rules_are_confident(self):
+        result, gemini = self.scrape("codechef", "codechef.html", {"rating": 1})
+        gemini.assert_not_called()
+        self.assertEqual(result["stats"]["rating"], 1853)
+
+    def test_falls_back_to_gemini_when_rules_find_too_little(self):
+        result, gemini = self.scrape("codechef", "codechef_minimal.html", {"rating": 1700})
+        gemini.assert_awaited_once()
+        self.assertEqual(result["stats"], {"rating": 1700})
+
+
+if __name__ == '__main__':
+    unittest.main()
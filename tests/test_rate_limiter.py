@@ -0,0 +1,70 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from libs.observability import metrics_collector
+from services.fetcher.rate_limiter import HostGovernor, HOST_NAMES, RateLimitExceeded, get_governor
+
+
+class TestHostGovernor(unittest.TestCase):
+    def test_burst_then_sustained_rate(self):
+        governor = HostGovernor("test_rate", rate=20.0, burst=2, max_in_flight=10)
+
+        async def run():
+            stamps = []
+
+            async def request():
+                async with governor.slot():
+                    stamps.append(time.monotonic())
+
+            start = time.monotonic()
+            await asyncio.gather(*[request() for _ in range(4)])
+            return [s - start for s in sorted(stamps)]
+
+        stamps = asyncio.run(run())
+        # Two immediate (burst), then one every 50ms
+        self.assertLess(stamps[1], 0.03)
+        self.assertGreaterEqual(stamps[3], 0.09)
+
+    def test_max_in_flight_cap(self):
+        governor = HostGovernor("test_cap", rate=1000.0, burst=100, max_in_flight=2)
+        peak = []
+
+        async def run():
+            async def request():
+                async with governor.slot():
+                    peak.append(governor.in_flight)
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(*[request() for _ in range(6)])
+
+        asyncio.run(run())
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(governor.in_flight, 0)
+
+    def test_deadline_raises_rate_limit_exceeded(self):
+        governor = HostGovernor("test_deadline", rate=0.1, burst=1, max_in_flight=5)
+
+        async def run():
+            async with governor.slot():
+                pass
+            async with governor.slot(max_wait=0.05):
+                pass
+
+        with self.assertRaises(RateLimitExceeded):
+            asyncio.run(run())
+        self.assertGreaterEqual(metrics_collector.get_metrics()["counters"]["ratelimit.test_deadline.rejected"], 1)
+        self.assertEqual(governor.waiting, 0)
+
+    def test_hosts_share_platform_governor(self):
+        self.assertEqual(HOST_NAMES["www.codechef.com"], HOST_NAMES["codechef.com"])
+        self.assertIs(get_governor("codeforces"), get_governor("codeforces"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from libs.observability import metrics_collector
+from libs.sessions import PersistentSessionService
+from services.fetcher import rate_limiter
+from services.gateway import refresh_scheduler
+from services.gateway.refresh_scheduler import RefreshScheduler
+
+
+class TestRefreshScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sessions = PersistentSessionService(os.path.join(self.tmp.name, "sessions.db"))
+        self.refreshed = []
+
+        async def refresh(user_id, handles, analysis_mode):
+            self.refreshed.append((user_id, handles, analysis_mode))
+
+        self.refresh = refresh
+
+    def tearDown(self):
+        self.sessions.close()
+        self.tmp.cleanup()
+
+    def _track(self, user_id, accessed_ago, computed_ago, handles=None):
+        session_id = self.sessions.create(user_id)["session_id"]
+        self.sessions.update_context(session_id, {})
+        self.sessions.save_analysis_result(user_id, handles or {"leetcode": user_id}, "parallel", {"status": "success"})
+
+        # Backdate access and computation times
+        conn = sqlite3.connect(self.sessions.db_path)
+        now = time.time()
+        conn.execute("UPDATE sessions SET last_accessed = ? WHERE user_id = ?", (now - accessed_ago, user_id))
+        conn.execute("UPDATE analysis_results SET computed_at = ? WHERE user_id = ?", (now - computed_ago, user_id))
+        conn.commit()
+        conn.close()
+
+    def _scheduler(self, **kwargs):
+        kwargs.setdefault("spacing", 0)
+        return RefreshScheduler(self.sessions.aio, self.refresh, min_age=600, active_window=86400, **kwargs)
+
+    def test_refreshes_stale_active_users_most_recent_first(self):
+        self._track("recent", accessed_ago=60, computed_ago=3600)
+        self._track("older", accessed_ago=7200, computed_ago=3600)
+        self._track("fresh_result", accessed_ago=10, computed_ago=60)
+        self._track("inactive", accessed_ago=3 * 86400, computed_ago=3600)
+
+        refreshed = asyncio.run(self._scheduler().run_once())
+
+        self.assertEqual(refreshed, 2)
+        self.assertEqual([r[0] for r in self.refreshed], ["recent", "older"])
+        self.assertEqual(self.refreshed[0][1:], ({"leetcode": "recent"}, "parallel"))
+
+    def test_batch_size_limits_round(self):
+        for i in range(3):
+            self._track(f"user{i}", accessed_ago=60 * (i + 1), computed_ago=3600)
+
+        asyncio.run(self._scheduler(batch_size=2).run_once())
+        self.assertEqual([r[0] for r in self.refreshed], ["user0", "user1"])
+
+    def test_pauses_and_gives_up_under_load(self):
+        self._track("user", accessed_ago=60, computed_ago=3600)
+        with patch.object(metrics_collector, "active_requests", 5), \
+                patch.object(refresh_scheduler, "REFRESH_LOAD_CHECK_INTERVAL", 0.01), \
+                patch.object(refresh_scheduler, "REFRESH_MAX_PAUSE", 0.03):
+            refreshed = asyncio.run(self._scheduler(max_active_requests=2).run_once())
+
+        self.assertEqual(refreshed, 0)
+        self.assertEqual(self.refreshed, [])
+
+    def test_defers_users_with_busy_rate_limits(self):
+        self._track("busy", accessed_ago=60, computed_ago=3600, handles={"codeforces": "busy"})
+        self._track("idle", accessed_ago=120, computed_ago=3600, handles={"leetcode": "idle"})
+
+        governor = rate_limiter.HostGovernor("codeforces", 1.0, 1, 1)
+        governor.waiting = 1
+        with patch.dict(rate_limiter._governors, {"codeforces": governor}):
+            asyncio.run(self._scheduler().run_once())
+
+        self.assertEqual([r[0] for r in self.refreshed], ["idle"])
+
+    def test_failed_refresh_does_not_stop_round(self):
+        self._track("a", accessed_ago=60, computed_ago=3600)
+        self._track("b", accessed_ago=120, computed_ago=3600)
+
+        async def refresh(user_id, handles, analysis_mode):
+            if user_id == "a":
+                raise RuntimeError("upstream down")
+            self.refreshed.append((user_id, handles, analysis_mode))
+
+        scheduler = RefreshScheduler(self.sessions.aio, refresh, min_age=600, active_window=86400, spacing=0)
+        self.assertEqual(asyncio.run(scheduler.run_once()), 1)
+        self.assertEqual([r[0] for r in self.refreshed], ["b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
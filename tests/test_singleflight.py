@@ -0,0 +1,60 @@
+import asyncio
+import os
+import sys
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.fetcher.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight("test.singleflight")
+        executions = []
+
+        async def fetch():
+            executions.append(1)
+            await asyncio.sleep(0.01)
+            return {"stats": {"rating": 1500}}
+
+        async def run():
+            return await asyncio.gather(*[flight.do(("codeforces", "tourist"), fetch) for _ in range(5)])
+
+        results = asyncio.run(run())
+        self.assertEqual(len(executions), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertAlmostEqual(flight.hit_rate, 0.8)
+
+    def test_sequential_calls_refetch(self):
+        flight = SingleFlight("test.singleflight")
+        executions = []
+
+        async def fetch():
+            executions.append(1)
+            return len(executions)
+
+        async def run():
+            first = await flight.do("key", fetch)
+            second = await flight.do("key", fetch)
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), (1, 2))
+
+    def test_exception_reaches_all_waiters(self):
+        flight = SingleFlight("test.singleflight")
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream 503")
+
+        async def run():
+            return await asyncio.gather(*[flight.do("key", fetch) for _ in range(3)], return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+import unittest
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.agents.weakness_detector_agent import WeaknessDetectorAgent
+from services.preprocessor.tag_stats import compute_tag_stats, detect_weak_topics, format_tag_stats
+
+NOW = 1_700_000_000
+HOUR = 3600
+
+
+def submission(problem, tags, ok, hours_ago, platform="codeforces"):
+    return {"platform": platform, "id": problem, "tags": tags,
+            "verdict": "OK" if ok else "WRONG_ANSWER", "timestamp": NOW - hours_ago * HOUR}
+
+
+def strong_signal_activities():
+    activities = []
+    for i in range(15):
+        activities.append(submission(f"G{i}", ["greedy", "math"], True, i))
+    for tag in ("dp", "graphs", "trees"):
+        for i in range(12):
+            activities.append(submission(f"{tag}{i % 4}", [tag], i % 4 == 0, i))
+    return activities
+
+
+def by_key(stats):
+    return {(row["tag"], row["platform"]): row for row in stats}
+
+
+class TestTagStats(unittest.TestCase):
+    def test_counts_rates_and_first_ac_latency(self):
+        activities = [
+            submission("A", ["dp"], False, 5),
+            submission("A", ["dp"], False, 4),
+            submission("A", ["dp"], True, 2),
+            submission("B", ["dp", "Greedy"], True, 1),
+            submission("C", ["dp"], False, 1, platform="leetcode"),
+        ]
+        stats = by_key(compute_tag_stats(activities, now=NOW))
+
+        dp_cf = stats[("dp", "codeforces")]
+        self.assertEqual((dp_cf["attempts"], dp_cf["accepted"]), (4, 2))
+        self.assertEqual(dp_cf["acceptance_rate"], 0.5)
+        self.assertEqual((dp_cf["problems"], dp_cf["solved_problems"]), (2, 2))
+        self.assertEqual(dp_cf["first_ac_latency_hours"], 1.5)  # A after 3h, B immediately
+
+        dp_all = stats[("dp", "all")]
+        self.assertEqual((dp_all["attempts"], dp_all["accepted"], dp_all["problems"]), (5, 2, 3))
+        self.assertIsNone(stats[("dp", "leetcode")]["first_ac_latency_hours"])
+        self.assertIn(("greedy", "codeforces"), stats)
+
+    def test_recent_failures_weigh_more(self):
+        old_failures = [submission("A", ["dp"], False, 24 * 120 + i) for i in range(5)]
+        recent_successes = [submission("B", ["dp"], True, i) for i in range(5)]
+        row = by_key(compute_tag_stats(old_failures + recent_successes, now=NOW))[("dp", "all")]
+        self.assertEqual(row["acceptance_rate"], 0.5)
+        self.assertLess(row["recent_failure_rate"], 0.1)
+
+    def test_untagged_activities_are_ignored(self):
+        self.assertEqual(compute_tag_stats([{"platform": "leetcode", "tags": [], "verdict": "OK"}]), [])
+        self.assertEqual(format_tag_stats([]), "No tagged submissions")
+
+    def test_strong_signal_picks_weak_topics(self):
+        weaknesses = detect_weak_topics(compute_tag_stats(strong_signal_activities(), now=NOW))
+        self.assertEqual(sorted(weaknesses["weak_topics"]), ["dp", "graphs", "trees"])
+        self.assertNotIn("greedy", weaknesses["missing_fundamentals"])
+        self.assertIn("strings", weaknesses["missing_fundamentals"])
+
+    def test_weak_signal_defers_to_llm(self):
+        self.assertIsNone(detect_weak_topics(compute_tag_stats(strong_signal_activities()[:20], now=NOW)))
+
+
+class TestWeaknessDetectorFastPath(unittest.TestCase):
+    def test_strong_signal_skips_llm(self):
+        async def llm(prompt, model_name="gemini-2.0-flash", **kwargs):
+            raise AssertionError("LLM should not be called")
+
+        result = asyncio.run(WeaknessDetectorAgent(llm).detect_weaknesses(strong_signal_activities(), {}))
+        self.assertEqual(result["source"], "rules")
+
+    def test_prompt_includes_tag_stats(self):
+        prompts = []
+
+        async def llm(prompt, model_name="gemini-2.0-flash", **kwargs):
+            prompts.append(prompt)
+            return '{"weak_topics": ["dp"]}'
+
+        asyncio.run(WeaknessDetectorAgent(llm).detect_weaknesses([submission("A", ["dp"], False, 1)], {}))
+        self.assertIn("dp: 1 attempts, 0% accepted", prompts[0])
+
+
+if __name__ == '__main__':
+    unittest.main()